@@ -0,0 +1,257 @@
+"""An asyncio version of editor_server.py, serving the same API routes and static files.
+
+Connections are handled by a single event loop and kept alive between requests, static files are
+sent with sendfile(), and the blocking API routes (renders, tier dict writes, thumbnails) run on
+a bounded thread pool, so that a slow render never holds up the other requests.
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import email.utils
+import http
+import mimetypes
+import os
+import threading
+
+from editor_api import PORT, EditorApp, Response, response_headers, static_file_path
+
+# Largest request head (request line and headers) accepted, in bytes
+MAX_REQUEST_HEAD_SIZE = 64 * 1024
+# Seconds an idle keep-alive connection is kept open
+KEEP_ALIVE_TIMEOUT = 75
+# Threads running the blocking API routes
+API_WORKERS = 8
+
+class BadRequest(Exception):
+    """Raised when a request cannot be parsed."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class AsyncEditorServer:
+    """The editor server, on top of asyncio.start_server().
+
+    Args:
+        app (EditorApp): Optional. The API routes, a new EditorApp by default
+        host (str): Optional. The address to listen on, all interfaces by default
+        port (int): Optional. The port to listen on, PORT by default (0 picks a free port)
+        workers (int): Optional. The number of threads running the API routes, API_WORKERS by default
+    """
+
+    def __init__(self, app: EditorApp = None, host: str = "", port: int = PORT, workers: int = API_WORKERS):
+        self.app = app or EditorApp()
+        self.host = host
+        self.port = port
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='editor-api')
+        self.server_address = None
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+    async def start(self):
+        """Start listening, server_address is set once this returns."""
+        self._loop = asyncio.get_running_loop()
+        await self._loop.run_in_executor(self.executor, self.app.assets.build)
+        self._server = await asyncio.start_server(self.handle_connection, self.host or None, self.port,
+                                                  reuse_address=True, limit=MAX_REQUEST_HEAD_SIZE)
+        self.server_address = self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> tuple:
+        """Run the server on an event loop in a background thread, and return the address it listens on."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self.server_address
+
+    def shutdown(self):
+        """Stop a server started with start_in_thread()."""
+        async def close():
+            self._server.close()
+            if hasattr(self._server, 'close_clients'):
+                self._server.close_clients()
+            await self._server.wait_closed()
+
+        if self._thread is not None:
+            asyncio.run_coroutine_threadsafe(close(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of a connection, one after the other, until either side closes it."""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except BadRequest as e:
+                    await self.send_error(writer, e.status, str(e))
+                    break
+                if request is None:
+                    break
+                if not await self.respond(writer, *request):
+                    break
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def read_request(self, reader: asyncio.StreamReader):
+        """Read a request, and return (method, path, headers with lowercase names, body, keep-alive),
+        or None if the client closed the connection."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise BadRequest(431, "Request header fields too large")
+        lines = head.decode('iso-8859-1').split('\r\n')
+        request_line = lines[0].split()
+        if len(request_line) != 3 or not request_line[2].startswith('HTTP/1.'):
+            raise BadRequest(400, f"Bad request line: {lines[0]!r}")
+        method, path, version = request_line
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, separator, value = line.partition(':')
+            if not separator:
+                raise BadRequest(400, f"Bad header line: {line!r}")
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise BadRequest(501, "Chunked request bodies are not supported")
+        try:
+            content_length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise BadRequest(400, "Bad Content-Length")
+        body = await reader.readexactly(content_length) if content_length > 0 else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+        return method, path, headers, body, keep_alive
+
+    async def respond(self, writer: asyncio.StreamWriter, method: str, path: str, headers: dict, body: bytes,
+                      keep_alive: bool) -> bool:
+        """Send the response to a request, and return whether the connection can be reused."""
+        loop = asyncio.get_running_loop()
+        response = None
+        if method in ('GET', 'HEAD'):
+            if path.startswith('/api/'):
+                response = await loop.run_in_executor(self.executor, self.app.handle, 'GET', path, headers, body)
+            else:
+                # Rebuilds (and compresses) the editor files if they changed since the last request
+                response = await loop.run_in_executor(self.executor, self.app.assets.response, path, headers)
+            if response is None:
+                response = self.static_file_response(path)
+        elif method in ('POST', 'PATCH'):
+            response = await loop.run_in_executor(self.executor, self.app.handle, method, path, headers, body)
+        else:
+            response = Response(501, b'Unsupported method', 'text/plain')
+
+        if response.events is not None:
+            await self.send_events(writer, path, response)
+            return False
+
+        file = None
+        if response.file_path is not None:
+            try:
+                file = open(response.file_path, 'rb')
+            except OSError as e:
+                response = Response.json({"error": str(e)}, 500)
+        try:
+            size = os.fstat(file.fileno()).st_size if file is not None else len(response.body)
+            extra = {} if response.status == 304 else {'Content-Length': str(size)}
+            if not keep_alive:
+                extra['Connection'] = 'close'
+            self.write_head(writer, path, response, extra)
+            if method != 'HEAD' and response.status != 304:
+                if file is not None:
+                    await writer.drain()
+                    await loop.sendfile(writer.transport, file)
+                else:
+                    writer.write(response.body)
+            await writer.drain()
+        finally:
+            if file is not None:
+                file.close()
+        return keep_alive
+
+    async def send_events(self, writer: asyncio.StreamWriter, path: str, response: Response):
+        """Stream Server-Sent Events, waiting for each one on the event loop, then close the connection."""
+        self.write_head(writer, path, response, {'Connection': 'close'})
+        async with contextlib.aclosing(aiter(response.events)) as events:
+            async for chunk in events:
+                writer.write(chunk)
+                await writer.drain()
+
+    def static_file_response(self, path: str) -> Response:
+        """Return the static file at the given URL path, like SimpleHTTPRequestHandler (without directory listings)."""
+        file_path = static_file_path(path)
+        if os.path.isdir(file_path):
+            file_path = os.path.join(file_path, 'index.html')
+        if file_path.endswith('/') or not os.path.isfile(file_path):
+            return Response(404, b'File not found', 'text/plain')
+        content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        return Response(content_type=content_type, file_path=file_path)
+
+    def write_head(self, writer: asyncio.StreamWriter, path: str, response: Response, extra: dict):
+        """Write the status line and headers of the response."""
+        try:
+            reason = http.HTTPStatus(response.status).phrase
+        except ValueError:
+            reason = ''
+        lines = [f"HTTP/1.1 {response.status} {reason}",
+                 f"Date: {email.utils.formatdate(usegmt=True)}"]
+        headers = {**response.headers, **extra, **response_headers(path)}
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('iso-8859-1'))
+
+    async def send_error(self, writer: asyncio.StreamWriter, status: int, message: str):
+        response = Response(status, message.encode('utf-8'), 'text/plain')
+        self.write_head(writer, '', response, {'Content-Length': str(len(response.body)), 'Connection': 'close'})
+        await writer.drain()
+
+if __name__ == '__main__':
+    # Start server in same directory as src/tierlist/tier_dict.json
+    server = AsyncEditorServer()
+    # Load the tierlist renderer in the background, so that the first export is fast too
+    server.executor.submit(server.app.render_jobs.engine.warm)
+    print(f"Server starting at http://localhost:{PORT}/editor.html")
+    print("To stop, press Ctrl+C")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -97,24 +97,72 @@ toggleYearRerankBtn.addEventListener('click', () => {
 
 // Run Tierlist Button Logic
 const runTierlistBtn = document.getElementById('run-tierlist-btn');
+
+// Follow a render job until it finishes, showing its progress on the button.
+// Progress is streamed with Server-Sent Events, falling back to polling if the stream fails.
+function waitForRenderJob(job) {
+    return new Promise((resolve) => {
+        const showProgress = (state) => {
+            if (state.total) {
+                runTierlistBtn.textContent = `Rendering... ${state.completed}/${state.total}`;
+            }
+        };
+        const poll = async () => {
+            try {
+                const res = await fetch(`/api/render/${job.job_id}`);
+                const state = await res.json();
+                if (!res.ok) {
+                    resolve({ status: 'failed', error: state.error });
+                } else if (state.status === 'done' || state.status === 'failed') {
+                    resolve(state);
+                } else {
+                    showProgress(state);
+                    setTimeout(poll, 500);
+                }
+            } catch (err) {
+                resolve({ status: 'failed', error: err.message });
+            }
+        };
+        if (typeof EventSource === 'undefined') {
+            poll();
+            return;
+        }
+        const events = new EventSource(`/api/render/${job.job_id}/events`);
+        events.addEventListener('progress', (e) => showProgress(JSON.parse(e.data)));
+        for (const status of ['done', 'failed']) {
+            events.addEventListener(status, (e) => {
+                events.close();
+                resolve(JSON.parse(e.data));
+            });
+        }
+        events.onerror = () => {
+            events.close();
+            poll();
+        };
+    });
+}
+
 runTierlistBtn.addEventListener('click', async () => {
     runTierlistBtn.textContent = 'Running...';
     runTierlistBtn.disabled = true;
     runTierlistBtn.style.opacity = '0.7';
 
     try {
-        const res = await fetch('/api/run_tierlist', { method: 'POST' });
-        const data = await res.json().catch(() => ({ error: "Failed to parse server response" }));
-
-        if (res.ok) {
-            saveIndicator.textContent = 'Successfully generated images!';
+        const res = await fetch('/api/render', { method: 'POST' });
+        const job = await res.json().catch(() => ({ error: "Failed to parse server response" }));
+        const data = res.ok ? await waitForRenderJob(job) : { status: 'failed', error: job.error };
+
+        if (data.status === 'done') {
+            const result = data.result;
+            const timing = typeof result.render_time === 'number' ? ` (${result.render_time.toFixed(2)}s)` : '';
+            saveIndicator.textContent = (result.rendered === false ? 'Images already up to date' : 'Successfully generated images!') + timing;
             saveIndicator.className = 'save-indicator saved';
             setTimeout(() => {
                 saveIndicator.style.display = "";
                 saveIndicator.className = "save-indicator";
             }, 3000);
         } else {
-            const details = data.details ? `: ${data.details}` : (data.error ? `: ${data.error}` : '');
+            const details = data.error ? `: ${data.error}` : '';
             saveIndicator.textContent = 'Error' + details;
             saveIndicator.className = 'save-indicator error';
         }
@@ -141,6 +189,16 @@ runTierlistBtn.addEventListener('click', async () => {
 let globalTierDict = {};
 let unassignedLogos = []; // list of logo paths
 const imageCache = new Map();
+// Height of the logo thumbnails shown in the tier list (logos are 200px wide, sharper on HiDPI screens)
+const THUMB_HEIGHT = Math.min(400, Math.round(200 * (window.devicePixelRatio || 1)));
+
+// Returns the URL to load an image from: logos are loaded as resized thumbnails instead of full size
+function imageUrl(path) {
+    if (path.startsWith('logos/')) {
+        return `/api/thumb/${encodeURIComponent(path.slice('logos/'.length))}?h=${THUMB_HEIGHT}`;
+    }
+    return path;
+}
 
 // DOM elements for Modal and Dropdown
 const unassignedBtn = document.getElementById('unassigned-btn');
@@ -254,7 +312,8 @@ async function init() {
     try {
         // Fetch logos and dict in parallel
         const [dataRes, logosRes] = await Promise.all([
-            fetch('/api/data'),
+            // Revalidate the cached tier dict with its ETag, the server answers 304 if it is unchanged
+            fetch('/api/data', { cache: 'no-cache' }),
             fetch('/api/logos')
         ]);
 
@@ -266,6 +325,7 @@ async function init() {
         ]);
 
         globalTierDict = data.tier_dict;
+        tierDictEtag = dataRes.headers.get('ETag');
         const columns = data.num_logos_per_row || 17;
 
         // Determine unassigned logos
@@ -278,6 +338,8 @@ async function init() {
 
         unassignedLogos = logosData.logos.filter(l => !allExtractedLogos.has(`logos/${l}`.toLowerCase()));
         updateUnassignedDropdown();
+        logoVersion = logosData.version;
+        setInterval(pollLogoChanges, LOGO_POLL_INTERVAL_MS);
 
         // Collect ALL image paths
         const imagePaths = [];
@@ -295,8 +357,9 @@ async function init() {
             });
         });
 
-        // Preload everything before render
-        await loadImagesWithProgress(imagePaths);
+        // Preload everything before render, logos from the atlas first
+        await loadLogoAtlas();
+        await loadImagesWithProgress(imagePaths.filter(path => !imageCache.has(path)));
 
         // Fade out loading overlay
         const overlay = document.getElementById('loading-overlay');
@@ -322,6 +385,52 @@ async function init() {
     }
 }
 
+// Version of the logo list last fetched from /api/logos, to only fetch what changed since
+let logoVersion = null;
+const LOGO_POLL_INTERVAL_MS = 5000;
+
+function assignedLogoPaths() {
+    const paths = new Set();
+    Object.values(globalTierDict).forEach(tierObj => {
+        Object.values(tierObj).forEach(info => paths.add(info.path_to_logo_image.toLowerCase()));
+    });
+    return paths;
+}
+
+// Picks up logos added, removed, renamed or replaced in the logos directory while the editor is open
+async function pollLogoChanges() {
+    if (logoVersion === null || document.hidden) return;
+    try {
+        const res = await fetch(`/api/logos?since=${logoVersion}`, { cache: 'no-cache' });
+        if (!res.ok) return;
+        const data = await res.json();
+        if (data.version === logoVersion) return;
+        const assigned = assignedLogoPaths();
+        if (data.reset) {
+            unassignedLogos = data.logos.filter(l => !assigned.has(`logos/${l}`.toLowerCase()));
+        } else {
+            const replaced = [];
+            data.changes.forEach(({ name, logo }) => {
+                const path = `logos/${name}`;
+                unassignedLogos = unassignedLogos.filter(l => l !== name);
+                if (logo && !assigned.has(path.toLowerCase())) unassignedLogos.push(name);
+                if (logo && imageCache.has(path)) replaced.push(path);
+            });
+            unassignedLogos.sort();
+            // Draw the new version of logos replaced on disk
+            if (replaced.length) {
+                replaced.forEach(path => imageCache.delete(path));
+                await Promise.all(replaced.map(ensureImageInCache));
+                render(currentColumns);
+            }
+        }
+        logoVersion = data.version;
+        updateUnassignedDropdown();
+    } catch (e) {
+        console.error("Failed to fetch logo changes", e);
+    }
+}
+
 function updateUnassignedDropdown() {
     unassignedBadge.textContent = unassignedLogos.length;
     unassignedDropdown.innerHTML = '';
@@ -571,31 +680,90 @@ async function handleDrop(e) {
     this.classList.remove('drag-over');
 
     if (draggedElement) {
+        const name = draggedElement.dataset.name;
+        const before = findRestaurant(name);
         rebuildTierDict();
-        await saveToServer();
+        // Only send the moved restaurant (and its year, if the move changed it) to the server
+        const ops = [placementOp(name)];
+        const fields = before ? changedFields(before.info, findRestaurant(name).info) : {};
+        if (Object.keys(fields).length) ops.push({ op: 'update', name, fields });
+        await saveToServer(ops);
         render(currentColumns);
     }
     return false;
 }
 
-async function saveToServer() {
+// Returns the tier and a copy of the info of a restaurant, or null if it is not in the tier list
+function findRestaurant(name) {
+    for (const [tier, restaurants] of Object.entries(globalTierDict)) {
+        if (restaurants[name]) return { tier, info: { ...restaurants[name] } };
+    }
+    return null;
+}
+
+// Returns the fields that differ between two restaurant infos, with null for the removed ones
+function changedFields(before, after) {
+    const fields = {};
+    for (const key of new Set([...Object.keys(before), ...Object.keys(after)])) {
+        if (!(key in after)) {
+            fields[key] = null;
+        } else if (JSON.stringify(before[key]) !== JSON.stringify(after[key])) {
+            fields[key] = after[key];
+        }
+    }
+    return fields;
+}
+
+// Returns the operation placing a restaurant at its current position in globalTierDict
+function placementOp(name) {
+    const { tier } = findRestaurant(name);
+    return { op: 'move', name, tier, index: Object.keys(globalTierDict[tier]).indexOf(name) };
+}
+
+// ETag of the tier dict version this editor is based on, sent with every save so that the
+// server rejects saves that would overwrite changes made elsewhere (e.g. in another tab)
+let tierDictEtag = null;
+// Saves are sent one at a time, so that each one is based on the version saved by the previous one
+let saveQueue = Promise.resolve();
+
+// Saves the given edit operations (see PATCH /api/data), or the whole tier dict if there are none
+function saveToServer(ops = null) {
+    saveQueue = saveQueue.then(() => sendTierDict(ops));
+    return saveQueue;
+}
+
+async function sendTierDict(ops) {
     saveIndicator.textContent = "Saving...";
     saveIndicator.className = "save-indicator saving";
 
     try {
-        const res = await fetch('/api/update', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(globalTierDict)
-        });
+        const headers = { 'Content-Type': 'application/json' };
+        if (tierDictEtag) headers['If-Match'] = tierDictEtag;
+        let res = ops ? await fetch('/api/data', {
+            method: 'PATCH',
+            headers,
+            body: JSON.stringify({ ops })
+        }) : null;
+        if (!res || res.status === 400) {
+            // No operations, or the server could not apply them: save the whole tier dict instead
+            res = await fetch('/api/update', {
+                method: 'POST',
+                headers,
+                body: JSON.stringify(globalTierDict)
+            });
+        }
 
         if (res.ok) {
+            tierDictEtag = res.headers.get('ETag');
             saveIndicator.textContent = "Saved!";
             saveIndicator.className = "save-indicator saved";
             setTimeout(() => {
                 saveIndicator.style.display = "";
                 saveIndicator.className = "save-indicator";
             }, 2000);
+        } else if (res.status === 412) {
+            saveIndicator.textContent = "Not saved: tier list was changed elsewhere, reload the page";
+            saveIndicator.className = "save-indicator error";
         } else {
             throw new Error("Bad response");
         }
@@ -653,11 +821,52 @@ function loadImagesWithProgress(paths) {
                 }
             };
 
-            img.src = path;
+            img.src = imageUrl(path);
         });
     });
 }
 
+// Loads the thumbnails of all logos at once from the atlas (one image packing every logo), cutting
+// each logo out into imageCache. Logos missing from the atlas are loaded as separate thumbnails.
+async function loadLogoAtlas() {
+    try {
+        const res = await fetch(`/api/atlas?h=${THUMB_HEIGHT}`, { cache: 'no-cache' });
+        if (!res.ok) return;
+        const atlas = await res.json();
+        // No logo to load
+        if (!atlas.image) return;
+        const atlasImg = new Image();
+        await new Promise((resolve, reject) => {
+            atlasImg.onload = resolve;
+            atlasImg.onerror = reject;
+            atlasImg.src = atlas.image;
+        });
+        const canvas = document.createElement('canvas');
+        const ctx = canvas.getContext('2d');
+        const logos = Object.entries(atlas.logos);
+        let loaded = 0;
+        await Promise.all(logos.map(([path, [x, y, w, h]]) => {
+            canvas.width = w;
+            canvas.height = h;
+            ctx.clearRect(0, 0, w, h);
+            ctx.drawImage(atlasImg, x, y, w, h, 0, 0, w, h);
+            const img = new Image();
+            img.src = canvas.toDataURL(atlas.image.endsWith('.png') ? 'image/png' : 'image/jpeg', 0.92);
+            return img.decode().catch(() => {}).then(() => {
+                imageCache.set(path, img);
+                loaded++;
+                const percent = Math.round((loaded / logos.length) * 100);
+                const progressFill = document.getElementById('progress-fill');
+                const progressText = document.getElementById('progress-text');
+                if (progressFill) progressFill.style.width = percent + '%';
+                if (progressText) progressText.textContent = percent + '%';
+            });
+        }));
+    } catch (err) {
+        console.warn("Failed to load the logo atlas, loading logos one by one", err);
+    }
+}
+
 async function ensureImageInCache(path) {
     if (imageCache.has(path)) return imageCache.get(path);
     return new Promise((resolve) => {
@@ -673,7 +882,7 @@ async function ensureImageInCache(path) {
             imageCache.set(path, dummy);
             resolve(dummy);
         };
-        img.src = path;
+        img.src = imageUrl(path);
     });
 }
 
@@ -840,6 +1049,7 @@ editForm.addEventListener('submit', async (e) => {
     const tier = editTier.value;
     const price = editPrice.value ? parseInt(editPrice.value) : null;
 
+    const original = mode === 'edit' ? findRestaurant(origName) : null;
     let newInfo = {};
     if (mode === 'edit') {
         for (let t of ['S', 'A', 'B', 'C', 'D', 'E', 'F']) {
@@ -1072,7 +1282,17 @@ editForm.addEventListener('submit', async (e) => {
         }
     });
 
-    await saveToServer();
+    const ops = [];
+    if (original) {
+        if (name !== origName) ops.push({ op: 'rename', name: origName, new_name: name });
+        const fields = changedFields(original.info, newInfo);
+        if (Object.keys(fields).length) ops.push({ op: 'update', name, fields });
+        ops.push(placementOp(name));
+    } else {
+        const { tier: newTier, index } = placementOp(name);
+        ops.push({ op: 'create', name, tier: newTier, index, info: newInfo });
+    }
+    await saveToServer(ops);
 });
 
 init();
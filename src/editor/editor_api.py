@@ -0,0 +1,1132 @@
+"""The editor API, shared by the threaded (editor_server.py) and asyncio (async_editor_server.py) servers."""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+try:
+    import brotli
+except ImportError:  # Optional, assets are only precompressed with gzip without it
+    brotli = None
+
+PORT = 8000
+TIER_DICT_PATH = 'src/tierlist/tier_dict.json'
+TIER_DICT_HISTORY_DIR = '.cache/tier_dict_history'
+TIER_DICT_HISTORY_LIMIT = 20
+TIERLIST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tierlist'))
+if TIERLIST_DIR not in sys.path:
+    sys.path.insert(0, TIERLIST_DIR)
+import render_cache
+from PIL import Image
+
+# Thumbnails of the logos served to the editor, see EditorApp.get_thumbnail()
+DEFAULT_THUMB_HEIGHT = 100
+MIN_THUMB_HEIGHT = 16
+MAX_THUMB_HEIGHT = 512
+
+# The logos listed by GET /api/logos (see LogoIndex), and served by /api/thumb and /api/atlas
+LOGO_DIR = 'logos'
+LOGO_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+LOGO_POLL_INTERVAL = 2
+LOGO_CHANGE_LOG_LIMIT = 1000
+
+# Precompressed editor files, see EditorAssets
+EDITOR_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_CACHE_DIR = '.cache/assets'
+# URL paths of the editor CSS and JS, containing a hash of their contents
+HASHED_ASSET_PATTERN = re.compile(r'/editor\.[0-9a-f]{12}\.(css|js)')
+
+# Constants matching python tier list configurations
+DEFAULT_WIDTH = 200
+DEFAULT_GAP = 20
+GAPS_BETWEEN_RESTAURANTS = 10
+
+def get_num_rows_per_tier(num_rows: int, tier_dict: dict) -> dict:
+    tier_num_rows = {}
+    for k in tier_dict:
+        if len(tier_dict[k]) % num_rows == 0:
+            tier_num_rows[k] = len(tier_dict[k]) // num_rows
+        else:
+            tier_num_rows[k] = len(tier_dict[k]) // num_rows + 1
+    return tier_num_rows
+
+def evaluate_num_logos_per_row(tier_dict: dict, min_val: int = 17, threshold: int = 10) -> int:
+    min_difference = 100
+    num_logos_per_row = 0
+    for i in range(min_val, min_val + threshold):
+        tier_num_rows = get_num_rows_per_tier(i, tier_dict)
+        total_width = DEFAULT_WIDTH * (i + 1) + GAPS_BETWEEN_RESTAURANTS * (i - 1) + DEFAULT_GAP * 3
+        total_height = sum(tier_num_rows[tier] * DEFAULT_WIDTH + GAPS_BETWEEN_RESTAURANTS * (tier_num_rows[tier] - 1) for tier in tier_num_rows) + DEFAULT_GAP * (len(tier_num_rows) + 1)
+        current_diff = abs(total_width / total_height - 1.618)
+        if current_diff < min_difference:
+            min_difference = current_diff
+            num_logos_per_row = i
+    return num_logos_per_row
+
+class StaleWriteError(Exception):
+    """Raised when a write is based on another version of the tier dict than the current one."""
+
+    def __init__(self, etag: str):
+        super().__init__("The tier dict was modified since it was loaded, reload it before saving")
+        self.etag = etag
+
+
+class TierDictStore:
+    """Keeps the parsed tier_dict.json and its layout in memory, along with the /api/data response.
+
+    The file is re-read only when its modification time or size changed, e.g. after it was edited
+    by hand. Writes made through the store update the cached copy directly.
+
+    Writes are atomic and durable: the new tier dict is written and synced to a temporary file,
+    which then replaces tier_dict.json, so that readers and crashes never see a truncated file.
+    The replaced version is kept in a bounded history, so that it can be rolled back to.
+    """
+
+    def __init__(self, path: str = TIER_DICT_PATH, history_dir: str = TIER_DICT_HISTORY_DIR,
+                 history_limit: int = TIER_DICT_HISTORY_LIMIT):
+        self.path = path
+        self.history_dir = history_dir
+        self.history_limit = history_limit
+        self._lock = threading.RLock()
+        self._stat = None
+        self._tier_dict = None
+        self._chunks = {}
+        self._body = None
+        self._etag = None
+
+    def _file_stat(self) -> tuple:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _serialize(self, tier_dict: dict, changed_tiers: set = None) -> tuple:
+        """Serialize the tier dict both for the file (indent=4) and for /api/data (compact).
+
+        Each tier is serialized on its own, so that only the tiers in changed_tiers are serialized
+        again when given. The chunks are joined exactly as json.dumps() would lay out the whole dict.
+        """
+        chunks = {}
+        for tier, restaurants in tier_dict.items():
+            chunk = self._chunks.get(tier) if changed_tiers is not None and tier not in changed_tiers else None
+            if chunk is None:
+                chunk = (json.dumps({tier: restaurants}, indent=4)[2:-2], json.dumps({tier: restaurants})[1:-1])
+            chunks[tier] = chunk
+        text = "{\n" + ",\n".join(chunk[0] for chunk in chunks.values()) + "\n}" if chunks else "{}"
+        body = ('{"tier_dict": {' + ", ".join(chunk[1] for chunk in chunks.values()) +
+                '}, "num_logos_per_row": ' + json.dumps(evaluate_num_logos_per_row(tier_dict)) + '}').encode('utf-8')
+        return chunks, text, body
+
+    def _cache(self, tier_dict: dict, chunks: dict, body: bytes, stat: tuple):
+        self._tier_dict = tier_dict
+        self._chunks = chunks
+        self._body = body
+        self._etag = '"' + hashlib.sha1(self._body).hexdigest() + '"'
+        self._stat = stat
+
+    def get(self) -> tuple:
+        """Return the /api/data response body and its ETag, re-reading the file only if it changed."""
+        with self._lock:
+            stat = self._file_stat()
+            if stat != self._stat:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    tier_dict = json.load(f)
+                chunks, _, body = self._serialize(tier_dict)
+                self._cache(tier_dict, chunks, body, stat)
+            return self._body, self._etag
+
+    def _check_etag(self, if_match: str):
+        if if_match is not None and os.path.exists(self.path):
+            etag = self.get()[1]
+            if if_match.strip() not in ('*', etag):
+                raise StaleWriteError(etag)
+
+    def write(self, tier_dict: dict, if_match: str = None) -> str:
+        """Save the tier dict to the file, and cache it without reading the file back.
+
+        Args:
+            tier_dict (dict): The new tier dict
+            if_match (str): Optional. The ETag of the version the new tier dict is based on. If it is
+                            not the ETag of the current version (or "*"), StaleWriteError is raised.
+
+        Returns:
+            str: The ETag of the new version
+        """
+        with self._lock:
+            self._check_etag(if_match)
+            return self._save(tier_dict)
+
+    def patch(self, ops: list, if_match: str = None) -> str:
+        """Apply a list of edit operations to the tier dict and save it, see write().
+
+        Only the tiers touched by the operations are copied and serialized again. The operations are
+        applied in order, and either all of them or none are saved. Supported operations:
+
+            - {"op": "move", "name": ..., "tier": ..., "index": ...}: Move a restaurant to the given
+              position of a tier (at the end if index is omitted)
+            - {"op": "update", "name": ..., "fields": {...}}: Set fields of a restaurant, where a null
+              value removes the field
+            - {"op": "rename", "name": ..., "new_name": ...}: Rename a restaurant, keeping its position
+            - {"op": "create", "name": ..., "tier": ..., "index": ..., "info": {...}}: Add a restaurant
+            - {"op": "delete", "name": ...}: Remove a restaurant
+
+        Raises ValueError if an operation is invalid, e.g. if it refers to an unknown restaurant.
+        """
+        with self._lock:
+            self._check_etag(if_match)
+            self.get()
+            tier_dict = dict(self._tier_dict)
+            changed_tiers = set()
+
+            def edit_tier(tier: str) -> dict:
+                if not isinstance(tier, str) or tier not in tier_dict:
+                    raise ValueError(f"Unknown tier: {tier}")
+                if tier not in changed_tiers:
+                    tier_dict[tier] = {name: dict(info) for name, info in tier_dict[tier].items()}
+                    changed_tiers.add(tier)
+                return tier_dict[tier]
+
+            def find_tier(name: str) -> str:
+                for tier, restaurants in tier_dict.items():
+                    if name in restaurants:
+                        return tier
+                raise ValueError(f"Unknown restaurant: {name}")
+
+            def insert(tier: str, name: str, info: dict, index: int = None):
+                if index is not None and (not isinstance(index, int) or isinstance(index, bool)):
+                    raise ValueError(f"Invalid index: {index}")
+                restaurants = edit_tier(tier)
+                items = list(restaurants.items())
+                index = len(items) if index is None else max(0, min(index, len(items)))
+                items.insert(index, (name, info))
+                tier_dict[tier] = dict(items)
+
+            if not isinstance(ops, list) or not all(isinstance(op, dict) for op in ops):
+                raise ValueError("Operations must be a list of objects")
+            for op in ops:
+                kind, name = op.get("op"), op.get("name")
+                if not isinstance(name, str) or not name:
+                    raise ValueError(f"Missing restaurant name in operation: {op}")
+                if kind == "create":
+                    if any(name in restaurants for restaurants in tier_dict.values()):
+                        raise ValueError(f"Restaurant already exists: {name}")
+                    if not isinstance(op.get("info"), dict):
+                        raise ValueError(f"Missing restaurant info in operation: {op}")
+                    insert(op.get("tier"), name, dict(op["info"]), op.get("index"))
+                    continue
+                tier = find_tier(name)
+                if kind == "move":
+                    info = edit_tier(tier).pop(name)
+                    insert(op.get("tier"), name, info, op.get("index"))
+                elif kind == "update":
+                    fields = op.get("fields")
+                    if not isinstance(fields, dict):
+                        raise ValueError(f"Missing restaurant fields in operation: {op}")
+                    info = edit_tier(tier)[name]
+                    for field, value in fields.items():
+                        if value is None:
+                            info.pop(field, None)
+                        else:
+                            info[field] = value
+                elif kind == "rename":
+                    new_name = op.get("new_name")
+                    if not isinstance(new_name, str) or not new_name:
+                        raise ValueError(f"Missing new name in operation: {op}")
+                    if new_name != name and any(new_name in restaurants for restaurants in tier_dict.values()):
+                        raise ValueError(f"Restaurant already exists: {new_name}")
+                    tier_dict[tier] = {new_name if key == name else key: info for key, info in edit_tier(tier).items()}
+                elif kind == "delete":
+                    del edit_tier(tier)[name]
+                else:
+                    raise ValueError(f"Unknown operation: {kind}")
+            return self._save(tier_dict, changed_tiers)
+
+    def _save(self, tier_dict: dict, changed_tiers: set = None) -> str:
+        """Write the tier dict to the file atomically and durably, and cache it."""
+        chunks, text, body = self._serialize(tier_dict, changed_tiers)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                # written with the standard formatting of json.dump(indent=4) to avoid big git diffs
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            self._save_to_history()
+            render_cache.replace_file(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        _fsync_directory(os.path.dirname(self.path) or '.')
+        self._cache(tier_dict, chunks, body, self._file_stat())
+        return self._etag
+
+    def _save_to_history(self):
+        """Copy the current version of the file to the history, dropping the oldest versions over the limit."""
+        if not os.path.exists(self.path):
+            return
+        os.makedirs(self.history_dir, exist_ok=True)
+        # Copied with its mode, so that a rollback keeps the mode of the file
+        shutil.copy(self.path, os.path.join(self.history_dir, f"{time.time_ns()}.json"))
+        versions = self._history_versions()
+        for version in versions[self.history_limit:]:
+            os.remove(os.path.join(self.history_dir, f"{version}.json"))
+
+    def _history_versions(self) -> list:
+        """Return the ids of the versions in the history, newest first."""
+        if not os.path.isdir(self.history_dir):
+            return []
+        names = [name[:-len('.json')] for name in os.listdir(self.history_dir) if name.endswith('.json')]
+        return sorted((name for name in names if name.isdigit()), key=int, reverse=True)
+
+    def history(self) -> list:
+        """Return the previous versions of the tier dict, newest first."""
+        with self._lock:
+            return [{
+                "id": version,
+                "saved_at": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(int(version) / 1e9)),
+                "size": os.path.getsize(os.path.join(self.history_dir, f"{version}.json")),
+            } for version in self._history_versions()]
+
+    def rollback(self, version: str, if_match: str = None) -> str:
+        """Restore a previous version of the tier dict from the history, see write().
+
+        The current version is itself saved to the history, so that a rollback can be undone.
+        Raises KeyError if there is no such version.
+        """
+        with self._lock:
+            if not str(version).isdigit() or str(version) not in self._history_versions():
+                raise KeyError(version)
+            with open(os.path.join(self.history_dir, f"{version}.json"), 'r', encoding='utf-8') as f:
+                tier_dict = json.load(f)
+            return self.write(tier_dict, if_match)
+
+
+def _fsync_directory(path: str):
+    """Make a rename in the directory durable. Not supported (nor needed) on Windows."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class LogoIndex:
+    """An in-memory index of the logos directory, with a version that increases on every change.
+
+    Every logo is described by its name, size, modification time, dimensions (None if the file cannot
+    be read as an image) and digest. The directory is scanned again when the index is read more than
+    poll_interval seconds after the last scan (only new or modified files are opened), or when refresh()
+    is called, e.g. after a logo is renamed. The changes of the last LOGO_CHANGE_LOG_LIMIT versions are
+    kept, so that clients only fetch what changed since the version they have.
+
+    Versions start at the current time in microseconds, so that they keep increasing across restarts.
+
+    Args:
+        logo_dir (str): Optional. The logos directory, LOGO_DIR by default
+        poll_interval (float): Optional. Seconds during which a scan is reused, LOGO_POLL_INTERVAL by default
+    """
+
+    def __init__(self, logo_dir: str = None, poll_interval: float = LOGO_POLL_INTERVAL):
+        self.logo_dir = logo_dir or LOGO_DIR
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._logos = {}
+        self._digests = {}
+        self._version = time.time_ns() // 1000
+        self._first_version = self._version
+        # [(version, logo name, logo or None if it was removed)], oldest first
+        self._changes = []
+        self._scanned_at = None
+
+    def refresh(self) -> int:
+        """Scan the logos directory, record the changes since the last scan, and return the version."""
+        with self._lock:
+            self._scan()
+            return self._version
+
+    def _refresh_if_stale(self):
+        with self._lock:
+            if self._scanned_at is None or time.monotonic() - self._scanned_at >= self.poll_interval:
+                self._scan()
+
+    def _scan(self):
+        logos = {}
+        try:
+            entries = list(os.scandir(self.logo_dir))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if not entry.name.lower().endswith(LOGO_EXTENSIONS) or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+                old = self._logos.get(entry.name)
+                if old is not None and (old["mtime_ns"], old["size"]) == (stat.st_mtime_ns, stat.st_size):
+                    logos[entry.name] = old
+                    continue
+                try:
+                    with Image.open(entry.path) as img:
+                        width, height = img.size
+                except OSError:
+                    # Still listed, so that it can be renamed or replaced from the editor
+                    width = height = None
+                logos[entry.name] = {
+                    "name": entry.name,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "width": width,
+                    "height": height,
+                    "digest": render_cache.file_digest(entry.path, self._digests),
+                }
+            except OSError:
+                # Removed or replaced during the scan, it is picked up by the next scan
+                if entry.name in self._logos:
+                    logos[entry.name] = self._logos[entry.name]
+        for name in sorted(self._logos.keys() | logos.keys()):
+            if self._logos.get(name) != logos.get(name):
+                self._version += 1
+                self._changes.append((self._version, name, logos.get(name)))
+        if len(self._changes) > LOGO_CHANGE_LOG_LIMIT:
+            del self._changes[:-LOGO_CHANGE_LOG_LIMIT]
+            self._first_version = self._changes[0][0] - 1
+        self._digests = {path: digest for path, digest in self._digests.items()
+                         if os.path.basename(path) in logos}
+        self._logos = logos
+        self._scanned_at = time.monotonic()
+
+    def get(self) -> tuple:
+        """Return (version, {logo name: logo}) of the current logos."""
+        self._refresh_if_stale()
+        with self._lock:
+            return self._version, dict(self._logos)
+
+    def changes_since(self, version: int) -> tuple:
+        """Return (current version, [(logo name, logo or None if it was removed)]) of the changes since
+        the given version, or (current version, None) if they are not known (too old, or from another index)."""
+        self._refresh_if_stale()
+        with self._lock:
+            if not self._first_version <= version <= self._version:
+                return self._version, None
+            changes = {}
+            for change_version, name, logo in self._changes:
+                if change_version > version:
+                    changes[name] = logo
+            return self._version, sorted(changes.items())
+
+class RenderEngine:
+    """Renders the tierlist images inside the editor server process.
+
+    tierlist.py is imported on the first render only, and a single IncrementalRenderer is kept
+    alive between renders, so that the resized logos, tags and fonts stay in memory and only the
+    tiers edited since the previous render are redrawn. Renders are serialized, since they share
+    the strips of the IncrementalRenderer.
+    """
+
+    def __init__(self, image_names: tuple = None, manifest_path: str = None):
+        self.image_names = image_names
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self._tierlist = None
+        self._renderer = None
+
+    def _load_tierlist(self):
+        if self._tierlist is None:
+            import tierlist
+            self._tierlist = tierlist
+            self._renderer = tierlist.IncrementalRenderer()
+        return self._tierlist
+
+    def warm(self):
+        """Import tierlist.py and render the current tier dict in memory, so that the first run is fast."""
+        with self._lock:
+            self._load_tierlist()
+            self._renderer.render()
+
+    def run(self, force: bool = False, progress=None) -> dict:
+        """Render and save the tierlist images from the current tier_dict.json, unless they are up to date.
+
+        progress, if given, is called as progress(step, completed, total) after each tier is rendered
+        and after each image is saved, where step is the name of the tier or the path of the image.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            tierlist = self._load_tierlist()
+            with open(TIER_DICT_PATH, 'r', encoding='utf-8') as f:
+                tier_dict = json.load(f)
+            image_names = self.image_names or tierlist.TIERLIST_IMAGE_NAMES
+            on_step = None
+            if progress is not None:
+                steps = iter(range(1, len(tier_dict) + len(image_names) + 1))
+                on_step = lambda step: progress(step, next(steps), len(tier_dict) + len(image_names))
+            rendered = tierlist.build_tierlists(force=force, image_names=image_names, manifest_path=self.manifest_path,
+                                                renderer=self._renderer, progress=on_step, tier_dict=tier_dict)
+            render_time = time.perf_counter() - start
+            rendered_tiers = list(self._renderer.rendered_tiers) if rendered else []
+        if rendered:
+            output = f"Tierlist images saved to {os.path.dirname(image_names[0])}"
+        else:
+            output = "Tierlist images are up to date, nothing to render"
+        return {
+            "output": output,
+            "rendered": rendered,
+            "rendered_tiers": rendered_tiers,
+            "render_time": round(render_time, 3),
+            "images": list(image_names),
+        }
+
+
+class RenderJob:
+    """A request to render the tierlist images, run in the background by a RenderJobQueue."""
+
+    def __init__(self, job_id: str, force: bool, changed: threading.Condition):
+        self.id = job_id
+        self.force = force
+        self.status = "queued"  # queued -> running -> done | failed
+        self.step = None
+        self.completed = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        # Incremented on every change, so that event streams know when to send an update
+        self.version = 0
+        self._changed = changed
+        # Called (from the thread changing the job) on every change, see add_listener()
+        self._listeners = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "step": self.step,
+            "completed": self.completed,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def _update(self, **changes):
+        with self._changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+            for listener in self._listeners:
+                listener()
+
+    def add_listener(self, listener):
+        """Call the given function on every change of the job, e.g. to wake up an event loop.
+
+        The listener is called from the thread changing the job, with the job locked, so it must not block.
+        """
+        with self._changed:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._changed:
+            self._listeners.remove(listener)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until the job is finished. Returns False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.finished, timeout)
+
+    def wait_for_change(self, version: int, timeout: float = None) -> bool:
+        """Wait until the job changes after the given version or finishes. Returns False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version > version or self.finished, timeout)
+
+
+class RenderJobQueue:
+    """Runs render jobs one at a time on a background thread, collapsing repeated requests.
+
+    A job that has not started yet absorbs every new request, so that rapid repeated clicks
+    result in a single render. A request made while a job is running starts a new job, since
+    the running job may have read the tier dict before the latest edits.
+    """
+
+    MAX_FINISHED_JOBS = 20
+
+    def __init__(self, engine: RenderEngine):
+        self.engine = engine
+        self._changed = threading.Condition()
+        self._jobs = {}
+        self._pending = None
+        self._next_id = 1
+        self._worker = None
+
+    def submit(self, force: bool = False) -> RenderJob:
+        """Queue a render, or join the render that is already queued."""
+        with self._changed:
+            if self._pending is None:
+                self._pending = RenderJob(str(self._next_id), force, self._changed)
+                self._next_id += 1
+                self._jobs[self._pending.id] = self._pending
+                self._forget_finished_jobs()
+            else:
+                self._pending.force = self._pending.force or force
+            job = self._pending
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, daemon=True)
+                self._worker.start()
+            return job
+
+    def get(self, job_id: str) -> RenderJob | None:
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def _forget_finished_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            with self._changed:
+                job, self._pending = self._pending, None
+                if job is None:
+                    self._worker = None
+                    return
+                job._update(status="running")
+            try:
+                result = self.engine.run(
+                    force=job.force,
+                    progress=lambda step, completed, total: job._update(step=step, completed=completed, total=total),
+                )
+                job._update(status="done", result=result)
+            except Exception as e:
+                job._update(status="failed", error=str(e))
+
+
+class Response:
+    """A response of the editor API, sent by whichever server received the request.
+
+    The body is either the given bytes, the contents of file_path, or the chunks of events (see
+    RenderEvents), which are streamed until the stream ends (the connection is then closed).
+    """
+
+    def __init__(self, status: int = 200, body: bytes = b'', content_type: str = None, headers: dict = None,
+                 file_path: str = None, events=None):
+        self.status = status
+        self.body = body
+        self.headers = {}
+        if content_type is not None:
+            self.headers['Content-type'] = content_type
+        self.headers.update(headers or {})
+        self.file_path = file_path
+        self.events = events
+
+    @classmethod
+    def json(cls, data, status: int = 200, headers: dict = None) -> 'Response':
+        return cls(status, json.dumps(data).encode('utf-8'), 'application/json', headers)
+
+EDITOR_FILES = ['/', '/editor.html', '/editor.css', '/editor.js']
+
+def editor_file_path(path: str) -> str:
+    """Map the URL path of an editor file to its path relative to the repo root, other paths are unchanged."""
+    if path in EDITOR_FILES:
+        if path == '/':
+            path = '/editor.html'
+        path = '/src/editor' + path
+    return path
+
+def static_file_path(path: str, root: str = None) -> str:
+    """Return the file served for the given URL path, like SimpleHTTPRequestHandler.translate_path().
+
+    Editor files are served from src/editor, and every other path from the root directory (the
+    current directory by default). '.' and '..' components are ignored, so that the path never
+    leaves the root directory.
+    """
+    path = urllib.parse.unquote(urllib.parse.urlsplit(editor_file_path(path)).path)
+    trailing_slash = path.endswith('/')
+    words = [word for word in path.split('/') if word and word not in (os.curdir, os.pardir)]
+    words = [word for word in words if os.path.dirname(word) == '' and not os.path.splitdrive(word)[0]]
+    path = os.path.join(root or os.getcwd(), *words)
+    return path + '/' if trailing_slash else path
+
+def negotiate_encoding(accept_encoding: str, encodings) -> str:
+    """Return the preferred content encoding of the client among the given ones (in order of preference
+    of the server), or None to send the response uncompressed."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+class EditorAssets:
+    """editor.html, editor.css and editor.js, as served to browsers.
+
+    The CSS and JS are served at URLs containing a hash of their contents (editor.<hash>.js), which
+    editor.html is rewritten to use, so that they can be cached forever: a new version gets a new URL.
+    Every file is precompressed once with gzip (and brotli, if installed) into ASSET_CACHE_DIR, and
+    the files are rebuilt whenever a source file changes.
+
+    Args:
+        source_dir (str): Optional. The directory of the editor files, EDITOR_DIR by default
+        cache_dir (str): Optional. The directory of the built files, ASSET_CACHE_DIR by default
+    """
+    CONTENT_TYPES = {'.html': 'text/html', '.css': 'text/css', '.js': 'text/javascript'}
+
+    def __init__(self, source_dir: str = None, cache_dir: str = None):
+        self.source_dir = source_dir or EDITOR_DIR
+        self.cache_dir = cache_dir or ASSET_CACHE_DIR
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self._lock = threading.Lock()
+        self._stat = None
+        # {URL path: (content type, hash, {encoding or None: built file path})}
+        self._files = {}
+
+    def _source_stat(self) -> tuple:
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, self._source_paths()))
+
+    def _source_paths(self) -> list:
+        return [os.path.join(self.source_dir, name) for name in ('editor.html', 'editor.css', 'editor.js')]
+
+    def build(self) -> dict:
+        """Build the served files if a source file changed since the last build, and return them."""
+        with self._lock:
+            stat = self._source_stat()
+            if stat == self._stat:
+                return self._files
+            html_path, css_path, js_path = self._source_paths()
+            files, hashed_names = {}, {}
+            for path in (css_path, js_path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                name, extension = os.path.splitext(os.path.basename(path))
+                hashed_names[os.path.basename(path)] = f"{name}.{hashlib.sha1(data).hexdigest()[:12]}{extension}"
+                built = self._write_variants(hashed_names[os.path.basename(path)], data)
+                files['/' + os.path.basename(path)] = built
+                files['/' + hashed_names[os.path.basename(path)]] = built
+            with open(html_path, encoding='utf-8') as f:
+                html = f.read()
+            html = re.sub(r'(href|src)="(editor\.(?:css|js))"',
+                          lambda match: f'{match.group(1)}="{hashed_names[match.group(2)]}"', html)
+            data = html.encode('utf-8')
+            files['/'] = files['/editor.html'] = self._write_variants(
+                f"editor.{hashlib.sha1(data).hexdigest()[:12]}.html", data)
+            self._remove_outdated_files(files)
+            self._files, self._stat = files, stat
+            return files
+
+    def _write_variants(self, name: str, data: bytes) -> tuple:
+        """Write the file and its compressed variants to the cache directory, unless they already exist."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        variants = {None: (name, data)}
+        if 'gzip' in self.encodings:
+            variants['gzip'] = (name + '.gz', gzip.compress(data, 9, mtime=0))
+        if 'br' in self.encodings:
+            variants['br'] = (name + '.br', brotli.compress(data))
+        paths = {}
+        for encoding, (variant_name, variant_data) in variants.items():
+            path = os.path.join(self.cache_dir, variant_name)
+            if not os.path.exists(path):
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(variant_data)
+                render_cache.replace_file(tmp_path, path)
+            paths[encoding] = path
+        content_type = self.CONTENT_TYPES[os.path.splitext(name)[1]]
+        return content_type, name.split('.')[1], paths
+
+    def _remove_outdated_files(self, files: dict):
+        current = {os.path.basename(path) for _, _, paths in files.values() for path in paths.values()}
+        for name in os.listdir(self.cache_dir):
+            if name.startswith('editor.') and not name.endswith('.tmp') and name not in current:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def response(self, path: str, headers: dict) -> 'Response':
+        """Return the response to a GET request of an editor file, or None if the path is not one.
+
+        The variant is chosen from the Accept-Encoding request header, and 304 Not Modified is
+        returned if the client has the same version.
+        """
+        if path not in EDITOR_FILES and not HASHED_ASSET_PATTERN.fullmatch(path):
+            return None
+        try:
+            files = self.build()
+        except OSError:
+            return None
+        if path not in files:
+            return Response(404, b'File not found', 'text/plain')
+        content_type, digest, paths = files[path]
+        encoding = negotiate_encoding(headers.get('accept-encoding', ''), [e for e in self.encodings if e in paths])
+        etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+        variant_headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return Response(304, headers=variant_headers)
+        if encoding:
+            variant_headers['Content-Encoding'] = encoding
+        return Response(content_type=f'{content_type}; charset=utf-8', headers=variant_headers,
+                        file_path=paths[encoding])
+
+def response_headers(path: str) -> dict:
+    """Return the headers sent with every response to the given URL path: CORS and caching."""
+    headers = {'Access-Control-Allow-Origin': '*'}
+    # The tier dict, logo list, thumbnails and atlas map can be cached, but must be revalidated with their ETag
+    if path in ('/api/data', '/api/atlas', '/api/logos') or path.startswith(('/api/thumb/', '/api/atlas?', '/api/logos?')):
+        headers['Cache-Control'] = 'no-cache'
+    # Atlas images never change, a new atlas gets a new URL
+    elif path.startswith('/api/atlas/'):
+        headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    # Content-hashed editor files never change, a new version gets a new URL
+    elif HASHED_ASSET_PATTERN.fullmatch(path):
+        headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    # The editor page must be revalidated, to pick up new versions of the hashed files
+    elif path in ('/', '/editor.html'):
+        headers['Cache-Control'] = 'no-cache'
+    # Disable cache for API, editor files to ensure data and logic stays fresh
+    elif (path.startswith('/api/') or
+          path.endswith('.html') or
+          path.endswith('.js') or
+          path.endswith('.css') or
+          path == '/'):
+        headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        headers['Pragma'] = 'no-cache'
+        headers['Expires'] = '0'
+    else:
+        headers['Cache-Control'] = 'public, max-age=3600'
+    return headers
+
+class RenderEvents:
+    """The progress of a render job as Server-Sent Events, until the job is finished.
+
+    Iterating blocks the thread until the job changes. Iterating with async for waits on the event
+    loop instead, so that an open event stream does not hold a worker thread for the whole render.
+    A keep-alive comment is produced whenever the job does not change for heartbeat seconds.
+    """
+
+    KEEP_ALIVE = b': keep-alive\n\n'
+
+    def __init__(self, job: RenderJob, heartbeat: float):
+        self.job = job
+        self.heartbeat = heartbeat
+        self._version = -1
+        self._done = False
+
+    def _next_event(self) -> bytes | None:
+        """Return the event of the current state of the job, or None if it did not change since the last event."""
+        with self.job._changed:
+            if self.job.version <= self._version and not self.job.finished:
+                return None
+            self._version, state, self._done = self.job.version, self.job.to_dict(), self.job.finished
+        event = state["status"] if self._done else 'progress'
+        return f"event: {event}\ndata: {json.dumps(state)}\n\n".encode('utf-8')
+
+    def __iter__(self):
+        while not self._done:
+            if not self.job.wait_for_change(self._version, timeout=self.heartbeat):
+                yield self.KEEP_ALIVE
+                continue
+            yield self._next_event()
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def wake_up():
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                # The event loop is closed
+                pass
+
+        self.job.add_listener(wake_up)
+        try:
+            while not self._done:
+                changed.clear()
+                chunk = self._next_event()
+                if chunk is not None:
+                    yield chunk
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield self.KEEP_ALIVE
+        finally:
+            self.job.remove_listener(wake_up)
+
+    def close(self):
+        """Stop the stream, e.g. when the client disconnects."""
+        self._done = True
+
+class EditorApp:
+    """The /api/* routes of the editor, independent of the HTTP server.
+
+    handle() is blocking (renders, tier dict writes, thumbnail encoding), servers call it from
+    a worker thread.
+    """
+    # Seconds between keep-alive comments on an idle render event stream
+    event_stream_heartbeat = 15
+
+    def __init__(self, tier_dict_store: TierDictStore = None, render_jobs: RenderJobQueue = None):
+        self.tier_dict_store = tier_dict_store or TierDictStore()
+        self.render_jobs = render_jobs or RenderJobQueue(RenderEngine())
+        self.assets = EditorAssets()
+        self.logo_index = LogoIndex()
+        # Serializes atlas builds, so that concurrent editor loads do not build the same atlas twice
+        self.atlas_lock = threading.Lock()
+
+    def handle(self, method: str, path: str, headers: dict, body: bytes = b'') -> Response:
+        """Return the response to an API request.
+
+        Args:
+            method (str): The request method
+            path (str): The request path, including the query string
+            headers (dict): The request headers, with lowercase names
+            body (bytes): The request body
+
+        Returns:
+            Response: The response, or None for a GET request that is not an API route (a static file)
+        """
+        if method == 'GET':
+            return self.handle_get(path, headers)
+        if method == 'POST':
+            return self.handle_post(path, headers, body)
+        if method == 'PATCH':
+            return self.handle_patch(path, headers, body)
+        return Response(501)
+
+    def handle_get(self, path: str, headers: dict) -> Response:
+        if not path.startswith('/api/'):
+            return self.assets.response(path, headers)
+
+        if path == '/api/logos' or path.startswith('/api/logos?'):
+            return self.get_logos(path, headers)
+
+        if path.startswith('/api/render/'):
+            parts = path[len('/api/render/'):].split('/')
+            job = self.render_jobs.get(parts[0])
+            if job is None or len(parts) > 2 or (len(parts) == 2 and parts[1] != 'events'):
+                return Response.json({"error": "Unknown render job"}, 404)
+            if len(parts) == 2:
+                return Response(content_type='text/event-stream',
+                                events=RenderEvents(job, self.event_stream_heartbeat))
+            return Response.json(job.to_dict())
+
+        if path.startswith('/api/thumb/'):
+            return self.get_thumbnail(path, headers)
+
+        if path == '/api/atlas' or path.startswith('/api/atlas?'):
+            return self.get_atlas(path, headers)
+
+        if path.startswith('/api/atlas/'):
+            return self.get_atlas_image(path)
+
+        if path == '/api/history':
+            try:
+                return Response.json({"history": self.tier_dict_store.history()})
+            except Exception as e:
+                return Response.json({"error": str(e)}, 500)
+
+        if path == '/api/data':
+            try:
+                body, etag = self.tier_dict_store.get()
+                return self.cached_response(headers, etag, body=body, content_type='application/json')
+            except Exception as e:
+                return Response.json({"error": str(e)}, 500)
+
+        return None
+
+    def handle_post(self, path: str, headers: dict, body: bytes) -> Response:
+        if path == '/api/rename_logo':
+            try:
+                data = json.loads(body.decode('utf-8'))
+                old_path = data.get('old_path')
+                new_path = data.get('new_path')
+
+                # Security Check: Prevent directory traversal
+                if old_path and new_path:
+                    # Resolve to absolute paths relative to current directory
+                    base_dir = os.path.abspath('logos')
+                    abs_old = os.path.abspath(old_path)
+                    abs_new = os.path.abspath(new_path)
+
+                    # Ensure both paths strictly reside within the specific 'logos' directory boundary
+                    if abs_old.startswith(base_dir) and abs_new.startswith(base_dir) and os.path.exists(abs_old):
+                        os.rename(abs_old, abs_new)
+                        self.logo_index.refresh()
+                        return Response.json({"status": "success"})
+                    return Response.json({"error": "Security check failed: Invalid path or file does not exist. Path must remain inside logos directory."}, 400)
+                return Response.json({"error": "Invalid paths or file does not exist"}, 400)
+            except Exception as e:
+                return Response.json({"error": str(e)}, 500)
+
+        if path in ('/api/render', '/api/run_tierlist'):
+            try:
+                options = json.loads(body.decode('utf-8')) if body else {}
+                # Render in the background, reusing everything loaded by the previous renders
+                job = self.render_jobs.submit(force=bool(options.get('force', False)))
+                if path == '/api/render':
+                    return Response.json(job.to_dict(), 202)
+                # /api/run_tierlist waits for the render to finish
+                job.wait()
+                if job.status == 'failed':
+                    return Response.json({"error": "Script failed", "details": job.error}, 500)
+                return Response.json({"status": "success", **job.result})
+            except Exception as e:
+                return Response.json({"error": "Script failed", "details": str(e)}, 500)
+
+        if path in ('/api/update', '/api/rollback'):
+            try:
+                data = json.loads(body.decode('utf-8'))
+                # Editors send the ETag of the version they loaded, to avoid overwriting newer changes
+                if_match = headers.get('if-match')
+                if path == '/api/update':
+                    etag = self.tier_dict_store.write(data, if_match)
+                else:
+                    etag = self.tier_dict_store.rollback(data.get('id'), if_match)
+                return Response.json({"status": "success", "etag": etag}, headers={'ETag': etag})
+            except StaleWriteError as e:
+                return Response.json({"error": str(e), "etag": e.etag}, 412, headers={'ETag': e.etag})
+            except KeyError as e:
+                return Response.json({"error": f"Unknown version: {e}"}, 404)
+            except Exception as e:
+                return Response.json({"error": str(e)}, 500)
+
+        return Response(404)
+
+    def handle_patch(self, path: str, headers: dict, body: bytes) -> Response:
+        if path == '/api/data':
+            try:
+                data = json.loads(body.decode('utf-8'))
+                etag = self.tier_dict_store.patch(data.get('ops') if isinstance(data, dict) else None,
+                                                  headers.get('if-match'))
+                return Response.json({"status": "success", "etag": etag}, headers={'ETag': etag})
+            except StaleWriteError as e:
+                return Response.json({"error": str(e), "etag": e.etag}, 412, headers={'ETag': e.etag})
+            except ValueError as e:
+                return Response.json({"error": str(e)}, 400)
+            except Exception as e:
+                return Response.json({"error": str(e)}, 500)
+
+        return Response(404)
+
+    @staticmethod
+    def cached_response(headers: dict, etag: str, **kwargs) -> Response:
+        """Return a response with the given ETag, or 304 Not Modified if the client has the same ETag."""
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return Response(304, headers={'ETag': etag})
+        response = Response(**kwargs)
+        response.headers['ETag'] = etag
+        return response
+
+    def get_logos(self, path: str, headers: dict) -> Response:
+        """Return the logos, from GET /api/logos, or the changes since a version, from GET /api/logos?since=<version>.
+
+        The full listing is {"logos": [names], "details": {name: logo}, "version": version}, and the
+        changes are {"changes": [{"name": name, "logo": logo or null if removed}], "version": version}.
+        If the changes since the given version are not known, the full listing is returned instead,
+        with "reset": true.
+        """
+        try:
+            since = urllib.parse.parse_qs(urllib.parse.urlsplit(path).query).get('since')
+            if since is not None:
+                version, changes = self.logo_index.changes_since(int(since[0]))
+                if changes is not None:
+                    body = {"version": version, "changes": [{"name": name, "logo": logo} for name, logo in changes]}
+                    return self.cached_response(headers, f'"logos-{version}"', body=json.dumps(body).encode('utf-8'),
+                                                content_type='application/json')
+            version, logos = self.logo_index.get()
+            body = {"logos": sorted(logos), "details": logos, "version": version}
+            if since is not None:
+                body["reset"] = True
+            return self.cached_response(headers, f'"logos-{version}"', body=json.dumps(body).encode('utf-8'),
+                                        content_type='application/json')
+        except ValueError:
+            return Response.json({"error": "Invalid version"}, 400)
+        except Exception as e:
+            return Response.json({"error": str(e)}, 500)
+
+    def get_atlas(self, path: str, headers: dict) -> Response:
+        """Return the map of the logo atlas, from GET /api/atlas?h=<height in pixels>.
+
+        The atlas packs the thumbnails of every logo into a single image (see
+        render_cache.load_logo_atlas()), so that the editor loads all logos in two requests.
+        The image URL contains the atlas version, and can be cached forever. It is null if there is
+        no logo to pack.
+        """
+        url = urllib.parse.urlsplit(path)
+        try:
+            height = int(urllib.parse.parse_qs(url.query).get('h', [DEFAULT_THUMB_HEIGHT])[0])
+        except ValueError:
+            return Response.json({"error": "Invalid thumbnail height"}, 400)
+        height = max(MIN_THUMB_HEIGHT, min(height, MAX_THUMB_HEIGHT))
+        try:
+            paths = []
+            if os.path.exists(LOGO_DIR):
+                paths = sorted(f"{LOGO_DIR}/{f}" for f in os.listdir(LOGO_DIR) if f.lower().endswith(LOGO_EXTENSIONS))
+            with self.atlas_lock:
+                image_path, logos, key = render_cache.load_logo_atlas(paths, height)
+        except Exception as e:
+            return Response.json({"error": str(e)}, 500)
+        body = json.dumps({
+            "image": f"/api/atlas/{os.path.basename(image_path)}" if image_path is not None else None,
+            "height": height,
+            "logos": logos,
+        }).encode('utf-8')
+        return self.cached_response(headers, f'"{key[:16]}"', body=body, content_type='application/json')
+
+    def get_atlas_image(self, path: str) -> Response:
+        """Return an atlas image, from GET /api/atlas/<atlas image file name>."""
+        name = urllib.parse.unquote(urllib.parse.urlsplit(path).path[len('/api/atlas/'):])
+        file_path = os.path.join(render_cache.ATLAS_CACHE_DIR, name)
+        if not re.fullmatch(r'atlas-\d+-[0-9a-f]{16}\.(jpg|png)', name) or not os.path.isfile(file_path):
+            return Response.json({"error": "Atlas not found"}, 404)
+        return Response(content_type='image/png' if name.endswith('.png') else 'image/jpeg', file_path=file_path)
+
+    def get_thumbnail(self, path: str, headers: dict) -> Response:
+        """Return a resized logo, from GET /api/thumb/<logo file name>?h=<height in pixels>.
+
+        Thumbnails are cached on disk (see render_cache.load_thumbnail()), and identified by an ETag
+        that changes whenever the logo file does, so that browsers can revalidate them cheaply.
+        """
+        url = urllib.parse.urlsplit(path)
+        name = urllib.parse.unquote(url.path[len('/api/thumb/'):])
+        try:
+            height = int(urllib.parse.parse_qs(url.query).get('h', [DEFAULT_THUMB_HEIGHT])[0])
+        except ValueError:
+            return Response.json({"error": "Invalid thumbnail height"}, 400)
+        height = max(MIN_THUMB_HEIGHT, min(height, MAX_THUMB_HEIGHT))
+        # Security Check: only serve logos directly inside the logos directory
+        base_dir = os.path.abspath('logos')
+        logo_path = os.path.abspath(os.path.join(base_dir, name))
+        if os.path.dirname(logo_path) != base_dir or not name.lower().endswith(LOGO_EXTENSIONS) or not os.path.isfile(logo_path):
+            return Response.json({"error": "Logo not found"}, 404)
+        try:
+            thumb_path, key = render_cache.load_thumbnail(os.path.join('logos', os.path.basename(logo_path)), height)
+        except Exception as e:
+            return Response.json({"error": str(e)}, 500)
+        return self.cached_response(headers, f'"{key[:16]}"', file_path=thumb_path,
+                                    content_type='image/png' if thumb_path.endswith('.png') else 'image/jpeg')
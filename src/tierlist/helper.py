@@ -1,17 +1,26 @@
-"""A helper file containing functions used by tierlist.py and main.py"""
+"""A helper file containing functions used by main.py
 
+Tier data and image functions live in helper_core.py, and are re-exported here.
+"""
+
+import array
+import asyncio
+import bisect
+import concurrent.futures
 import discord
+import functools
+import time
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 import os
-import pymongo
-import certifi
 import pytz
-import json
-import re
-from typing import Optional
-from PIL import Image, ImageDraw, ImageFont
+from helper_core import (TIER_DICT_PATH, TIER_DICT, get_first_tier_indexes, change_image_color,
+                         change_year_background_highlighted_color, generate_year_image, create_missing_year_images,
+                         RESTAURANT_NAMES, RESTAURANT_PATH_TO_LOGO_IMAGES, RESTAURANT_PRICE_RANGES,
+                         RESTAURANT_ADDRESSES, RESTAURANT_DESCRIPTIONS, RESTAURANT_TIERS, RESTAURANT_YEARS,
+                         TIERLIST_IMAGE_NAME, TIERLIST_IMAGE_NAME_WITH_YEAR_TAG,
+                         TIERLIST_IMAGE_NAME_WITH_YEAR_FIRST_VISITED_TAG, TIERS, TIER_PREFIX, TIER_COLOUR_HEX_DICT)
 
 ##############################################
 # Set up environment variables
@@ -27,240 +36,229 @@ author_id = os.getenv("author_id")
 # except ValueError:
 #     # Likely tierlist.py has been called without defined key in the env file
 #     pass
-client = pymongo.MongoClient(connection_string, tlsCAFile=certifi.where())
-db = client["fried-chicken-sandwich-bot"]
-collection = db["gmaps_infos"]
+_mongo_client = None
+_db_executor = None
 
-TIER_DICT = json.load(open(Path(__file__).parent / 'tier_dict.json'))
 
+def get_collection():
+    """Return the gmaps_infos collection, connecting to MongoDB on first use.
 
-##############################################
-# Tierlist helper functions
-##############################################
-def get_first_tier_indexes() -> dict:
-    """Get the first index of each tier.
+    pymongo and certifi are only imported here, so that importing this file stays cheap
+    for code paths that never query the database.
+    """
+    global _mongo_client
+    if _mongo_client is None:
+        import certifi
+        import pymongo
+        _mongo_client = pymongo.MongoClient(connection_string, tlsCAFile=certifi.where())
+    return _mongo_client["fried-chicken-sandwich-bot"]["gmaps_infos"]
+
+
+def get_db_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the thread pool running the blocking pymongo calls, creating it on first use.
+
+    The pool is bounded by DB_WORKERS, so that a slow database cannot pile up threads.
+    """
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = concurrent.futures.ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="mongo")
+    return _db_executor
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database call in the database thread pool, without blocking the event loop.
+
+    Args:
+        func (callable): The blocking function, e.g. load_gmaps_documents
+        *args: The positional arguments of func
+        **kwargs: The keyword arguments of func
 
     Returns:
-        dict: A dictionary of the form {tier: first index}
+        The return value of func
     """
-    first_tier_indexes = {"S": 0}
-    tiers = list(TIER_DICT.keys())
-    lengths = [len(TIER_DICT[tier]) for tier in tiers]
-    for tier in TIER_DICT:
-        if tier == "S":
-            pass
-        else:
-            first_tier_indexes[tier] = sum(lengths[:tiers.index(tier)])
-    return first_tier_indexes
-
-
-def change_image_color(input_path: str, output_path: str, new_color: str | tuple,
-                       old_color: str | tuple = None, tolerance: int = 0):
-    """Change a specific color in an image to a new color.
-    
-    This function can replace a specific color in an image with a new color.
-    If old_color is not specified, it will automatically detect and replace
-    the most common non-transparent color in the image.
-    
+    return await asyncio.get_running_loop().run_in_executor(get_db_executor(), functools.partial(func, *args, **kwargs))
+
+
+def load_gmaps_documents(collection=None) -> dict:
+    """Fetch every gmaps_infos document with a single query.
+
+    Only the fields of the Google Maps result used by the bot are fetched.
+
     Args:
-        input_path: Path to the input image
-        output_path: Path to save the modified image
-        new_color: New color as hex string (e.g., '#720000') or RGB tuple (e.g., (114, 0, 0))
-        old_color: Optional. Color to replace as hex string or RGB tuple.
-                   If None, replaces the most common non-transparent color.
-        tolerance: Optional. Color matching tolerance (0-255) for anti-aliasing.
-                   Default is 0 (exact match only).
-    
+        collection: Optional. The collection to query, get_collection() by default
+
     Returns:
-        str: Path to the output image
-    
-    Example:
-        # Replace a specific color
-        change_image_color('input.png', 'output.png', '#720000', '#1a1a1a')
-        
-        # Replace the most common color
-        change_image_color('input.png', 'output.png', (114, 0, 0))
+        dict: {restaurant index: Google Maps json of the restaurant, or None if there is none}
     """
-    # Helper function to convert hex to RGB
-    def hex_to_rgb(hex_color: str) -> tuple:
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    
-    # Convert colors to RGB tuples if they're hex strings
-    if isinstance(new_color, str):
-        new_color = hex_to_rgb(new_color)
-    if isinstance(old_color, str):
-        old_color = hex_to_rgb(old_color)
-    
-    # Open the image
-    img = Image.open(input_path)
-    img = img.convert('RGBA')
-    
-    # Get pixel data
-    pixels = img.load()
-    width, height = img.size
-    
-    # If old_color is not specified, find the most common non-transparent color
-    if old_color is None:
-        color_counts = {}
-        for y in range(height):
-            for x in range(width):
-                r, g, b, a = pixels[x, y]
-                # Skip transparent pixels
-                if a < 128:
-                    continue
-                color = (r, g, b)
-                color_counts[color] = color_counts.get(color, 0) + 1
-        
-        if color_counts:
-            old_color = max(color_counts, key=color_counts.get)
-        else:
-            raise ValueError("No non-transparent pixels found in image")
-    
-    # Helper function to check if colors match within tolerance
-    def colors_match(c1: tuple, c2: tuple, tol: int) -> bool:
-        return all(abs(c1[i] - c2[i]) <= tol for i in range(3))
-    
-    # Iterate through all pixels and replace the old color with the new color
-    for y in range(height):
-        for x in range(width):
-            r, g, b, a = pixels[x, y]
-            
-            # If this pixel matches the old color (within tolerance), replace it
-            if colors_match((r, g, b), old_color, tolerance):
-                pixels[x, y] = (new_color[0], new_color[1], new_color[2], a)
-    
-    # Save the modified image
-    img.save(output_path)
-    
-    return output_path
-
-
-def change_year_background_highlighted_color(new_color: tuple | str):
-    """Change the background color of the highlighted year image."""
-    change_image_color(
-        "assets/png/year_background_highlighted.png", 
-        "assets/png/year_background_highlighted.png", 
-        new_color
-    )
-    # Delete <year>_highlighted.png files, filter with regex
-    for file in os.listdir("assets/png"):
-        if re.match(r"\d+_(highlighted).png", file):
-            os.remove(os.path.join("assets/png", file))
-
-
-def generate_year_image(year: int, background_path: str, output_dir: str = "assets/png"):
-    """Generate a year tag image by overlaying text on a background image.
-    
+    if collection is None:
+        collection = get_collection()
+    documents = {}
+    for document in collection.find({}, GMAPS_INFO_PROJECTION):
+        documents[document["index"]] = document.get("json")
+    return documents
+
+
+class GmapsDocumentCache:
+    """A cache of the gmaps_infos documents, refreshed in the background once they are older than ttl seconds.
+
+    Once loaded, reads never wait for the database: stale documents keep being served while a refresh
+    runs in the database thread pool (stale-while-revalidate), and a failed refresh keeps the
+    stale documents. start() refreshes the documents periodically, so that they rarely get stale at all.
+    Outside of an event loop (e.g. scripts), stale documents are reloaded synchronously instead.
+
+    Args:
+        loader (callable): Optional. Returns the documents, load_gmaps_documents() by default
+        ttl (float): Optional. Seconds after which the documents are refreshed, GMAPS_CACHE_TTL by default
+        clock (callable): Optional. Returns the current time in seconds, time.monotonic by default
+    """
+
+    def __init__(self, loader=None, ttl=None, clock=time.monotonic):
+        self.loader = loader
+        self.ttl = GMAPS_CACHE_TTL if ttl is None else ttl
+        self.clock = clock
+        self._documents = None
+        self._schedules = None
+        self._open_restaurant_index = None
+        self._loaded_at = None
+        self._refresh_task = None
+        self._periodic_task = None
+
+    def _load(self) -> dict:
+        return self.loader() if self.loader is not None else load_gmaps_documents()
+
+    def _set(self, documents) -> dict:
+        schedules = compile_opening_schedules(documents)
+        self._documents, self._schedules, self._loaded_at = documents, schedules, self.clock()
+        self._open_restaurant_index = None
+        return documents
+
+    def opening_schedules(self, documents) -> dict:
+        """Return the compiled opening hours of the given documents, see compile_opening_schedules().
+
+        The opening hours of the cached documents are compiled once per load, other documents are compiled on demand.
+        """
+        if documents is self._documents:
+            return self._schedules
+        return compile_opening_schedules(documents)
+
+    def open_restaurant_index(self, documents) -> 'OpenRestaurantIndex':
+        """Return the OpenRestaurantIndex of the given documents, see build_open_restaurant_index().
+
+        The index of the cached documents is built once per load, on first use.
+        """
+        if documents is not self._documents:
+            return build_open_restaurant_index(documents)
+        if self._open_restaurant_index is None:
+            self._open_restaurant_index = build_open_restaurant_index(documents)
+        return self._open_restaurant_index
+
+    def is_stale(self) -> bool:
+        return self._documents is None or self.clock() - self._loaded_at >= self.ttl
+
+    def clear(self) -> None:
+        """Forget the documents, so that the next read loads them again."""
+        self._documents = self._schedules = self._open_restaurant_index = self._loaded_at = None
+
+    def load(self) -> dict:
+        """Load the documents from the database, blocking until they are loaded."""
+        return self._set(self._load())
+
+    def get(self) -> dict:
+        """Return the documents, loading them on first use, and refreshing them in the background if stale."""
+        if self._documents is None:
+            return self.load()
+        if self.is_stale():
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                try:
+                    return self.load()
+                except Exception as e:
+                    print(f"Failed to refresh the gmaps_infos documents, serving the cached ones: {e}")
+                    return self._documents
+            self._schedule_refresh()
+        return self._documents
+
+    async def aget(self) -> dict:
+        """Like get(), but the first load does not block the event loop either.
+
+        Raises:
+            RuntimeError: If the documents were never loaded, and cannot be loaded
+        """
+        if self._documents is None:
+            await self.refresh()
+            if self._documents is None:
+                raise RuntimeError("The gmaps_infos documents could not be loaded")
+        return self.get()
+
+    def _schedule_refresh(self) -> asyncio.Task:
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._refresh_task = task = asyncio.get_running_loop().create_task(self._refresh())
+        return task
+
+    async def refresh(self) -> dict:
+        """Reload the documents without blocking the event loop, and return them.
+
+        Concurrent calls share the same reload.
+        """
+        await self._schedule_refresh()
+        return self._documents
+
+    async def _refresh(self) -> None:
+        try:
+            documents = await run_db(self._load)
+        except Exception as e:
+            print(f"Failed to refresh the gmaps_infos documents, serving the cached ones: {e}")
+            return
+        self._set(documents)
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.ttl)
+
+    def start(self) -> asyncio.Task:
+        """Start refreshing the documents every ttl seconds on the running event loop, if not started yet."""
+        task = self._periodic_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._periodic_task = task = asyncio.get_running_loop().create_task(self._refresh_periodically())
+        return task
+
+
+def get_gmaps_documents(reload=False) -> dict:
+    """Return every gmaps_infos document keyed by index, through gmaps_document_cache.
+
     Args:
-        year: The year to display as text
-        background_path: Path to the background image to use
-        output_dir: Directory to save the output image (default: 'assets/png')
-    
+        reload (bool): Optional. Fetch the documents from the database again, blocking until they are loaded
+
     Returns:
-        The path to the generated image file
+        dict: {restaurant index: Google Maps json of the restaurant, or None if there is none}
     """
-    font_path = "assets/bahnschrift.ttf"
-    
-    # Open the background image
-    img = Image.open(background_path)
-    draw = ImageDraw.Draw(img)
-    
-    # Load the font
-    font = ImageFont.truetype(
-        font_path,
-        size=430,
-    )
-    
-    # Set the font to Bold variation
-    font.set_variation_by_name("Bold")
-    
-    # Get the text to display
-    year_text = str(year)
-    
-    # Get the bounding box of the text
-    left, top, right, bottom = draw.textbbox((0, 0), year_text, font=font)
-    text_width = right - left
-    text_height = bottom - top
-    
-    # Calculate centered position
-    img_width, img_height = img.size
-    x = (img_width - text_width) / 2 - left
-    y = (img_height - text_height) / 2 - top
-    
-    # Draw the text on the image (white text)
-    draw.text((x, y), year_text, font=font, fill=(255, 255, 255))
-    
-    # Save the image
-    # Determine suffix based on background path
-    if "highlighted" in background_path:
-        output_path = os.path.join(output_dir, f"{year}_highlighted.png")
-    else:
-        output_path = os.path.join(output_dir, f"{year}.png")
-    img.save(output_path)
-    
-    return output_path
-
-
-def create_missing_year_images():
-    """Generate missing year images for both regular and highlighted backgrounds."""
-    # Uncomment and change color below for new highlighted year background color
-    # change_year_background_highlighted_color("#cc6633")
-    background_regular = "assets/png/year_background.png"
-    background_highlighted = "assets/png/year_background_highlighted.png"
-    
-    for year in RESTAURANT_YEARS:
-        # Generate regular year image if it doesn't exist
-        if not os.path.exists(f"assets/png/{year}.png"):
-            generate_year_image(year, background_regular)
-        
-        # Generate highlighted year image if it doesn't exist
-        if not os.path.exists(f"assets/png/{year}_highlighted.png"):
-            generate_year_image(year, background_highlighted)
+    if reload:
+        return gmaps_document_cache.load()
+    return gmaps_document_cache.get()
 
 
 ##############################################
 # Set up constants
 ##############################################
-RESTAURANT_NAMES = [restaurant_name for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
-RESTAURANT_PATH_TO_LOGO_IMAGES = [TIER_DICT[tier][restaurant_name]["path_to_logo_image"]
-                                  for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
-RESTAURANT_PRICE_RANGES = [TIER_DICT[tier][restaurant_name]["price"]
-                           for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
-RESTAURANT_ADDRESSES = [TIER_DICT[tier][restaurant_name]["address"]
-                        for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
-RESTAURANT_DESCRIPTIONS = [TIER_DICT[tier][restaurant_name]["description"]
-                           for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
-RESTAURANT_TIERS = [tier for tier in TIER_DICT for _ in TIER_DICT[tier]]
-RESTAURANT_YEARS = sorted(list(set([TIER_DICT[tier][restaurant_name]["year"]
-                        for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]])))
-create_missing_year_images()
-
 MANUAL_EMBED_RESTAURANTS = ["Bubba's Crispy Fried Chicken", "Foodie"]
-TIERLIST_IMAGE_NAME = os.path.join('tierlist_output', 'tierlist.png')
-TIERLIST_IMAGE_NAME_WITH_YEAR_TAG = os.path.join('tierlist_output', 'tierlist_with_year_tag.png')
-TIERLIST_IMAGE_NAME_WITH_YEAR_FIRST_VISITED_TAG = os.path.join('tierlist_output', 'tierlist_with_year_first_visited_tag.png')
 TIMEZONE = pytz.timezone('America/Toronto')
-TIERS = ['S', 'A', 'B', 'C', 'D', 'E', 'F']
-
-TIER_PREFIX = {
-    'S': 'Spectacular',
-    'A': 'Acclaimed',
-    'B': 'Better',
-    'C': 'Common',
-    'D': 'Derogatory',
-    'E': 'Enervating',
-    'F': "Freakin' Raw"
-}
-TIER_COLOUR_HEX_DICT = {
-    'S': "#ff7f7f",
-    'A': "#ffbf7f",
-    'B': "#ffff7f",
-    'C': "#7fff7f",
-    'D': "#7fbfff",
-    'E': "#7f7fff",
-    'F': "#ff7fff"
-}
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+# Discord limits embed descriptions to 4096 characters
+OPEN_NOW_EMBED_MAX_LENGTH = 4000
+# Threads running blocking database calls for the event loop, see run_db()
+DB_WORKERS = 4
+# Seconds after which the cached gmaps_infos documents are refreshed
+GMAPS_CACHE_TTL = 15 * 60
+# The fields of the gmaps_infos documents used by the bot
+GMAPS_INFO_PROJECTION = {"_id": 0, "index": 1, "json.result.name": 1, "json.result.business_status": 1,
+                         "json.result.opening_hours": 1, "json.result.url": 1, "json.result.website": 1}
+# The gmaps_infos documents shared by every embed, see get_gmaps_documents()
+gmaps_document_cache = GmapsDocumentCache()
 
 
 ##############################################
@@ -306,11 +304,26 @@ def get_current_restaurants_list(current_page) -> list:
     return [element.replace("*", "") for element in create_list_embed(current_page)[0]]
 
 
-def create_restaurants_embed(current_page) -> tuple:
+async def create_restaurants_embed_async(current_page) -> tuple:
+    """Like create_restaurants_embed(), without blocking the event loop on the database.
+
+    Args:
+        current_page (int): The current page of PaginationView.
+
+    Returns:
+        (discord.File, discord.Embed): A tuple of the thumbnail file and the embed for the restaurant.
+    """
+    if RESTAURANT_NAMES[current_page] in MANUAL_EMBED_RESTAURANTS:
+        return create_manual_embed(current_page)
+    return create_restaurants_embed(current_page, await get_gmaps_info_async(current_page))
+
+
+def create_restaurants_embed(current_page, gmaps_info=None) -> tuple:
     """Creates individual restaurant embeds for PaginationView.
 
     Args:
         current_page (int): The current page of PaginationView.
+        gmaps_info (list): Optional. The result of get_gmaps_info(current_page), fetched if not given.
 
     Returns:
         (discord.File, discord.Embed): A tuple of the thumbnail file and the embed for the restaurant.
@@ -323,7 +336,8 @@ def create_restaurants_embed(current_page) -> tuple:
     price_range = RESTAURANT_PRICE_RANGES[current_page]
     tier = RESTAURANT_TIERS[current_page]
 
-    gmaps_info = get_gmaps_info(current_page)
+    if gmaps_info is None:
+        gmaps_info = get_gmaps_info(current_page)
 
     embed = discord.Embed(title=title, description=description,
                           color=discord.Color.from_str(TIER_COLOUR_HEX_DICT[tier]),
@@ -425,7 +439,19 @@ def _foodie_embed(current_page) -> tuple:
     return (thumbnail_file, embed)
 
 
-def get_gmaps_info(current_page) -> list[str]:
+async def get_gmaps_info_async(current_page) -> list[str]:
+    """Like get_gmaps_info(), without blocking the event loop on the database.
+
+    Args:
+        current_page (int): The current page of PaginationView.
+
+    Returns:
+        list[str]: a list of strs in the format [open status, link to google maps link, website, opening hours text]
+    """
+    return get_gmaps_info(current_page, await gmaps_document_cache.aget())
+
+
+def get_gmaps_info(current_page, documents=None) -> list[str]:
     """Return open status, link to google maps link, and the website, if available.
 
     open status: identical to the business status on google maps if the restaurant is
@@ -437,11 +463,14 @@ def get_gmaps_info(current_page) -> list[str]:
 
     Args:
         current_page (int): The current page of PaginationView.
+        documents (dict): Optional. The gmaps_infos documents keyed by index, get_gmaps_documents() by default
 
     Returns:
         list[str]: a list of strs in the format [open status, link to google maps link, website, opening hours text]
     """
-    json_result = dict(collection.find_one({"index": current_page}))["json"]
+    if documents is None:
+        documents = get_gmaps_documents()
+    json_result = documents[current_page]
     # assert address in json_result['result']['formatted_address']
     # Get the business status if the key exists, otherwise return None
     # Redo capitalization to only capitalize the first letters of each word
@@ -449,11 +478,12 @@ def get_gmaps_info(current_page) -> list[str]:
                                         .get('business_status').split('_')]))
     # assert business_status in ['Operational', 'Permanently Closed', 'Temporarily Closed']
     if business_status == 'Operational':
-        opening_hours = json_result['result'].get('opening_hours').get('periods')
+        schedule = gmaps_document_cache.opening_schedules(documents).get(current_page)
     else:
-        opening_hours = None
-    if opening_hours is not None:
-        open_now = is_open_now(opening_hours)
+        schedule = None
+    if schedule is not None:
+        minute = current_minute_of_week()
+        open_now = is_open_now(schedule, minute)
     else:
         open_now = None
     if business_status == 'Permanently Closed' or business_status == 'Temporarily Closed' or open_now is None:
@@ -465,118 +495,252 @@ def get_gmaps_info(current_page) -> list[str]:
             open_status = business_status + ' (Closed Now)'
     gmaps_link = json_result['result'].get('url')
     website = json_result['result'].get('website')
-    if opening_hours is not None:
+    if schedule is not None:
         human_readable_opening_hours = reformat_opening_hours_text(
-            json_result['result'].get('opening_hours').get('weekday_text'),
-            append_dummy_hours(opening_hours))
+            json_result['result'].get('opening_hours').get('weekday_text'), schedule, minute)
     else:
         human_readable_opening_hours = None
     return [open_status, gmaps_link, website, human_readable_opening_hours]
 
 
-def append_dummy_hours(opening_hours) -> list:
-    """Modify the opening hours so that the opening_hours list is 7 elements long.
+class OpeningSchedule:
+    """The opening periods of a restaurant, compiled into sorted minute-of-week intervals.
 
-    Google Maps API automatically skips an element if the restaurant is closed on that day.
-    This function inserts a None element in its place if the restaurant is closed on that day.
+    Minutes of the week are counted from Sunday 00:00, like the days of the Google Maps API (0 is Sunday).
+    Periods closing on a later day (e.g. open until 2am) are kept as a single interval, periods running
+    past Saturday midnight are split in two, and a period without a closing time (Google Maps' way of
+    saying open 24 hours) covers the whole week. Whether the restaurant is open at a given minute is
+    found with a binary search in the merged intervals (starts, ends). The periods themselves are kept
+    apart (period_starts, period_ends, period_days), as back-to-back periods that merge into a single
+    interval still start on different days.
 
     Args:
-        opening_hours (list): The opening hours of the restaurant
+        periods (list): The opening_hours periods of the restaurant, from the Google Maps API
+    """
+    __slots__ = ("starts", "ends", "period_starts", "period_ends", "period_days", "always_open")
+
+    def __init__(self, periods):
+        intervals = []
+        for period in periods:
+            day = period["open"]["day"]
+            start = minute_of_week(day, period["open"]["time"])
+            if "close" not in period:
+                intervals.append((0, MINUTES_PER_WEEK, day))
+                continue
+            end = minute_of_week(period["close"]["day"], period["close"]["time"])
+            if end <= start:
+                end += MINUTES_PER_WEEK
+            if end > MINUTES_PER_WEEK:
+                intervals += [(start, MINUTES_PER_WEEK, day), (0, end - MINUTES_PER_WEEK, day)]
+            else:
+                intervals.append((start, end, day))
+        intervals.sort()
+        merged = []
+        for start, end, _ in intervals:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        # Minutes of the week fit in 16 bits
+        self.starts = array.array("H", [interval[0] for interval in merged])
+        self.ends = array.array("H", [interval[1] for interval in merged])
+        self.period_starts = array.array("H", [interval[0] for interval in intervals])
+        self.period_ends = array.array("H", [interval[1] for interval in intervals])
+        self.period_days = array.array("B", [interval[2] for interval in intervals])
+        self.always_open = merged == [[0, MINUTES_PER_WEEK]]
+
+    def period_day_at(self, minute) -> int:
+        """Return the day on which the period containing the given minute of the week opened, or None if closed.
+
+        Args:
+            minute (int): The minute of the week, from 0 (Sunday 00:00) to MINUTES_PER_WEEK - 1
+
+        Returns:
+            int: The day the current period opened (0 is Sunday), or None if the restaurant is closed
+        """
+        if not self.is_open_at(minute):
+            return None
+        # The latest period opened at or before the minute that is still open, periods rarely overlap
+        i = bisect.bisect_right(self.period_starts, minute) - 1
+        while minute >= self.period_ends[i]:
+            i -= 1
+        return self.period_days[i]
+
+    def is_open_at(self, minute) -> bool:
+        """Return True if the restaurant is open at the given minute of the week, False otherwise."""
+        i = bisect.bisect_right(self.starts, minute) - 1
+        return i >= 0 and minute < self.ends[i]
+
+    def maps_day_at(self, minute) -> int:
+        """Return the day that would appear as the current day on Google Maps at the given minute of the week.
+
+        For example, if a restaurant is open until 2am on Monday, and it is currently 1am on Tuesday,
+        then the current day would appear as open on Monday on Google Maps.
+        """
+        current_day = minute // MINUTES_PER_DAY
+        period_day = self.period_day_at(minute)
+        if not self.always_open and period_day == (current_day - 1) % 7:
+            return period_day
+        return current_day
+
+
+def compile_opening_schedules(documents) -> dict:
+    """Compile the opening hours of every restaurant.
+
+    Args:
+        documents (dict): The gmaps_infos documents keyed by index, see load_gmaps_documents()
 
     Returns:
-        list: A list of opening hours in the format [(open, close)]
+        dict: {restaurant index: OpeningSchedule}, for restaurants with opening hours
+    """
+    schedules = {}
+    for index, json_result in documents.items():
+        periods = ((json_result or {}).get("result", {}).get("opening_hours") or {}).get("periods")
+        if periods is not None:
+            schedules[index] = OpeningSchedule(periods)
+    return schedules
+
+
+class OpenRestaurantIndex:
+    """Which restaurants are open at every minute of the week, as a NumPy bitmap.
+
+    Row m of the bitmap has bit i set if the i-th restaurant of indexes is open at minute m of the
+    week, so that the restaurants open at any time are found with a single row lookup.
+
+    Args:
+        schedules (dict): {restaurant index: OpeningSchedule}, see compile_opening_schedules()
     """
-    opening_hours = opening_hours.copy()
-    for i in range(7):
-        if i > len(opening_hours) - 1 or opening_hours[i]['open']['day'] != i:
-            opening_hours.insert(i, None)
-    return opening_hours
 
+    def __init__(self, schedules):
+        # Imported here, as numpy takes longer to import than the rest of this file
+        import numpy as np
+
+        self.indexes = np.array(sorted(schedules), dtype=np.int32)
+        open_minutes = np.zeros((MINUTES_PER_WEEK, len(self.indexes)), dtype=bool)
+        for column, index in enumerate(self.indexes):
+            schedule = schedules[index]
+            for start, end in zip(schedule.starts, schedule.ends):
+                open_minutes[start:end, column] = True
+        self.bitmap = np.packbits(open_minutes, axis=1)
+
+    def open_at(self, minute) -> list:
+        """Return the indexes of the restaurants open at the given minute of the week, in increasing order."""
+        import numpy as np
 
-def codify_opening_hours(opening_hours) -> list:
-    """Return a list of opening hours in the format [(open, close)].
+        row = np.unpackbits(self.bitmap[minute % MINUTES_PER_WEEK], count=len(self.indexes))
+        return self.indexes[row.astype(bool)].tolist()
 
-    open and close should have the format "DHHMM", where D is the day of the week (0-6),
-    HH is the hour (00-23), and MM is the minute (00-59).
 
-    If a restaurant is open 24 hours, return the same element without modification.
+def build_open_restaurant_index(documents) -> OpenRestaurantIndex:
+    """Build the OpenRestaurantIndex of the operational restaurants of the given gmaps_infos documents."""
+    schedules = gmaps_document_cache.opening_schedules(documents)
+    return OpenRestaurantIndex({index: schedule for index, schedule in schedules.items()
+                                if documents[index]["result"].get("business_status") == "OPERATIONAL"})
 
-    append_dummy_hours() should be called before this function.
 
-    Optionally, the element can be None if the restaurant is closed on that day.
+def open_restaurants_at(minute=None, documents=None) -> list:
+    """Return the indexes of the restaurants open at the given minute of the week.
+
+    Only operational restaurants with opening hours on Google Maps are considered.
 
     Args:
-        opening_hours (list): The opening hours of the restaurant
+        minute (int): Optional. The minute of the week, from 0 (Sunday 00:00), now by default
+        documents (dict): Optional. The gmaps_infos documents keyed by index, get_gmaps_documents() by default
 
     Returns:
-        list: A list of opening hours in the format [(open, close)]
+        list: The indexes of the open restaurants, in increasing order
     """
-    assert len(opening_hours) == 7
-    codified_opening_hours = []
-    if all(opening_hours[i] is None for i in range(1, 7)) and opening_hours[0] is not None:
-        return opening_hours
-    for day in opening_hours:
-        if day is None:
-            codified_opening_hours.append(None)
-        else:
-            codified_opening_hours.append((str(day["open"]["day"]) + day["open"]["time"],
-                                           str(day["close"]["day"]) + day["close"]["time"]))
-    return codified_opening_hours
+    if documents is None:
+        documents = get_gmaps_documents()
+    index = gmaps_document_cache.open_restaurant_index(documents)
+    return index.open_at(current_minute_of_week() if minute is None else minute)
+
 
+async def open_restaurants_at_async(minute=None) -> list:
+    """Like open_restaurants_at(), without blocking the event loop on the database."""
+    return open_restaurants_at(minute, await gmaps_document_cache.aget())
 
-def get_maps_current_day(codified_opening_hours, codified_date_time) -> int:
-    """Return the day that it would appear as the current day on Google Maps.
 
-    For example, if a restaurant is open until 2am on Monday, and it is currently 1am on Tuesday,
-    then the current day would appear as open on Monday on Google Maps.
+def parse_minute_of_week(day=None, time_text=None) -> int:
+    """Return the minute of the week of the given day and time, defaulting to the current ones.
 
     Args:
-        codified_opening_hours (list): The codified opening hours of the restaurant
-        codified_date_time (str): The codified date and time
+        day (int): Optional. The day of the week, 0 (Sunday) to 6 (Saturday)
+        time_text (str): Optional. The time of day, in the 24-hour HH:MM or HHMM format
 
     Returns:
-        int: The day that it would appear as the current day on Google Maps
+        int: The minute of the week
+
+    Raises:
+        ValueError: If the day or the time is invalid
     """
-    current_day = int(codified_date_time[0])
-    if codified_opening_hours[current_day] is None or codified_opening_hours[current_day - 1] is None:
-        return current_day
-    if current_day != 0:
-        if codified_opening_hours[current_day - 1][1] > codified_date_time:
-            return current_day - 1
-        else:
-            return current_day
+    now = current_date_and_time()
+    day = now["day"] if day is None else day
+    if time_text is None:
+        time_text = now["time"]
+    time_text = time_text.strip().replace(":", "")
+    if not 0 <= day <= 6 or len(time_text) != 4 or not time_text.isdigit() \
+            or int(time_text[:2]) > 23 or int(time_text[2:]) > 59:
+        raise ValueError(f"Invalid day or time: {day}, {time_text}")
+    return minute_of_week(day, time_text)
+
+
+def create_open_now_embed(open_indexes, minute, now=True) -> discord.Embed:
+    """Creates the embed listing the restaurants open at the given minute of the week.
+
+    Restaurants of the database that are not in the tier list (yet) are left out.
+
+    Args:
+        open_indexes (list): The indexes of the open restaurants, see open_restaurants_at()
+        minute (int): The minute of the week
+        now (bool): Optional. Whether the minute is the current time
+
+    Returns:
+        discord.Embed: The embed
+    """
+    if now:
+        title = "Open now"
     else:
-        _, close_hours_previous = codified_opening_hours[6]
-        if close_hours_previous[0] == "0" and codified_date_time < close_hours_previous:
-            return 6
-        else:
-            return 0
+        title = "Open on {} at {:02d}:{:02d}".format(DAY_NAMES[minute // MINUTES_PER_DAY],
+                                                   minute % MINUTES_PER_DAY // 60, minute % 60)
+    open_indexes = [index for index in open_indexes if 0 <= index < len(RESTAURANT_NAMES)]
+    lines, length = [], 0
+    for shown, index in enumerate(open_indexes):
+        line = "**{}** {}".format(RESTAURANT_TIERS[index], RESTAURANT_NAMES[index])
+        remaining = "...and {} more".format(len(open_indexes) - shown)
+        if length + len(line) + len(remaining) + 2 > OPEN_NOW_EMBED_MAX_LENGTH:
+            lines.append(remaining)
+            break
+        lines.append(line)
+        length += len(line) + 1
+    description = "\n".join(lines) if lines else "No restaurant is open."
+    embed = discord.Embed(title=title, description=description, color=0x00ff00)
+    embed.set_footer(text="{} restaurant{} open".format(len(open_indexes), "" if len(open_indexes) == 1 else "s"))
+    return embed
+
+
+def minute_of_week(day, time_text) -> int:
+    """Return the minute of the week of a day (0 is Sunday) and a time in the 24-hour hhmm format."""
+    return day * MINUTES_PER_DAY + int(time_text[:2]) * 60 + int(time_text[2:])
+
+
+def current_minute_of_week() -> int:
+    """Return the current minute of the week, from 0 (Sunday 00:00) to MINUTES_PER_WEEK - 1."""
+    time_date_dict = current_date_and_time()
+    return minute_of_week(time_date_dict["day"], time_date_dict["time"])
 
 
-def is_open_now(opening_hours) -> bool:
+def is_open_now(schedule, minute=None) -> bool:
     """Return True if the restaurant is open now, False otherwise.
 
     Args:
-        opening_hours (list): The opening hours of the restaurant
+        schedule (OpeningSchedule): The compiled opening hours of the restaurant
+        minute (int): Optional. The minute of the week to check instead of now
 
     Returns:
         bool: True if the restaurant is open now, False otherwise
     """
-    if len(opening_hours) == 1 and opening_hours[0]["open"]["day"] == 0 and opening_hours[0]["open"]["time"] == "0000":
-        return True
-    time_date_dict = current_date_and_time()
-    current_day = time_date_dict["day"]
-    codified_date_time = str(current_day) + time_date_dict["time"]
-    codified_opening_hours = codify_opening_hours(append_dummy_hours(opening_hours))
-    maps_current_day = get_maps_current_day(codified_opening_hours, codified_date_time)
-    if codified_opening_hours[maps_current_day] is None:
-        return False
-    open_time, close_time = codified_opening_hours[maps_current_day]
-    if maps_current_day != 6 or (maps_current_day == 6 and current_day == 6):
-        return open_time <= codified_date_time < close_time
-    else:
-        assert maps_current_day == 6 and current_day == 0
-        return codified_date_time < close_time
+    return schedule.is_open_at(current_minute_of_week() if minute is None else minute)
 
 
 def current_date_and_time() -> dict:
@@ -609,27 +773,21 @@ def get_current_day() -> int:
     return current_day
 
 
-def reformat_opening_hours_text(opening_hours_text, opening_hours) -> str:
-    """Reformat the opening hours text to be human readable.
+def reformat_opening_hours_text(opening_hours_text, schedule, minute=None) -> str:
+    """Reformat the opening hours text to be human readable, with the current day on Google Maps in bold.
     The parameter contains \u2009 or \u202f characters, which are unicode characters. Remove them.
 
-    append_dummy_hours(opening_hours) should be called before this function.
-
     Args:
         opening_hours_text (list): The opening hours text of the restaurant
-        opening_hours (list): The opening hours of the restaurant
+        schedule (OpeningSchedule): The compiled opening hours of the restaurant
+        minute (int): Optional. The minute of the week to use instead of now
 
     Returns:
         str: The reformatted opening hours text
     """
-    assert len(opening_hours) == 7
     plain_list = [opening_hour.replace('\u2009', ' ').replace('\u202f', ' ') for opening_hour in opening_hours_text]
     plain_list = [plain_list[-1]] + plain_list[:-1]
-    time_date_dict = current_date_and_time()
-    current_day = time_date_dict["day"]
-    codified_date_time = str(current_day) + time_date_dict["time"]
-    codified_opening_hours = codify_opening_hours(opening_hours)
-    maps_current_day = get_maps_current_day(codified_opening_hours, codified_date_time)
+    maps_current_day = schedule.maps_day_at(current_minute_of_week() if minute is None else minute)
     modified_list = ["**" + plain_list[opening_hour] + "**" if opening_hour == maps_current_day
                      else plain_list[opening_hour] for opening_hour in range(len(plain_list))]
     return "\n".join(modified_list)
@@ -638,10 +796,11 @@ def reformat_opening_hours_text(opening_hours_text, opening_hours) -> str:
 def verify_restaurant_names() -> None:
     """Verify that the restaurant names in the database match the restaurant names in the tier_dict."""
     mismatches, potential_mismatches = [], []
+    documents = get_gmaps_documents(reload=True)
     for i in range(len(RESTAURANT_NAMES)):
-        if collection.find_one({"index": i})["json"] is None:
+        if documents.get(i) is None:
             continue
-        name_in_db = collection.find_one({"index": i})["json"]["result"]["name"]
+        name_in_db = documents[i]["result"]["name"]
         lower_restaurant_name, lower_name_in_db = (RESTAURANT_NAMES[i].lower(),
                                                    str.replace(name_in_db, "’", "'").lower())
         if lower_restaurant_name != lower_name_in_db:
@@ -676,5 +835,5 @@ if __name__ == "__main__":
     if not os.path.exists('.env'):
         raise FileNotFoundError('.env file not found')
     # verify_restaurant_names()
-    # To change the highlighted year background color, go to create_missing_year_images()
+    # To change the highlighted year background color, go to helper_core.create_missing_year_images()
     # and uncomment the change_year_background_highlighted_color() line
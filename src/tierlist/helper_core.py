@@ -0,0 +1,268 @@
+"""A lightweight helper file containing the tier data and image functions used by tierlist.py and helper.py.
+
+Importing this file has no side effects besides reading tier_dict.json, so that rendering-only
+consumers (tierlist.py, tests) do not pay for the discord and MongoDB set up done in helper.py.
+"""
+
+from pathlib import Path
+import os
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+from render_cache import save_image_atomically
+
+TIER_DICT_PATH = Path(__file__).parent / 'tier_dict.json'
+TIER_DICT = json.load(open(TIER_DICT_PATH))
+YEAR_FONT_PATH = "assets/bahnschrift.ttf"
+YEAR_FONT_SIZE = 430
+YEAR_BACKGROUND = "assets/png/year_background.png"
+YEAR_BACKGROUND_HIGHLIGHTED = "assets/png/year_background_highlighted.png"
+
+
+##############################################
+# Tierlist helper functions
+##############################################
+def get_first_tier_indexes() -> dict:
+    """Get the first index of each tier.
+
+    Returns:
+        dict: A dictionary of the form {tier: first index}
+    """
+    first_tier_indexes = {"S": 0}
+    tiers = list(TIER_DICT.keys())
+    lengths = [len(TIER_DICT[tier]) for tier in tiers]
+    for tier in TIER_DICT:
+        if tier == "S":
+            pass
+        else:
+            first_tier_indexes[tier] = sum(lengths[:tiers.index(tier)])
+    return first_tier_indexes
+
+
+def change_image_color(input_path: str, output_path: str, new_color: str | tuple,
+                       old_color: str | tuple = None, tolerance: int = 0):
+    """Change a specific color in an image to a new color.
+    
+    This function can replace a specific color in an image with a new color.
+    If old_color is not specified, it will automatically detect and replace
+    the most common non-transparent color in the image.
+    
+    Args:
+        input_path: Path to the input image
+        output_path: Path to save the modified image
+        new_color: New color as hex string (e.g., '#720000') or RGB tuple (e.g., (114, 0, 0))
+        old_color: Optional. Color to replace as hex string or RGB tuple.
+                   If None, replaces the most common non-transparent color.
+        tolerance: Optional. Color matching tolerance (0-255) for anti-aliasing.
+                   Default is 0 (exact match only).
+    
+    Returns:
+        str: Path to the output image
+    
+    Example:
+        # Replace a specific color
+        change_image_color('input.png', 'output.png', '#720000', '#1a1a1a')
+        
+        # Replace the most common color
+        change_image_color('input.png', 'output.png', (114, 0, 0))
+    """
+    # Imported here, as numpy takes longer to import than the rest of this file
+    import numpy as np
+
+    # Helper function to convert hex to RGB
+    def hex_to_rgb(hex_color: str) -> tuple:
+        hex_color = hex_color.lstrip('#')
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    
+    # Convert colors to RGB tuples if they're hex strings
+    if isinstance(new_color, str):
+        new_color = hex_to_rgb(new_color)
+    if isinstance(old_color, str):
+        old_color = hex_to_rgb(old_color)
+    
+    # Open the image
+    img = Image.open(input_path)
+    img = img.convert('RGBA')
+    
+    # Get pixel data as a (height, width, 4) array
+    pixels = np.array(img)
+    rgb = pixels[..., :3]
+    
+    # If old_color is not specified, find the most common non-transparent color
+    if old_color is None:
+        # Skip transparent pixels, keeping the others in row-major order
+        opaque = rgb[pixels[..., 3] >= 128].astype(np.uint32)
+        if len(opaque) == 0:
+            raise ValueError("No non-transparent pixels found in image")
+        # Pack each color into a single integer to count them in one pass
+        packed = (opaque[:, 0] << 16) | (opaque[:, 1] << 8) | opaque[:, 2]
+        colors, first_indexes, counts = np.unique(packed, return_index=True, return_counts=True)
+        # On ties, pick the color that appears first when scanning the image row by row
+        most_common = np.flatnonzero(counts == counts.max())
+        color = int(colors[most_common[np.argmin(first_indexes[most_common])]])
+        old_color = (color >> 16, (color >> 8) & 0xFF, color & 0xFF)
+    
+    # Replace the old color with the new color in every pixel matching it within tolerance,
+    # keeping the alpha channel untouched
+    difference = np.abs(rgb.astype(np.int16) - np.array(old_color[:3], dtype=np.int16))
+    mask = np.all(difference <= tolerance, axis=-1)
+    rgb[mask] = new_color[:3]
+    img.frombytes(pixels.tobytes())
+    
+    # Save the modified image
+    img.save(output_path)
+    
+    return output_path
+
+
+def change_year_background_highlighted_color(new_color: tuple | str):
+    """Change the background color of the highlighted year image."""
+    change_image_color(YEAR_BACKGROUND_HIGHLIGHTED, YEAR_BACKGROUND_HIGHLIGHTED, new_color)
+    # Delete <year>_highlighted.png files, filter with regex
+    for file in os.listdir("assets/png"):
+        if re.match(r"\d+_(highlighted).png", file):
+            os.remove(os.path.join("assets/png", file))
+
+
+def _load_year_font() -> ImageFont.FreeTypeFont:
+    """Load the font of the year tags: bahnschrift.ttf, with its Bold variation."""
+    font = ImageFont.truetype(YEAR_FONT_PATH, size=YEAR_FONT_SIZE)
+    font.set_variation_by_name("Bold")
+    return font
+
+
+def _draw_year_image(year: int, background: Image.Image, font: ImageFont.FreeTypeFont) -> Image.Image:
+    """Return a copy of the background with the year written in white at its center."""
+    img = background.copy()
+    draw = ImageDraw.Draw(img)
+    year_text = str(year)
+    
+    # Get the bounding box of the text
+    left, top, right, bottom = draw.textbbox((0, 0), year_text, font=font)
+    text_width = right - left
+    text_height = bottom - top
+    
+    # Calculate centered position
+    img_width, img_height = img.size
+    x = (img_width - text_width) / 2 - left
+    y = (img_height - text_height) / 2 - top
+    
+    # Draw the text on the image (white text)
+    draw.text((x, y), year_text, font=font, fill=(255, 255, 255))
+    return img
+
+
+def generate_year_images(year_backgrounds: list, output_dir: str = "assets/png", workers: int = None) -> list:
+    """Generate year tag images in a single pass.
+    
+    The font and each background image are loaded only once for all the images. The images are
+    drawn one after another (the font is shared, and FreeType fonts are not thread-safe), while the
+    PNG encoding and writing of the images can run in a thread pool. Every image is written to a
+    temporary file first and then moved into place, so that readers never see a partial image.
+    
+    Args:
+        year_backgrounds: A list of (year, background_path) pairs to generate images for
+        output_dir: Directory to save the output images (default: 'assets/png')
+        workers: Optional. Number of threads writing the images (default: write them sequentially)
+    
+    Returns:
+        The paths to the generated image files, in the same order as year_backgrounds
+    """
+    font = _load_year_font()
+    backgrounds = {}
+    output_paths = []
+    with ThreadPoolExecutor(max_workers=workers or 1) as executor:
+        writes = []
+        for year, background_path in year_backgrounds:
+            if background_path not in backgrounds:
+                with Image.open(background_path) as background:
+                    backgrounds[background_path] = background.copy()
+            img = _draw_year_image(year, backgrounds[background_path], font)
+            # Determine suffix based on background path
+            if "highlighted" in background_path:
+                output_path = os.path.join(output_dir, f"{year}_highlighted.png")
+            else:
+                output_path = os.path.join(output_dir, f"{year}.png")
+            writes.append(executor.submit(save_image_atomically, img, output_path))
+            output_paths.append(output_path)
+        for write in writes:
+            write.result()
+    return output_paths
+
+
+def generate_year_image(year: int, background_path: str, output_dir: str = "assets/png"):
+    """Generate a year tag image by overlaying text on a background image.
+    
+    Args:
+        year: The year to display as text
+        background_path: Path to the background image to use
+        output_dir: Directory to save the output image (default: 'assets/png')
+    
+    Returns:
+        The path to the generated image file
+    """
+    return generate_year_images([(year, background_path)], output_dir)[0]
+
+
+def create_missing_year_images(years: list = None, workers: int = None):
+    """Generate missing year images for both regular and highlighted backgrounds.
+
+    Args:
+        years: Optional. The years to generate images for (default: RESTAURANT_YEARS)
+        workers: Optional. Number of threads writing the images, see generate_year_images()
+    """
+    # Uncomment and change color below for new highlighted year background color
+    # change_year_background_highlighted_color("#cc6633")
+    missing = []
+    for year in RESTAURANT_YEARS if years is None else years:
+        # Generate regular year image if it doesn't exist
+        if not os.path.exists(f"assets/png/{year}.png"):
+            missing.append((year, YEAR_BACKGROUND))
+        
+        # Generate highlighted year image if it doesn't exist
+        if not os.path.exists(f"assets/png/{year}_highlighted.png"):
+            missing.append((year, YEAR_BACKGROUND_HIGHLIGHTED))
+    if missing:
+        generate_year_images(missing, workers=workers)
+
+
+##############################################
+# Set up constants
+##############################################
+RESTAURANT_NAMES = [restaurant_name for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
+RESTAURANT_PATH_TO_LOGO_IMAGES = [TIER_DICT[tier][restaurant_name]["path_to_logo_image"]
+                                  for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
+RESTAURANT_PRICE_RANGES = [TIER_DICT[tier][restaurant_name]["price"]
+                           for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
+RESTAURANT_ADDRESSES = [TIER_DICT[tier][restaurant_name]["address"]
+                        for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
+RESTAURANT_DESCRIPTIONS = [TIER_DICT[tier][restaurant_name]["description"]
+                           for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]]
+RESTAURANT_TIERS = [tier for tier in TIER_DICT for _ in TIER_DICT[tier]]
+RESTAURANT_YEARS = sorted(list(set([TIER_DICT[tier][restaurant_name]["year"]
+                        for tier in TIER_DICT for restaurant_name in TIER_DICT[tier]])))
+
+TIERLIST_IMAGE_NAME = os.path.join('tierlist_output', 'tierlist.png')
+TIERLIST_IMAGE_NAME_WITH_YEAR_TAG = os.path.join('tierlist_output', 'tierlist_with_year_tag.png')
+TIERLIST_IMAGE_NAME_WITH_YEAR_FIRST_VISITED_TAG = os.path.join('tierlist_output', 'tierlist_with_year_first_visited_tag.png')
+TIERS = ['S', 'A', 'B', 'C', 'D', 'E', 'F']
+
+TIER_PREFIX = {
+    'S': 'Spectacular',
+    'A': 'Acclaimed',
+    'B': 'Better',
+    'C': 'Common',
+    'D': 'Derogatory',
+    'E': 'Enervating',
+    'F': "Freakin' Raw"
+}
+TIER_COLOUR_HEX_DICT = {
+    'S': "#ff7f7f",
+    'A': "#ffbf7f",
+    'B': "#ffff7f",
+    'C': "#7fff7f",
+    'D': "#7fbfff",
+    'E': "#7f7fff",
+    'F': "#ff7fff"
+}
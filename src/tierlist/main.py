@@ -28,6 +28,8 @@ OWNER_ID = int(os.getenv("author_id"))
 async def on_ready() -> None:
     """When the bot is ready, sync the slash commands."""
     print(f'We have logged in as {client.user}')
+    # Keep the Google Maps info fresh in the background, so that embeds never wait for the database
+    gmaps_document_cache.start()
     await tree.sync()
 
 
@@ -67,6 +69,37 @@ async def alt2_tierlist_command(interaction: discord.Interaction) -> None:
     await interaction.response.send_message(embed=embed, file=discord.File(image, TIERLIST_IMAGE_NAME_WITH_YEAR_TAG))
 
 
+@tree.command(name='opennow', description='Shows the restaurants open now, or at the given day and time')
+@app_commands.describe(day='Day of the week, today by default',
+                       time='Time of day in the 24-hour HH:MM format, now by default')
+@app_commands.choices(day=[app_commands.Choice(name=name, value=i) for i, name in enumerate(DAY_NAMES)])
+async def open_now_command(interaction: discord.Interaction, day: Optional[app_commands.Choice[int]] = None,
+                           time: Optional[str] = None) -> None:
+    """Shows the restaurants open at the given day and time, according to their Google Maps opening hours.
+
+    Args:
+        interaction (discord.Interaction): The interaction that triggered this command.
+        day (app_commands.Choice[int]): Optional. The day of the week, today by default.
+        time (str): Optional. The time of day in the 24-hour HH:MM format, now by default.
+    """
+    try:
+        minute = parse_minute_of_week(day.value if day is not None else None, time)
+    except ValueError:
+        await interaction.response.send_message("Time must be in the 24-hour HH:MM format, e.g. 18:30",
+                                                ephemeral=True)
+        return
+    # The Google Maps info may have to be loaded first
+    await interaction.response.defer()
+    try:
+        open_indexes = await open_restaurants_at_async(minute)
+    except RuntimeError:
+        await interaction.followup.send("The Google Maps info could not be loaded, please try again later",
+                                        ephemeral=True)
+        return
+    embed = create_open_now_embed(open_indexes, minute, now=day is None and time is None)
+    await interaction.followup.send(embed=embed)
+
+
 ##############################################
 # DM Debug System (Owner Only)
 ##############################################
@@ -0,0 +1,309 @@
+"""A Python file with the on-disk caches used by tierlist.py."""
+import hashlib
+import json
+import math
+import os
+import stat
+import tempfile
+
+from PIL import Image
+
+CACHE_DIR = ".cache"
+LOGO_CACHE_DIR = os.path.join(CACHE_DIR, "logos")
+LOGO_CACHE_VERSION = 2  # Bump whenever resize_logo() produces different pixels, to invalidate old entries
+LOGO_REDUCING_GAP = 3.0
+MANIFEST_PATH = os.path.join(CACHE_DIR, "tierlist_manifest.json")
+THUMBNAIL_CACHE_DIR = os.path.join(CACHE_DIR, "thumbs")
+THUMBNAIL_JPEG_QUALITY = 85
+ATLAS_CACHE_DIR = os.path.join(CACHE_DIR, "atlas")
+ATLAS_MAX_WIDTH = 4096
+
+# The umask of this process, read once as it can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Resized logos loaded by this process, of the form {(path, height, cache dir): (cache key, image)}, so
+# that long-lived processes (e.g. the editor server) do not decode the same cached PNG on every render
+_resized_logos = {}
+
+
+def logo_cache_key(path: str, height: int) -> str:
+    """Return the cache key of a logo resized to the given height.
+
+    The key is derived from the source path, its modification time and size, and the
+    target height, so that replacing or editing a logo automatically invalidates its
+    cached thumbnails.
+
+    Args:
+        path (str): The path to the source logo image
+        height (int): The target height of the resized logo
+
+    Returns:
+        str: A hex digest identifying this version of the resized logo
+    """
+    stat = os.stat(path)
+    fingerprint = f"{LOGO_CACHE_VERSION}|{os.path.normpath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{height}"
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+
+def resize_logo(path: str, height: int) -> Image.Image:
+    """Open the logo at the given path and resize it, preserving the aspect ratio,
+    so that its height equals the given height.
+
+    JPEG logos are decoded in draft mode, which lets the decoder scale them down by up to 8x
+    in the DCT domain, so that large logos are never fully decoded in memory. The remaining
+    (at most 2x) reduction is done by a regular resize of the exact region returned by draft(),
+    which keeps the result visually equivalent to resizing the fully decoded logo.
+    """
+    img = Image.open(path)
+    width, original_height = img.size
+    size = (int(width * height / original_height), height)
+    box = None
+    if img.format == "JPEG":
+        # draft() never scales below the requested size, and returns the region of the
+        # scaled image that corresponds to the original one (scaled sizes are rounded up)
+        draft = img.draft(img.mode, size)
+        if draft is not None:
+            box = draft[1]
+    return img.resize(size, box=box, reducing_gap=LOGO_REDUCING_GAP)
+
+
+def load_resized_logo(path: str, height: int, cache_dir: str = None) -> Image.Image:
+    """Load the logo at the given path, resized to the given height, through the on-disk cache.
+
+    Logos already loaded by this process are kept in memory, as long as the logo file is unchanged.
+    On a cache miss, the logo is decoded and resized once and stored as a PNG (lossless, so
+    that cached and freshly resized logos are pixel-identical). Outdated entries of the
+    same logo and height are removed at the same time.
+
+    Args:
+        path (str): The path to the source logo image
+        height (int): The target height of the resized logo
+        cache_dir (str): Optional. The cache directory, LOGO_CACHE_DIR by default
+
+    Returns:
+        Image.Image: The resized logo, which the caller is free to modify
+    """
+    cache_dir = cache_dir or LOGO_CACHE_DIR
+    # The key changes with the logo file and LOGO_CACHE_VERSION, which replaces the entry loaded before
+    key = logo_cache_key(path, height)
+    memory_key = (os.path.normpath(path), height, os.path.normpath(cache_dir))
+    loaded = _resized_logos.get(memory_key)
+    if loaded is not None and loaded[0] == key:
+        return loaded[1].copy()
+    img = _load_resized_logo_from_disk(path, height, key, cache_dir)
+    _resized_logos[memory_key] = (key, img)
+    return img.copy()
+
+
+def _load_resized_logo_from_disk(path: str, height: int, key: str, cache_dir: str) -> Image.Image:
+    """Read the resized logo from the on-disk cache, or resize the logo and store it on a cache miss"""
+    prefix = _cache_entry_prefix(path, height)
+    cache_path = os.path.join(cache_dir, prefix + key[:16] + ".png")
+    try:
+        with Image.open(cache_path) as cached:
+            return cached.copy()
+    except OSError:
+        pass
+    img = resize_logo(path, height)
+    _remove_outdated_entries(cache_dir, prefix, cache_path)
+    save_image_atomically(img, cache_path)
+    return img
+
+
+def _cache_entry_prefix(path: str, height: int) -> str:
+    """Return the common prefix of every version of the cache entries of a logo at the given height.
+
+    It contains the file name (with its extension) and a hash of the full path, so that logos with the
+    same name, e.g. foo.png and foo.jpg, never remove each other's entries as outdated.
+    """
+    path_hash = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.basename(path)}-{path_hash}-{height}-"
+
+
+def load_thumbnail(path: str, height: int, cache_dir: str = None) -> tuple:
+    """Return the path to a thumbnail of the logo at the given path, encoded for the web,
+    creating it on a cache miss.
+
+    Thumbnails are resized like resize_logo(), and encoded as JPEG unless the logo has
+    transparency, in which case they are encoded as PNG. Outdated thumbnails of the same
+    logo and height are removed at the same time.
+
+    Args:
+        path (str): The path to the source logo image
+        height (int): The height of the thumbnail
+        cache_dir (str): Optional. The cache directory, THUMBNAIL_CACHE_DIR by default
+
+    Returns:
+        tuple: (path to the thumbnail file, cache key of this version of the thumbnail)
+    """
+    cache_dir = cache_dir or THUMBNAIL_CACHE_DIR
+    key = logo_cache_key(path, height)
+    prefix = _cache_entry_prefix(path, height)
+    for extension in (".jpg", ".png"):
+        cache_path = os.path.join(cache_dir, prefix + key[:16] + extension)
+        if os.path.exists(cache_path):
+            return cache_path, key
+    img = resize_logo(path, height)
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        cache_path = os.path.join(cache_dir, prefix + key[:16] + ".png")
+        params = {"format": "PNG"}
+    else:
+        cache_path = os.path.join(cache_dir, prefix + key[:16] + ".jpg")
+        img = img.convert("RGB")
+        params = {"format": "JPEG", "quality": THUMBNAIL_JPEG_QUALITY}
+    _remove_outdated_entries(cache_dir, prefix, cache_path)
+    save_image_atomically(img, cache_path, **params)
+    return cache_path, key
+
+
+def load_logo_atlas(paths: list, height: int, cache_dir: str = None) -> tuple:
+    """Return a single image (atlas) containing every logo at the given paths resized to the given height,
+    creating it on a cache miss, along with the position of every logo in it.
+
+    The logos are packed row by row into a roughly square atlas, encoded like load_thumbnail().
+    The atlas is identified by the cache keys of all the logos, so that adding, removing or
+    replacing any logo creates a new atlas (and removes the outdated one). Logos that cannot be
+    read are left out of the atlas, and no image is created if there is no logo left. The resized
+    logos are kept in a subdirectory of the cache directory, apart from the tierlist logo cache.
+
+    Args:
+        paths (list): The paths to the source logo images
+        height (int): The height of every logo in the atlas
+        cache_dir (str): Optional. The cache directory, ATLAS_CACHE_DIR by default
+
+    Returns:
+        tuple: (path to the atlas image or None, {logo path: [x, y, width, height]}, cache key of the atlas)
+    """
+    cache_dir = cache_dir or ATLAS_CACHE_DIR
+    key = hashlib.sha1("|".join(f"{path}:{logo_cache_key(path, height)}" for path in paths).encode("utf-8")).hexdigest()
+    prefix = f"atlas-{height}-"
+    map_path = os.path.join(cache_dir, prefix + key[:16] + ".json")
+    try:
+        with open(map_path, encoding="utf-8") as f:
+            atlas = json.load(f)
+        return os.path.join(cache_dir, atlas["image"]), atlas["logos"], key
+    except (OSError, ValueError, KeyError):
+        pass
+    logos = {}
+    logo_cache_dir = os.path.join(cache_dir, "logos")
+    for path in paths:
+        try:
+            # Read through the on-disk logo cache only, the logos are not needed in memory afterwards
+            logos[path] = _load_resized_logo_from_disk(path, height, logo_cache_key(path, height), logo_cache_dir)
+        except OSError:
+            pass
+    if not logos:
+        return None, {}, key
+    width = max([logo.size[0] for logo in logos.values()] +
+                [min(ATLAS_MAX_WIDTH, math.ceil(math.sqrt(sum(logo.size[0] for logo in logos.values()) * height)))])
+    positions, x, y = {}, 0, 0
+    for path, logo in logos.items():
+        if x + logo.size[0] > width:
+            x, y = 0, y + height
+        positions[path] = [x, y, logo.size[0], height]
+        x += logo.size[0]
+    transparent = any(logo.mode in ("RGBA", "LA", "PA") or "transparency" in logo.info for logo in logos.values())
+    atlas_img = Image.new("RGBA" if transparent else "RGB", (width, y + height), (0, 0, 0, 0))
+    for path, logo in logos.items():
+        atlas_img.paste(logo.convert(atlas_img.mode), tuple(positions[path][:2]))
+    image_path = os.path.join(cache_dir, prefix + key[:16] + (".png" if transparent else ".jpg"))
+    _remove_outdated_entries(cache_dir, prefix, image_path)
+    if transparent:
+        save_image_atomically(atlas_img, image_path)
+    else:
+        save_image_atomically(atlas_img, image_path, format="JPEG", quality=THUMBNAIL_JPEG_QUALITY)
+    # The map is written last, as it marks the atlas as complete
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"image": os.path.basename(image_path), "logos": positions}, f)
+    replace_file(tmp_path, map_path)
+    return image_path, positions, key
+
+
+def _remove_outdated_entries(cache_dir: str, prefix: str, cache_path: str) -> None:
+    """Remove the entries of the cache directory with the given prefix, except for the given entry"""
+    os.makedirs(cache_dir, exist_ok=True)
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and not name.endswith(".tmp") and name != os.path.basename(cache_path):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+def replace_file(tmp_path: str, path: str) -> None:
+    """Move a temporary file created by tempfile.mkstemp() to the given path.
+
+    mkstemp() creates files readable by their owner only, so the temporary file is first given the
+    mode of the file it replaces, or the default mode of new files if there is none.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+
+def save_image_atomically(img: Image.Image, path: str, **params) -> None:
+    """Save the image (as a PNG, unless other save parameters are given) to a temporary file,
+    then move it to the given path, so that concurrent readers never observe a partially written file."""
+    params.setdefault("format", "PNG")
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, **params)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_digest(path: str, known_digests: dict = None) -> str:
+    """Return the SHA-1 digest of the contents of the file at the given path.
+
+    Args:
+        path (str): The path to the file
+        known_digests (dict): Optional. Digests computed previously, of the form
+                              {path: [mtime_ns, size, digest]}. A known digest is reused if the
+                              file was not modified since, and new digests are added to it.
+
+    Returns:
+        str: The hex digest of the file contents
+    """
+    stat = os.stat(path)
+    if known_digests is not None:
+        known = known_digests.get(path)
+        if known is not None and known[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return known[2]
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha1").hexdigest()
+    if known_digests is not None:
+        known_digests[path] = [stat.st_mtime_ns, stat.st_size, digest]
+    return digest
+
+
+def load_manifest(path: str = None) -> dict:
+    """Load the manifest of the last tierlist build, or return an empty one if there is none."""
+    try:
+        with open(path or MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: dict, path: str = None) -> None:
+    """Save the manifest of the last tierlist build."""
+    path = path or MANIFEST_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
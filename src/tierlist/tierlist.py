@@ -1,9 +1,20 @@
 """A Python file with Tierlist configurations."""
+import functools
+import hashlib
+import json
+import math
 import os
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
 
+import PIL
+import helper_core
+import render_cache
 from PIL import Image, ImageDraw, ImageFont
-from helper import TIER_DICT, TIER_COLOUR_HEX_DICT, TIERLIST_IMAGE_NAME, TIERLIST_IMAGE_NAME_WITH_YEAR_TAG, TIERLIST_IMAGE_NAME_WITH_YEAR_FIRST_VISITED_TAG
+from helper_core import TIER_DICT, TIER_DICT_PATH, TIER_COLOUR_HEX_DICT, TIERLIST_IMAGE_NAME, TIERLIST_IMAGE_NAME_WITH_YEAR_TAG, TIERLIST_IMAGE_NAME_WITH_YEAR_FIRST_VISITED_TAG, \
+    create_missing_year_images
+from render_cache import load_resized_logo, logo_cache_key, file_digest, load_manifest, save_manifest
 
 DEFAULT_WIDTH = 200
 DEFAULT_GAP = 20
@@ -17,15 +28,15 @@ TAG_SMALL_SIZE_MULTIPLIER = 7  # Tag's height will be 1/7 of the logo's height
 DEBUG = False
 
 
-def evaluate_num_logos_per_row(min_val: int = 17, threshold: int = 10) -> int:
-    """Evaluate the ideal number of logos per row, such that
+def evaluate_num_logos_per_row(min_val: int = 17, threshold: int = 10, tier_dict: dict = None) -> int:
+    """Evaluate the ideal number of logos per row of the given tier dict (TIER_DICT by default), such that
     the ratio between the width and height is closest to the golden ratio."""
     if DEBUG:
         start = time.time()
     min_difference = 100
     num_logos_per_row = 0
     for i in range(min_val, min_val + threshold):
-        tier_num_rows = get_num_rows_per_tier(i)
+        tier_num_rows = get_num_rows_per_tier(i, tier_dict)
         total_width = DEFAULT_WIDTH * (i + 1) + GAPS_BETWEEN_RESTAURANTS * (i - 1) + \
                       DEFAULT_GAP * 3
         total_height = sum(tier_num_rows[tier] * DEFAULT_WIDTH + \
@@ -41,41 +52,74 @@ def evaluate_num_logos_per_row(min_val: int = 17, threshold: int = 10) -> int:
     return num_logos_per_row
 
 
-def get_num_rows_per_tier(num_rows: int) -> dict:
-    """Get the number of rows per tier, given the number of logos per row."""
+def get_num_rows_per_tier(num_rows: int, tier_dict: dict = None) -> dict:
+    """Get the number of rows per tier of the given tier dict (TIER_DICT by default),
+    given the number of logos per row."""
     if DEBUG:
         start = time.time()
+    if tier_dict is None:
+        tier_dict = TIER_DICT
     tier_num_rows = {}
-    for k in TIER_DICT:
-        if len(TIER_DICT[k]) % num_rows == 0:
-            tier_num_rows[k] = len(TIER_DICT[k]) // num_rows
+    for k in tier_dict:
+        if len(tier_dict[k]) % num_rows == 0:
+            tier_num_rows[k] = len(tier_dict[k]) // num_rows
         else:
-            tier_num_rows[k] = len(TIER_DICT[k]) // num_rows + 1
+            tier_num_rows[k] = len(tier_dict[k]) // num_rows + 1
     if DEBUG:
         end = time.time()
         print(f"Time taken for get_num_rows_per_tier({num_rows}): {end - start} seconds")
     return tier_num_rows
 
 
-NUM_LOGOS_PER_ROW = evaluate_num_logos_per_row()
-BACKGROUND_WIDTH = DEFAULT_WIDTH * NUM_LOGOS_PER_ROW + GAPS_BETWEEN_RESTAURANTS * (NUM_LOGOS_PER_ROW - 1)
+class TierlistLayout:
+    """A tier dict to render, with the layout computed from it.
+
+    The tier and tierlist builders below take a layout, TIERLIST_LAYOUT (tier_dict.json) by default,
+    so that other tier dicts (e.g. edited in the editor) can be rendered without changing any global.
+
+    Args:
+        tier_dict (dict): The tier dict to render
+    """
+
+    def __init__(self, tier_dict: dict):
+        self.tier_dict = tier_dict
+        self.num_logos_per_row = evaluate_num_logos_per_row(tier_dict=tier_dict)
+        self.background_width = DEFAULT_WIDTH * self.num_logos_per_row + \
+            GAPS_BETWEEN_RESTAURANTS * (self.num_logos_per_row - 1)
+        self.tier_num_rows = get_num_rows_per_tier(self.num_logos_per_row, tier_dict)
+
+    def tier_height(self, tier) -> int:
+        """Return the height of the images of a tier, which is at least one row even if the tier is empty"""
+        return max(DEFAULT_WIDTH, DEFAULT_WIDTH * self.tier_num_rows[tier] +
+                   GAPS_BETWEEN_RESTAURANTS * (self.tier_num_rows[tier] - 1))
+
+
+TIERLIST_LAYOUT = TierlistLayout(TIER_DICT)
+NUM_LOGOS_PER_ROW = TIERLIST_LAYOUT.num_logos_per_row
+BACKGROUND_WIDTH = TIERLIST_LAYOUT.background_width
 BACKGROUND_COLOUR = (26, 26, 26)
-TIER_NUM_ROWS = get_num_rows_per_tier(NUM_LOGOS_PER_ROW)
+TIER_NUM_ROWS = TIERLIST_LAYOUT.tier_num_rows
 
 
-def make_tier_indicator(tier):
+@functools.lru_cache(maxsize=None)
+def _load_tier_font() -> ImageFont.FreeTypeFont:
+    """Load the font of the tier indicators once, from the system fonts or the assets directory"""
+    try:
+        return ImageFont.truetype(DEFAULT_FONT, FONT_SIZE)
+    except OSError:
+        return ImageFont.truetype(DEFAULT_FONT_DIR, FONT_SIZE)
+
+
+def make_tier_indicator(tier, layout: TierlistLayout = None):
     """A tier indicator is a square of 100 x 100 pixels, with the text centered"""
     if DEBUG:
         start = time.time()
+    layout = layout or TIERLIST_LAYOUT
     color = TIER_COLOUR_HEX_DICT[tier]
-    image_width, image_height = DEFAULT_WIDTH, \
-        max(DEFAULT_WIDTH, DEFAULT_WIDTH * TIER_NUM_ROWS[tier] + GAPS_BETWEEN_RESTAURANTS * (TIER_NUM_ROWS[tier] - 1))
+    image_width, image_height = DEFAULT_WIDTH, layout.tier_height(tier)
     img = Image.new('RGB', (image_width, image_height), color)
     draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype(DEFAULT_FONT, FONT_SIZE)
-    except OSError:
-        font = ImageFont.truetype(DEFAULT_FONT_DIR, FONT_SIZE)
+    font = _load_tier_font()
     left, top, right, bottom = draw.textbbox((0, 0), tier, font=font)
     w, h = right - left, bottom - top
     draw.text(((image_width - w) / 2, (image_height - h) / 2 - 4), tier, font=font, fill=(0, 0, 0))
@@ -85,13 +129,13 @@ def make_tier_indicator(tier):
     return img
 
 
-def make_tier_background(tier):
+def make_tier_background(tier, layout: TierlistLayout = None):
     """A tier background is a rectangle which can be extended to the right
     color: (26, 26, 26))"""
     if DEBUG:
         start = time.time()
-    background_width, background_height = BACKGROUND_WIDTH, \
-        max(DEFAULT_WIDTH, DEFAULT_WIDTH * TIER_NUM_ROWS[tier] + GAPS_BETWEEN_RESTAURANTS * (TIER_NUM_ROWS[tier] - 1))
+    layout = layout or TIERLIST_LAYOUT
+    background_width, background_height = layout.background_width, layout.tier_height(tier)
     img = Image.new('RGB', (background_width, background_height), BACKGROUND_COLOUR)
     if DEBUG:
         end = time.time()
@@ -118,140 +162,443 @@ def _resize_tag_image(filepath: str, small: bool = False):
     return img
 
 TAGS_BASE_PATH = "assets/png/"
-def _make_tags_image_dict():
-    """Creates a tags image dictionary with the following attributes:
-    
-        - Price tags denoted by 1-4.png (never resized)
-        - Year tags denoted by 2022-...png (small size by default for alternative tierlist image)
+class _TagsImageDict(dict):
+    """A tags image dictionary which opens and resizes each tag the first time it is used,
+    with the following keys:
+
+        - Price tags denoted by 1-4.png (large size)
+        - Year tags denoted by 2022-...png, normal and highlighted (small size by default for
+          alternative tierlist image). Missing year tag images are generated on first use.
         - Vegan tag denoted by Vegan.png ("vegan_small" if year tags present, "vegan_large" otherwise)
+
+    Importing this file therefore loads no tag at all, and a plain tierlist never loads year tags.
     """
-    if DEBUG:
-        start = time.time()
-    tags_image_dict = {}
-    png_names = os.listdir(TAGS_BASE_PATH)
-    for name in png_names:
-        if name.endswith(".png"):
-            filepath, head = TAGS_BASE_PATH + name, name[:-4]
-            if head == "year_background" or head == "year_background_highlighted":
-                pass
-            elif head == "Vegan":
-                tags_image_dict["vegan_large"] = _resize_tag_image(filepath)
-                tags_image_dict["vegan_small"] = _resize_tag_image(filepath, small=True)
-            elif head in ("1", "2", "3", "4"):
-                # Price tag
-                tags_image_dict[head] = _resize_tag_image(filepath)
-            else:
-                # Year tag (normal and highlighted)
-                tags_image_dict[head] = _resize_tag_image(filepath, small=True)
-    if DEBUG:
-        end = time.time()
-        print(f"Time taken for _make_tags_image_dict(): {end - start} seconds")
-    return tags_image_dict
-TAGS_IMAGE_DICT = _make_tags_image_dict()
 
+    def __missing__(self, key: str):
+        if DEBUG:
+            start = time.time()
+        if key in ("vegan_large", "vegan_small"):
+            img = _resize_tag_image(TAGS_BASE_PATH + "Vegan.png", small=key == "vegan_small")
+        elif key in ("1", "2", "3", "4"):
+            # Price tag
+            img = _resize_tag_image(TAGS_BASE_PATH + key + ".png")
+        elif key.removesuffix("_highlighted").isdigit():
+            # Year tag (normal and highlighted)
+            create_missing_year_images([int(key.removesuffix("_highlighted"))])
+            img = _resize_tag_image(TAGS_BASE_PATH + key + ".png", small=True)
+        else:
+            raise KeyError(key)
+        self[key] = img
+        if DEBUG:
+            end = time.time()
+            print(f"Time taken for TAGS_IMAGE_DICT[{key}]: {end - start} seconds")
+        return img
+TAGS_IMAGE_DICT = _TagsImageDict()
 
-def make_tier_restaurants(tier, with_year_tag: bool = False, with_year_first_visited_tag: bool = False):
-    """Make a tier image"""
-    if DEBUG:
-        start = time.time()
-    tier_img = make_tier_background(tier)
-    restaurants = []
-    for restaurant_name in TIER_DICT[tier]:
-        restaurant_info = TIER_DICT[tier][restaurant_name]
-        restaurant_logo, price, is_vegan, is_year, is_year_first_visited = (restaurant_info["path_to_logo_image"],
-                                                     restaurant_info["price"],
-                                                     restaurant_info.get("vegan", False),
-                                                     restaurant_info["year"],
-                                                     restaurant_info["year_first_visited"])
+
+# Every combination of (with_year_tag, with_year_first_visited_tag) that makes up a tierlist image
+TIERLIST_VARIANTS = ((False, False), (True, False), (False, True))
+
+
+def _paste_price_tag(logo_img, restaurant_info):
+    """Paste the price tag on the top right corner of the logo, in place"""
+    price_img = TAGS_IMAGE_DICT[str(restaurant_info["price"])]
+    logo_img.paste(price_img, (logo_img.size[0] - price_img.size[0], 0), price_img)
+
+
+def _paste_vegan_tag(logo_img, restaurant_info, small: bool = False):
+    """Paste the vegan tag on the bottom right corner of the logo in place, if the restaurant is vegan.
+
+    The smaller vegan tag is used whenever a year tag is present."""
+    if not restaurant_info.get("vegan", False):
+        return
+    is_vegan_img = TAGS_IMAGE_DICT["vegan_small" if small else "vegan_large"]
+    logo_img.paste(is_vegan_img, (logo_img.size[0] - is_vegan_img.size[0],
+                                  logo_img.size[1] - is_vegan_img.size[1]),
+                   is_vegan_img)
+
+
+def _paste_year_tag(logo_img, restaurant_info, with_year_tag: bool = False, with_year_first_visited_tag: bool = False):
+    """Paste the year tag of the requested variant on the top left corner of the logo, in place"""
+    if with_year_tag:
+        is_year, is_year_first_visited = restaurant_info["year"], restaurant_info["year_first_visited"]
         highlighted = restaurant_info.get("highlighted", False)
-        # get the image of the restaurant
-        logo_img, price_img, is_year_img, is_year_first_visited_img = (Image.open(restaurant_logo),
-                                                                                     TAGS_IMAGE_DICT[str(price)],
-                                                                                     TAGS_IMAGE_DICT[str(is_year)],
-                                                                                     TAGS_IMAGE_DICT[str(is_year_first_visited)])
         # If the year is different from the year first visited, the place has been revisited
         # Highlight the year tag only when with_year_tag is True
-        if (highlighted or is_year != is_year_first_visited) and with_year_tag:
-            is_year_img = TAGS_IMAGE_DICT[str(is_year) + "_highlighted"]
-        # get the width and height of the restaurant's logo
-        width, height = logo_img.size
-        # resize the logo, preserving the aspect ratio, so that the height is 100 pixels
-        # TODO: resizing is expensive over hundreds of iterations, maybe store in db?
-        logo_img = logo_img.resize((int(width * DEFAULT_WIDTH / height), DEFAULT_WIDTH))
-        logo_img.paste(price_img, (logo_img.size[0] - price_img.size[0], 0), price_img)
-        if is_vegan:
-            is_vegan_img = TAGS_IMAGE_DICT["vegan_large"]
-            if with_year_tag or with_year_first_visited_tag:
-                # If either year tag is present, make the vegan tag smaller
-                is_vegan_img = TAGS_IMAGE_DICT["vegan_small"]
-            logo_img.paste(is_vegan_img, (logo_img.size[0] - is_vegan_img.size[0],
-                                          logo_img.size[1] - is_vegan_img.size[1]),
-                           is_vegan_img)
-
-        if with_year_tag:
-            logo_img.paste(is_year_img, (0, 0), is_year_img)
-        elif with_year_first_visited_tag:
-            logo_img.paste(is_year_first_visited_img, (0, 0), is_year_first_visited_img)
-
-        # append the logo to the list of restaurants
-        restaurants.append(logo_img)
-    # paste the restaurants into the tier image, with a gap between each
+        if highlighted or is_year != is_year_first_visited:
+            year_img = TAGS_IMAGE_DICT[str(is_year) + "_highlighted"]
+        else:
+            year_img = TAGS_IMAGE_DICT[str(is_year)]
+    elif with_year_first_visited_tag:
+        year_img = TAGS_IMAGE_DICT[str(restaurant_info["year_first_visited"])]
+    else:
+        return
+    logo_img.paste(year_img, (0, 0), year_img)
+
+
+def make_restaurant_logo(restaurant_info, with_year_tag: bool = False, with_year_first_visited_tag: bool = False):
+    """Make the logo of a restaurant, with its price, vegan and year tags"""
+    # The logo is resized (preserving the aspect ratio) so that the height is DEFAULT_WIDTH pixels,
+    # and read from the on-disk logo cache unless the logo file has changed since the last render
+    logo_img = load_resized_logo(restaurant_info["path_to_logo_image"], DEFAULT_WIDTH)
+    _paste_price_tag(logo_img, restaurant_info)
+    _paste_vegan_tag(logo_img, restaurant_info, small=with_year_tag or with_year_first_visited_tag)
+    _paste_year_tag(logo_img, restaurant_info, with_year_tag, with_year_first_visited_tag)
+    return logo_img
+
+
+def _arrange_tier_restaurants(tier, restaurants, layout: TierlistLayout):
+    """Paste the restaurant logos into the tier background, with a gap between each"""
+    tier_img = make_tier_background(tier, layout)
     x_offset, y_offset = 0, 0
     for restaurant_logo in restaurants:
         restaurant_width, restaurant_height = restaurant_logo.size
-        if x_offset + restaurant_width > BACKGROUND_WIDTH:
+        if x_offset + restaurant_width > layout.background_width:
             x_offset = 0
             y_offset += restaurant_height + GAPS_BETWEEN_RESTAURANTS
         tier_img.paste(restaurant_logo, (x_offset, y_offset))
         x_offset += restaurant_logo.size[0] + GAPS_BETWEEN_RESTAURANTS
-    if DEBUG:
-        end = time.time()
-        print(f"Time taken for make_tier_restaurants({tier}, {with_year_tag}, {with_year_first_visited_tag}): {end - start} seconds")
     return tier_img
 
 
-def make_one_complete_tier(tier, with_year_tag: bool = False, with_year_first_visited_tag: bool = False):
+def make_tier_restaurants(tier, with_year_tag: bool = False, with_year_first_visited_tag: bool = False,
+                          layout: TierlistLayout = None):
     """Make a tier image"""
     if DEBUG:
         start = time.time()
-    tier_indicator = make_tier_indicator(tier)
-    tier_restaurants = make_tier_restaurants(tier, with_year_tag=with_year_tag, with_year_first_visited_tag=with_year_first_visited_tag)
+    layout = layout or TIERLIST_LAYOUT
+    restaurants = [make_restaurant_logo(restaurant_info, with_year_tag=with_year_tag,
+                                        with_year_first_visited_tag=with_year_first_visited_tag)
+                   for restaurant_info in layout.tier_dict[tier].values()]
+    tier_img = _arrange_tier_restaurants(tier, restaurants, layout)
+    if DEBUG:
+        end = time.time()
+        print(f"Time taken for make_tier_restaurants({tier}, {with_year_tag}, {with_year_first_visited_tag}): {end - start} seconds")
+    return tier_img
+
+
+def _join_tier(tier, tier_indicator, tier_restaurants, layout: TierlistLayout):
+    """Place the tier indicator to the left of the tier restaurants"""
     tier_img = Image.new('RGB', (tier_indicator.size[0] + tier_restaurants.size[0] + DEFAULT_GAP,
-                                 max(DEFAULT_WIDTH, DEFAULT_WIDTH * TIER_NUM_ROWS[tier] +
-                                 GAPS_BETWEEN_RESTAURANTS * (TIER_NUM_ROWS[tier] - 1))), (0, 0, 0))
+                                 layout.tier_height(tier)), (0, 0, 0))
     tier_img.paste(tier_indicator, (0, 0))
     tier_img.paste(tier_restaurants, (tier_indicator.size[0] + DEFAULT_GAP, 0))
+    return tier_img
+
+
+def make_one_complete_tier(tier, with_year_tag: bool = False, with_year_first_visited_tag: bool = False,
+                           layout: TierlistLayout = None):
+    """Make a tier image"""
+    if DEBUG:
+        start = time.time()
+    layout = layout or TIERLIST_LAYOUT
+    tier_indicator = make_tier_indicator(tier, layout)
+    tier_restaurants = make_tier_restaurants(tier, with_year_tag=with_year_tag, with_year_first_visited_tag=with_year_first_visited_tag,
+                                             layout=layout)
+    tier_img = _join_tier(tier, tier_indicator, tier_restaurants, layout)
     if DEBUG:
         end = time.time()
         print(f"Time taken for make_one_complete_tier({tier}, {with_year_tag}, {with_year_first_visited_tag}): {end - start} seconds")
     return tier_img
 
 
-def make_tierlist(with_year_tag: bool = False, with_year_first_visited_tag: bool = False):
-    """Make a tierlist image, with margins equal to DEFAULT_GAP"""
+def make_tier_variants(tier, layout: TierlistLayout = None) -> tuple:
+    """Make the complete tier image of every variant in TIERLIST_VARIANTS, in the same order.
+
+    Each logo is loaded once and tagged with its price and vegan tags once per vegan tag size,
+    and the tier indicator is drawn once, so that only the year tags differ between variants.
+    """
     if DEBUG:
         start = time.time()
-    if with_year_tag and with_year_first_visited_tag:
-        # This function should not be called with both booleans set to True
-        raise ValueError('make_tierlist should not be called with both year tag booleans set to True')
-    # sum of num rows is the sum of TIER_NUM_ROWS values + number of tiers where the value is 0 (round to 1)
+    layout = layout or TIERLIST_LAYOUT
+    tier_indicator = make_tier_indicator(tier, layout)
+    restaurants = {variant: [] for variant in TIERLIST_VARIANTS}
+    for restaurant_info in layout.tier_dict[tier].values():
+        base_logo = load_resized_logo(restaurant_info["path_to_logo_image"], DEFAULT_WIDTH)
+        _paste_price_tag(base_logo, restaurant_info)
+        # Base logos with the large vegan tag (no year tag) and the small vegan tag (with a year tag)
+        bases = {False: base_logo.copy(), True: base_logo}
+        _paste_vegan_tag(bases[False], restaurant_info)
+        _paste_vegan_tag(bases[True], restaurant_info, small=True)
+        for with_year_tag, with_year_first_visited_tag in TIERLIST_VARIANTS:
+            logo_img = bases[with_year_tag or with_year_first_visited_tag].copy()
+            _paste_year_tag(logo_img, restaurant_info, with_year_tag, with_year_first_visited_tag)
+            restaurants[(with_year_tag, with_year_first_visited_tag)].append(logo_img)
+    tier_imgs = tuple(_join_tier(tier, tier_indicator, _arrange_tier_restaurants(tier, restaurants[variant], layout),
+                                 layout)
+                      for variant in TIERLIST_VARIANTS)
+    if DEBUG:
+        end = time.time()
+        print(f"Time taken for make_tier_variants({tier}): {end - start} seconds")
+    return tier_imgs
+
+
+def _assemble_tierlist(tier_imgs, layout: TierlistLayout):
+    """Stack the complete tier images into a tierlist image, with margins equal to DEFAULT_GAP"""
+    # sum of num rows is the sum of tier_num_rows values + number of tiers where the value is 0 (round to 1)
     # we round to 1 because we want the (empty) tier to still show up
-    sum_of_num_rows = sum(TIER_NUM_ROWS.values()) + len([tier for tier in TIER_NUM_ROWS if TIER_NUM_ROWS[tier] == 0])
-    image_width, image_height = DEFAULT_WIDTH + BACKGROUND_WIDTH + 3 * DEFAULT_GAP, \
+    tier_num_rows = layout.tier_num_rows
+    sum_of_num_rows = sum(tier_num_rows.values()) + len([tier for tier in tier_num_rows if tier_num_rows[tier] == 0])
+    image_width, image_height = DEFAULT_WIDTH + layout.background_width + 3 * DEFAULT_GAP, \
                                 sum_of_num_rows * DEFAULT_WIDTH + 8 * DEFAULT_GAP + \
                                 (sum_of_num_rows - 7) * GAPS_BETWEEN_RESTAURANTS
     tierlist = Image.new('RGB', (image_width, image_height), (0, 0, 0))
     y_offset = DEFAULT_GAP
-    for tier in TIER_DICT:
-        tier_img = make_one_complete_tier(tier, with_year_tag=with_year_tag, with_year_first_visited_tag=with_year_first_visited_tag)
+    for tier_img in tier_imgs:
         tierlist.paste(tier_img, (DEFAULT_GAP, y_offset))
         y_offset += tier_img.size[1] + DEFAULT_GAP
+    return tierlist
+
+
+def _make_complete_tiers_in_parallel(workers: int, layout: TierlistLayout, with_year_tag: bool = False,
+                                     with_year_first_visited_tag: bool = False) -> list:
+    """Make every complete tier image, tagging the restaurant logos across a pool of worker processes.
+
+    The logos of all tiers are split into evenly sized batches, so that big tiers (e.g. B) are shared
+    between workers instead of being rendered by a single one. The tier indicators and the final
+    composition are done in this process, in the same order as make_one_complete_tier().
+    """
+    tier_dict = layout.tier_dict
+    restaurant_infos = [restaurant_info for tier in tier_dict for restaurant_info in tier_dict[tier].values()]
+    make_logo = functools.partial(make_restaurant_logo, with_year_tag=with_year_tag,
+                                  with_year_first_visited_tag=with_year_first_visited_tag)
+    chunksize = max(1, math.ceil(len(restaurant_infos) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        logos = iter(executor.map(make_logo, restaurant_infos, chunksize=chunksize))
+        tier_imgs = []
+        for tier in tier_dict:
+            restaurants = [next(logos) for _ in tier_dict[tier]]
+            tier_imgs.append(_join_tier(tier, make_tier_indicator(tier, layout),
+                                        _arrange_tier_restaurants(tier, restaurants, layout), layout))
+    return tier_imgs
+
+
+def make_tierlist(with_year_tag: bool = False, with_year_first_visited_tag: bool = False, workers: int = None,
+                  layout: TierlistLayout = None):
+    """Make a tierlist image of the given layout (TIERLIST_LAYOUT by default), with margins equal to DEFAULT_GAP
+
+    If workers is greater than 1, the restaurant logos are rendered across a pool of that many
+    processes. The resulting image is identical to the sequential one.
+    """
+    if DEBUG:
+        start = time.time()
+    layout = layout or TIERLIST_LAYOUT
+    if with_year_tag and with_year_first_visited_tag:
+        # This function should not be called with both booleans set to True
+        raise ValueError('make_tierlist should not be called with both year tag booleans set to True')
+    if workers is not None and workers > 1:
+        tier_imgs = _make_complete_tiers_in_parallel(workers, layout, with_year_tag=with_year_tag,
+                                                     with_year_first_visited_tag=with_year_first_visited_tag)
+    else:
+        tier_imgs = (make_one_complete_tier(tier, with_year_tag=with_year_tag,
+                                            with_year_first_visited_tag=with_year_first_visited_tag, layout=layout)
+                     for tier in layout.tier_dict)
+    tierlist = _assemble_tierlist(tier_imgs, layout)
     if DEBUG:
         end = time.time()
-        print(f"Time taken for make_tierlist({with_year_tag}, {with_year_first_visited_tag}): {end - start} seconds")
+        print(f"Time taken for make_tierlist({with_year_tag}, {with_year_first_visited_tag}, {workers}): {end - start} seconds")
     return tierlist
 
 
+def make_tierlist_variants(layout: TierlistLayout = None) -> tuple:
+    """Make the tierlist image of every variant in TIERLIST_VARIANTS in a single pass, in the same order.
+
+    This is equivalent to calling make_tierlist() once per variant, but every logo is loaded
+    and tagged with its price and vegan tags only once.
+
+    Args:
+        layout (TierlistLayout): Optional. The tier dict to render and its layout, TIERLIST_LAYOUT by default
+
+    Returns:
+        tuple: (tierlist, tierlist with year tags, tierlist with year first visited tags)
+    """
+    if DEBUG:
+        start = time.time()
+    layout = layout or TIERLIST_LAYOUT
+    tier_variants = [make_tier_variants(tier, layout) for tier in layout.tier_dict]
+    tierlists = tuple(_assemble_tierlist((tier_imgs[i] for tier_imgs in tier_variants), layout)
+                      for i in range(len(TIERLIST_VARIANTS)))
+    if DEBUG:
+        end = time.time()
+        print(f"Time taken for make_tierlist_variants(): {end - start} seconds")
+    return tierlists
+
+
+def _tag_asset_paths() -> list:
+    """Return the paths of every tag asset (price, vegan and year tags, and the year tag backgrounds)"""
+    return sorted(TAGS_BASE_PATH + name for name in os.listdir(TAGS_BASE_PATH) if name.endswith(".png"))
+
+
+def _create_missing_year_tags(tier_dict: dict) -> None:
+    """Generate the missing year tags of the given tier dict before rendering it.
+
+    They are otherwise generated during the render, which would change the tag assets that the
+    render inputs were computed from.
+    """
+    create_missing_year_images(sorted({restaurant_info[field] for tier in tier_dict
+                                       for restaurant_info in tier_dict[tier].values()
+                                       for field in ("year", "year_first_visited")}))
+
+
+def _tier_signature(tier, layout: TierlistLayout, tag_digests: tuple) -> tuple:
+    """Return everything the complete tier images of a tier depend on.
+
+    The logo cache keys and the tag asset digests are included so that a replaced logo or tag file
+    also invalidates the tier.
+    """
+    return (json.dumps(layout.tier_dict[tier]), layout.tier_num_rows[tier], layout.background_width,
+            tuple(logo_cache_key(restaurant_info["path_to_logo_image"], DEFAULT_WIDTH)
+                  for restaurant_info in layout.tier_dict[tier].values()),
+            tag_digests)
+
+
+class IncrementalRenderer:
+    """Renders every tierlist variant, redrawing only the tiers that changed since the last render.
+
+    The complete tier images (strips) of every variant are kept in memory together with the
+    signature of the tier they were rendered from. On each render, the tier dict is compared
+    against those signatures: only tiers whose restaurants, logos or number of rows changed are
+    redrawn, and the tierlist canvas is always reassembled, so that its height follows the number
+    of rows of every tier. If the number of logos per row or a tag asset changes, every tier is redrawn.
+
+    Attributes:
+        rendered_tiers (list): The tiers that were redrawn by the last call to render()
+    """
+
+    def __init__(self):
+        self._strips = {}
+        self._tag_digests = None
+        # Digests of the tag assets, see render_cache.file_digest()
+        self._known_tag_digests = {}
+        self.rendered_tiers = []
+
+    def _check_tag_assets(self, tier_dict: dict) -> tuple:
+        """Return the digests of the tag assets, and forget the resized tags if any of them changed."""
+        _create_missing_year_tags(tier_dict)
+        tag_digests = tuple(file_digest(path, self._known_tag_digests) for path in _tag_asset_paths())
+        if self._tag_digests is not None and tag_digests != self._tag_digests:
+            TAGS_IMAGE_DICT.clear()
+        self._tag_digests = tag_digests
+        return tag_digests
+
+    def render(self, tier_dict: dict = None, progress=None) -> tuple:
+        """Render every variant of the given tier dict, in the same order as make_tierlist_variants().
+
+        Args:
+            tier_dict (dict): Optional. The tier dict to render. By default, tier_dict.json is re-read.
+            progress (callable): Optional. Called with the name of each tier once its images are ready
+
+        Returns:
+            tuple: (tierlist, tierlist with year tags, tierlist with year first visited tags)
+        """
+        if DEBUG:
+            start = time.time()
+        if tier_dict is None:
+            with open(TIER_DICT_PATH, encoding="utf-8") as f:
+                tier_dict = json.load(f)
+        layout = TierlistLayout(tier_dict)
+        tag_digests = self._check_tag_assets(tier_dict)
+        self.rendered_tiers = []
+        strips = {}
+        for tier in tier_dict:
+            signature = _tier_signature(tier, layout, tag_digests)
+            cached = self._strips.get(tier)
+            if cached is None or cached[0] != signature:
+                cached = (signature, make_tier_variants(tier, layout))
+                self.rendered_tiers.append(tier)
+            strips[tier] = cached
+            if progress is not None:
+                progress(tier)
+        self._strips = strips
+        tierlists = tuple(_assemble_tierlist((strips[tier][1][i] for tier in tier_dict), layout)
+                          for i in range(len(TIERLIST_VARIANTS)))
+        if DEBUG:
+            end = time.time()
+            print(f"Time taken for IncrementalRenderer.render() of tiers {self.rendered_tiers}: {end - start} seconds")
+        return tierlists
+
+
+TIERLIST_IMAGE_NAMES = (TIERLIST_IMAGE_NAME, TIERLIST_IMAGE_NAME_WITH_YEAR_TAG, TIERLIST_IMAGE_NAME_WITH_YEAR_FIRST_VISITED_TAG)
+
+
+def compute_render_inputs_digest(known_digests: dict = None, layout: TierlistLayout = None) -> str:
+    """Return a digest of every input that the tierlist images depend on.
+
+    This includes the tier dict, the contents of every logo in it, the tag assets and fonts,
+    the layout constants, and the rendering code itself (along with the Pillow version).
+
+    Args:
+        known_digests (dict): Optional. File digests from a previous build, see render_cache.file_digest().
+                              Digests of files that are no longer render inputs (e.g. removed logos) are dropped.
+        layout (TierlistLayout): Optional. The tier dict to render and its layout, TIERLIST_LAYOUT by default
+
+    Returns:
+        str: The hex digest of all render inputs
+    """
+    layout = layout or TIERLIST_LAYOUT
+    tier_dict = layout.tier_dict
+    files = [restaurant_info["path_to_logo_image"] for tier in tier_dict for restaurant_info in tier_dict[tier].values()]
+    files += _tag_asset_paths()
+    files += [DEFAULT_FONT_DIR, os.path.abspath(__file__), os.path.abspath(render_cache.__file__),
+              os.path.abspath(helper_core.__file__)]
+    digests = {path: file_digest(path, known_digests) for path in files}
+    if known_digests is not None:
+        for path in set(known_digests) - set(digests):
+            del known_digests[path]
+    inputs = {
+        "tier_dict": tier_dict,
+        "files": digests,
+        "layout": [DEFAULT_WIDTH, DEFAULT_GAP, DEFAULT_FONT, FONT_SIZE, GAPS_BETWEEN_RESTAURANTS,
+                   TAG_LARGE_SIZE_MULTIPLIER, TAG_SMALL_SIZE_MULTIPLIER, layout.num_logos_per_row,
+                   BACKGROUND_COLOUR, TIER_COLOUR_HEX_DICT],
+        "pillow": PIL.__version__,
+    }
+    return hashlib.sha1(json.dumps(inputs).encode("utf-8")).hexdigest()
+
+
+def build_tierlists(force: bool = False, image_names: tuple = TIERLIST_IMAGE_NAMES, manifest_path: str = None,
+                    renderer: IncrementalRenderer = None, progress=None, tier_dict: dict = None) -> bool:
+    """Render and save every tierlist variant, unless nothing changed since the last build.
+
+    The last build is recorded in a manifest holding the digest of all render inputs and the
+    digests of the saved images. Rendering is skipped if the render inputs are unchanged and
+    the saved images still match the manifest.
+
+    Args:
+        force (bool): Render even if nothing changed since the last build
+        image_names (tuple): The paths to save the images to, in the same order as TIERLIST_VARIANTS
+        manifest_path (str): Optional. The path to the manifest, render_cache.MANIFEST_PATH by default
+        renderer (IncrementalRenderer): Optional. A long-lived renderer to render the current tier dict
+                                        with, so that only the tiers changed since its last render are redrawn
+        progress (callable): Optional. Called with the name of each tier once rendered (only when a renderer
+                             is given), then with the path of each image once saved
+        tier_dict (dict): Optional. The tier dict to render, TIER_DICT (tier_dict.json when imported) by default
+
+    Returns:
+        bool: True if the images were rendered, False if the last build was up to date
+    """
+    layout = TIERLIST_LAYOUT if tier_dict is None else TierlistLayout(tier_dict)
+    _create_missing_year_tags(layout.tier_dict)
+    manifest = load_manifest(manifest_path)
+    known_digests = manifest.get("files", {})
+    inputs_digest = compute_render_inputs_digest(known_digests, layout)
+    outputs = manifest.get("outputs", {})
+    if not force and manifest.get("inputs") == inputs_digest and \
+            all(name in outputs and os.path.exists(name) and file_digest(name) == outputs[name] for name in image_names):
+        return False
+    tierlists = renderer.render(layout.tier_dict, progress) if renderer is not None else make_tierlist_variants(layout)
+    for name, tierlist in zip(image_names, tierlists):
+        tierlist.save(name)
+        if progress is not None:
+            progress(name)
+    save_manifest({
+        "inputs": inputs_digest,
+        "outputs": {name: file_digest(name) for name in image_names},
+        "files": known_digests,
+    }, manifest_path)
+    return True
+
+
 if __name__ == "__main__":
     print("Number of logos per row: {}".format(NUM_LOGOS_PER_ROW))
     print("""
@@ -261,12 +608,11 @@ if __name__ == "__main__":
         "year": 2025,
         "highlighted": true
     """)
-    tierlist = make_tierlist()
-    tierlist.save(TIERLIST_IMAGE_NAME)
-    tierlist_with_year_tag = make_tierlist(with_year_tag=True)
-    tierlist_with_year_tag.save(TIERLIST_IMAGE_NAME_WITH_YEAR_TAG)
-    tierlist_with_year_first_visited_tag = make_tierlist(with_year_first_visited_tag=True)
-    tierlist_with_year_first_visited_tag.save(TIERLIST_IMAGE_NAME_WITH_YEAR_FIRST_VISITED_TAG)
+    # Pass --force to render the images even if none of their inputs changed since the last build
+    if build_tierlists(force="--force" in sys.argv):
+        print("Tierlist images saved to {}".format(os.path.dirname(TIERLIST_IMAGE_NAME)))
+    else:
+        print("Tierlist images are up to date, nothing to render (use --force to render anyway)")
     if DEBUG:
         import cProfile
         import pstats
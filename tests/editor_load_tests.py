@@ -0,0 +1,150 @@
+"""
+Load tests comparing editor_server.py (a thread per connection) with async_editor_server.py (asyncio).
+
+Each server runs in its own process, and is sent the requests an editor makes on load (the tier dict,
+the logo list, the editor files and the logo atlas) over many concurrent keep-alive connections.
+Requests per second and latencies are printed for both servers, and the asyncio server must be
+at least as fast as the threaded one (within THROUGHPUT_TOLERANCE).
+
+Run with:
+    pytest -s tests/editor_load_tests.py
+or, to choose the load:
+    python tests/editor_load_tests.py [connections] [requests per connection]
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, '..'))
+
+CONNECTIONS = 50
+REQUESTS_PER_CONNECTION = 40
+# The asyncio server may be this much slower than the threaded one before the comparison fails,
+# as both servers share the machine with the load generator
+THROUGHPUT_TOLERANCE = 0.9
+REQUEST_PATHS = ["/api/data", "/api/logos", "/editor.js", "/editor.css", "/api/atlas?h=100"]
+
+# Started in a subprocess, prints the port the server listens on
+SERVER_SCRIPTS = {
+    "threaded": (
+        "import socketserver, sys\n"
+        "from editor_server import EditorHandler, ThreadedTCPServer\n"
+        "socketserver.TCPServer.allow_reuse_address = True\n"
+        "EditorHandler.log_message = lambda *args: None\n"
+        "server = ThreadedTCPServer(('127.0.0.1', 0), EditorHandler)\n"
+        "print(server.server_address[1], flush=True)\n"
+        "server.serve_forever()\n"
+    ),
+    "asyncio": (
+        "import asyncio\n"
+        "from async_editor_server import AsyncEditorServer\n"
+        "async def main():\n"
+        "    server = AsyncEditorServer(host='127.0.0.1', port=0)\n"
+        "    await server.start()\n"
+        "    print(server.server_address[1], flush=True)\n"
+        "    await server.serve_forever()\n"
+        "asyncio.run(main())\n"
+    ),
+}
+
+
+def start_server(kind: str) -> tuple:
+    """Start the given kind of editor server in a subprocess, and return (process, port)."""
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT_DIR, "src", "editor"))
+    process = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPTS[kind]], cwd=ROOT_DIR, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return process, int(process.stdout.readline())
+
+
+async def _request(reader, writer, path: str) -> int:
+    """Send a GET request on a keep-alive connection, read the whole response and return its status."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("iso-8859-1")
+    headers = {}
+    for line in head.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return int(head.split()[1])
+
+
+async def _run_client(port: int, requests: int, latencies: list, statuses: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for i in range(requests):
+            start = time.perf_counter()
+            statuses.append(await _request(reader, writer, REQUEST_PATHS[i % len(REQUEST_PATHS)]))
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _run_load(port: int, connections: int, requests: int) -> dict:
+    latencies, statuses = [], []
+    # Warm up the server caches (tier dict, atlas) before measuring
+    await _run_client(port, len(REQUEST_PATHS), [], [])
+    start = time.perf_counter()
+    await asyncio.gather(*(_run_client(port, requests, latencies, statuses) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(statuses),
+        "errors": sum(status != 200 for status in statuses),
+        "requests_per_second": len(statuses) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def run_load_test(kind: str, connections: int = CONNECTIONS, requests: int = REQUESTS_PER_CONNECTION) -> dict:
+    """Start the given kind of editor server, load it, and return the measurements."""
+    process, port = start_server(kind)
+    try:
+        return asyncio.run(_run_load(port, connections, requests))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def print_results(results: dict):
+    print(f"\n{'server':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for kind, result in results.items():
+        print(f"{kind:<10}{result['requests']:>10}{result['errors']:>8}{result['requests_per_second']:>10.0f}"
+              f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+
+
+class TestEditorServerLoad(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = {kind: run_load_test(kind) for kind in SERVER_SCRIPTS}
+        print_results(cls.results)
+
+    def test_threaded_server_answers_every_request(self):
+        result = self.results["threaded"]
+        self.assertEqual(result["requests"], CONNECTIONS * REQUESTS_PER_CONNECTION)
+        self.assertEqual(result["errors"], 0)
+
+    def test_async_server_answers_every_request(self):
+        result = self.results["asyncio"]
+        self.assertEqual(result["requests"], CONNECTIONS * REQUESTS_PER_CONNECTION)
+        self.assertEqual(result["errors"], 0)
+
+    def test_async_server_is_not_slower(self):
+        threaded, asyncio_ = self.results["threaded"], self.results["asyncio"]
+        # Either a throughput at least that of the threaded server, or a tail latency no worse, with some tolerance
+        if asyncio_["requests_per_second"] < threaded["requests_per_second"] * THROUGHPUT_TOLERANCE and \
+                asyncio_["p99_ms"] > threaded["p99_ms"] / THROUGHPUT_TOLERANCE:
+            print_results(self.results)
+            self.fail("The asyncio server is slower than the threaded server")
+
+
+if __name__ == "__main__":
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else CONNECTIONS
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else REQUESTS_PER_CONNECTION
+    print_results({kind: run_load_test(kind, connections, requests) for kind in SERVER_SCRIPTS})
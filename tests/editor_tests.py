@@ -5,9 +5,15 @@ Thorough test suite for the editor component of the tier list application.
 
 Covers:
   - editor_server.py API endpoints (GET /api/data, GET /api/logos,
-    POST /api/update, POST /api/rename_logo, POST /api/run_tierlist)
+    POST /api/update, POST /api/rename_logo, POST /api/run_tierlist,
+    POST /api/render, GET /api/render/<id>, GET /api/render/<id>/events,
+    GET /api/history, POST /api/rollback, PATCH /api/data, GET /api/thumb/<name>,
+    GET /api/atlas, GET /api/atlas/<image>)
+  - LogoIndex, the logo list with change notifications behind GET /api/logos
+  - async_editor_server.py, against the same API and static file tests, plus keep-alive
+  - RenderEngine and RenderJobQueue, the in-process background tierlist renderer
   - evaluate_num_logos_per_row and get_num_rows_per_tier server-side utilities
-  - Static file serving (editor.html, editor.css, editor.js)
+  - Static file serving (editor.html, editor.css, editor.js), content-hashed and precompressed
   - editor.html structural integrity (required IDs / elements present)
   - editor.css required rules present
   - editor.js required function/variable names present
@@ -20,30 +26,45 @@ Run with:
     pytest editor_tests.py
 """
 
+import copy
+import gzip
 import http.server
+import io
 import json
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'editor')))
 import re
 import shutil
+import socket
 import socketserver
 import tempfile
 import threading
 import time
 import unittest
+import urllib.parse
 import urllib.request
 import urllib.error
 from http.client import HTTPConnection
 
+from PIL import Image
+
 # ---------------------------------------------------------------------------
 # Import server-side helpers directly for unit tests (no network needed)
 # ---------------------------------------------------------------------------
-from editor_server import (
-    EditorHandler,
+from editor_server import EditorHandler, ThreadedTCPServer
+from async_editor_server import AsyncEditorServer
+from editor_api import (
+    EditorAssets,
+    LogoIndex,
+    RenderEngine,
+    RenderJobQueue,
+    StaleWriteError,
+    TierDictStore,
+    brotli,
     evaluate_num_logos_per_row,
     get_num_rows_per_tier,
-    ThreadedTCPServer,
+    negotiate_encoding,
 )
 
 # ---------------------------------------------------------------------------
@@ -72,14 +93,20 @@ def _load_tier_dict():
 class _ServerFixture(unittest.TestCase):
     """Base class that spins up a live EditorHandler server for integration tests."""
 
-    server: ThreadedTCPServer
+    server: ThreadedTCPServer | AsyncEditorServer
     server_thread: threading.Thread
     port: int
+    # Whether to test async_editor_server.py instead of editor_server.py, with the same API routes
+    async_server = False
 
     @classmethod
     def setUpClass(cls):
         # Change cwd so the server can find tier_dict.json and logos/
         os.chdir(ROOT_DIR)
+        if cls.async_server:
+            cls.server = AsyncEditorServer(EditorHandler.app, "127.0.0.1", 0)
+            cls.port = cls.server.start_in_thread()[1]
+            return
         socketserver.TCPServer.allow_reuse_address = True
         cls.server = ThreadedTCPServer(("127.0.0.1", 0), EditorHandler)
         cls.port = cls.server.server_address[1]
@@ -89,7 +116,8 @@ class _ServerFixture(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         cls.server.shutdown()
-        cls.server_thread.join(timeout=5)
+        if not cls.async_server:
+            cls.server_thread.join(timeout=5)
 
     # ---- convenience helpers ----
 
@@ -190,7 +218,7 @@ class TestEvaluateNumLogosPerRow(unittest.TestCase):
     def test_golden_ratio_direction(self):
         """The chosen value should produce a width/height ratio closer to 1.618
         than the neighbours."""
-        from editor_server import DEFAULT_WIDTH, DEFAULT_GAP, GAPS_BETWEEN_RESTAURANTS
+        from editor_api import DEFAULT_WIDTH, DEFAULT_GAP, GAPS_BETWEEN_RESTAURANTS
         d = self._make_dict({t: 30 for t in "SABCDEF"})
         chosen = evaluate_num_logos_per_row(d)
 
@@ -274,6 +302,31 @@ class TestApiData(_ServerFixture):
         resp, _ = self._get("/api/data")
         self.assertEqual(resp.getheader("Access-Control-Allow-Origin"), "*")
 
+    def test_etag_header_present(self):
+        resp, _ = self._get("/api/data")
+        self.assertTrue(resp.getheader("ETag", ""))
+
+    def test_matching_etag_returns_304(self):
+        resp, _ = self._get("/api/data")
+        etag = resp.getheader("ETag")
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/api/data", headers={"If-None-Match": etag})
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        self.assertEqual(resp.status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(resp.getheader("ETag"), etag)
+
+    def test_stale_etag_returns_200(self):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/api/data", headers={"If-None-Match": '"stale"'})
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        self.assertEqual(resp.status, 200)
+        self.assertIn("tier_dict", self._json(body))
+
     def test_logo_paths_use_logos_prefix(self):
         _, body = self._get("/api/data")
         tier_dict = self._json(body)["tier_dict"]
@@ -338,6 +391,234 @@ class TestApiLogos(_ServerFixture):
         resp, _ = self._get("/api/logos")
         self.assertEqual(resp.getheader("Access-Control-Allow-Origin"), "*")
 
+    def test_details_describe_every_logo(self):
+        _, body = self._get("/api/logos")
+        data = self._json(body)
+        self.assertIsInstance(data["version"], int)
+        self.assertEqual(sorted(data["details"]), data["logos"])
+        for name, logo in data["details"].items():
+            self.assertEqual(logo["name"], name)
+            self.assertEqual(logo["size"], os.path.getsize(os.path.join(LOGOS_DIR, name)))
+            for key in ("mtime_ns", "width", "height", "digest"):
+                self.assertIn(key, logo)
+
+    def test_etag_returns_304(self):
+        resp, _ = self._get("/api/logos")
+        etag = resp.getheader("ETag")
+        self.assertIsNotNone(etag)
+        self.assertIn("no-cache", resp.getheader("Cache-Control", ""))
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/api/logos", headers={"If-None-Match": etag})
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        self.assertEqual(resp.status, 304)
+
+    def test_no_changes_since_current_version(self):
+        version = self._json(self._get("/api/logos")[1])["version"]
+        data = self._json(self._get(f"/api/logos?since={version}")[1])
+        self.assertEqual(data, {"version": version, "changes": []})
+
+    def test_unknown_version_returns_full_listing(self):
+        data = self._json(self._get("/api/logos?since=1")[1])
+        self.assertTrue(data["reset"])
+        self.assertIn("logos", data)
+
+    def test_invalid_version_returns_400(self):
+        resp, _ = self._get("/api/logos?since=abc")
+        self.assertEqual(resp.status, 400)
+
+
+class TestTierDictStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tier_dict.json")
+        self.tier_dict = _load_tier_dict()
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.tier_dict, f, indent=4)
+        self.store = TierDictStore(self.path, history_dir=os.path.join(self.tmp_dir, "history"), history_limit=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_body_matches_file(self):
+        body, _ = self.store.get()
+        data = json.loads(body)
+        self.assertEqual(data["tier_dict"], self.tier_dict)
+        self.assertEqual(data["num_logos_per_row"], evaluate_num_logos_per_row(self.tier_dict))
+
+    def test_unchanged_file_is_not_read_again(self):
+        body, etag = self.store.get()
+        self.assertIs(self.store.get()[0], body)
+        self.assertEqual(self.store.get()[1], etag)
+
+    def test_edited_file_is_read_again(self):
+        _, etag = self.store.get()
+        edited = {tier: {} for tier in self.tier_dict}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(edited, f)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        body, new_etag = self.store.get()
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(json.loads(body)["tier_dict"], edited)
+
+    def test_write_keeps_file_mode(self):
+        os.chmod(self.path, 0o644)
+        self.store.write({tier: {} for tier in self.tier_dict})
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+        version = self.store.history()[0]["id"]
+        history_path = os.path.join(self.tmp_dir, "history", f"{version}.json")
+        self.assertEqual(os.stat(history_path).st_mode & 0o777, 0o644)
+        self.store.rollback(version)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+    def test_write_updates_file_and_cache(self):
+        _, etag = self.store.get()
+        edited = {tier: {} for tier in self.tier_dict}
+        self.store.write(edited)
+        body, new_etag = self.store.get()
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(json.loads(body)["tier_dict"], edited)
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), edited)
+
+    def test_write_keeps_standard_formatting(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            original = f.read()
+        self.store.write(json.loads(original))
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), original)
+
+    def test_write_leaves_no_temporary_file(self):
+        self.store.write(self.tier_dict)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["history", "tier_dict.json"])
+
+    def test_failed_write_keeps_previous_file(self):
+        with self.assertRaises(TypeError):
+            self.store.write({"S": {"not serializable": object()}})
+        self.assertEqual(_load_tier_dict(), self.tier_dict)
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), self.tier_dict)
+        self.assertFalse([name for name in os.listdir(self.tmp_dir) if name.endswith(".tmp")])
+        self.assertEqual(self.store.history(), [])
+
+    def test_write_with_current_etag_succeeds(self):
+        _, etag = self.store.get()
+        new_etag = self.store.write({tier: {} for tier in self.tier_dict}, if_match=etag)
+        self.assertEqual(self.store.get()[1], new_etag)
+
+    def test_write_with_stale_etag_is_rejected(self):
+        _, etag = self.store.get()
+        current = self.store.write({tier: {} for tier in self.tier_dict})
+        with self.assertRaises(StaleWriteError) as cm:
+            self.store.write(self.tier_dict, if_match=etag)
+        self.assertEqual(cm.exception.etag, current)
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {tier: {} for tier in self.tier_dict})
+
+    def test_history_is_bounded_and_newest_first(self):
+        for i in range(5):
+            self.store.write({"S": {"restaurant": {"version": i}}})
+        history = self.store.history()
+        self.assertEqual(len(history), 3)
+        self.assertEqual([int(version["id"]) for version in history],
+                         sorted((int(version["id"]) for version in history), reverse=True))
+
+    def test_rollback_restores_previous_version(self):
+        self.store.write({tier: {} for tier in self.tier_dict})
+        previous = self.store.history()[0]["id"]
+        self.store.rollback(previous)
+        self.assertEqual(json.loads(self.store.get()[0])["tier_dict"], self.tier_dict)
+        # The rolled back version is kept in the history too
+        with open(os.path.join(self.tmp_dir, "history", self.store.history()[0]["id"] + ".json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {tier: {} for tier in self.tier_dict})
+
+    def _first_restaurant(self, tier):
+        return next(iter(self.tier_dict[tier]))
+
+    def _assert_saved(self, expected):
+        """The file, and the cached /api/data body, must be exactly what a full save would produce."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), json.dumps(expected, indent=4))
+        self.assertEqual(self.store.get()[0], json.dumps({
+            "tier_dict": expected,
+            "num_logos_per_row": evaluate_num_logos_per_row(expected),
+        }).encode("utf-8"))
+
+    def test_patch_move_to_index(self):
+        name = self._first_restaurant("B")
+        self.store.patch([{"op": "move", "name": name, "tier": "A", "index": 1}])
+        expected = copy.deepcopy(self.tier_dict)
+        info = expected["B"].pop(name)
+        items = list(expected["A"].items())
+        items.insert(1, (name, info))
+        expected["A"] = dict(items)
+        self._assert_saved(expected)
+
+    def test_patch_move_within_tier(self):
+        name = self._first_restaurant("B")
+        self.store.patch([{"op": "move", "name": name, "tier": "B"}])
+        expected = copy.deepcopy(self.tier_dict)
+        expected["B"][name] = expected["B"].pop(name)
+        self._assert_saved(expected)
+
+    def test_patch_update_sets_and_removes_fields(self):
+        name = self._first_restaurant("A")
+        self.store.patch([{"op": "update", "name": name, "fields": {"year": 2030, "price": None}}])
+        expected = copy.deepcopy(self.tier_dict)
+        expected["A"][name]["year"] = 2030
+        expected["A"][name].pop("price", None)
+        self._assert_saved(expected)
+
+    def test_patch_rename_keeps_position(self):
+        name = self._first_restaurant("C")
+        self.store.patch([{"op": "rename", "name": name, "new_name": "Renamed"}])
+        expected = copy.deepcopy(self.tier_dict)
+        expected["C"] = {"Renamed" if key == name else key: info for key, info in expected["C"].items()}
+        self._assert_saved(expected)
+
+    def test_patch_create_and_delete(self):
+        info = {"path_to_logo_image": "logos/New.png", "year": 2026, "year_first_visited": 2026}
+        self.store.patch([{"op": "create", "name": "New", "tier": "S", "index": 0, "info": info}])
+        expected = copy.deepcopy(self.tier_dict)
+        expected["S"] = {"New": info, **expected["S"]}
+        self._assert_saved(expected)
+        self.store.patch([{"op": "delete", "name": "New"}])
+        self._assert_saved(self.tier_dict)
+
+    def test_invalid_patch_changes_nothing(self):
+        name = self._first_restaurant("A")
+        _, etag = self.store.get()
+        for ops in ([{"op": "move", "name": name, "tier": "A", "index": 0}, {"op": "delete", "name": "Unknown"}],
+                    [{"op": "move", "name": name, "tier": "Z"}],
+                    [{"op": "rename", "name": name, "new_name": self._first_restaurant("B")}],
+                    [{"op": "create", "name": name, "tier": "A", "info": {}}],
+                    [{"op": "explode", "name": name}],
+                    [{"op": "move", "name": name, "tier": "A", "index": [1]}],
+                    [{"op": "move", "name": name, "tier": "A", "index": "1"}],
+                    [{"op": "move", "name": name, "tier": ["A"]}],
+                    [{"op": "create", "name": "New", "tier": {"A": 1}, "info": {}}],
+                    [{"op": "update", "name": name, "fields": [1]}],
+                    [{"op": "update", "name": name}],
+                    "not a list"):
+            with self.assertRaises(ValueError):
+                self.store.patch(ops)
+        self.assertEqual(self.store.get()[1], etag)
+        self._assert_saved(self.tier_dict)
+
+    def test_patch_with_stale_etag_is_rejected(self):
+        _, etag = self.store.get()
+        self.store.write({tier: {} for tier in self.tier_dict})
+        with self.assertRaises(StaleWriteError):
+            self.store.patch([], if_match=etag)
+
+    def test_rollback_to_unknown_version_raises(self):
+        for version in ("123", "../tier_dict"):
+            with self.assertRaises(KeyError):
+                self.store.rollback(version)
+
 
 # ===========================================================================
 # 4. API: POST /api/update
@@ -345,6 +626,33 @@ class TestApiLogos(_ServerFixture):
 
 class TestApiUpdate(_ServerFixture):
 
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Keep the history of the versions written by these tests out of the real one
+        cls.history_dir = tempfile.mkdtemp()
+        cls.original_store = EditorHandler.app.tier_dict_store
+        EditorHandler.app.tier_dict_store = TierDictStore(history_dir=cls.history_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        EditorHandler.app.tier_dict_store = cls.original_store
+        shutil.rmtree(cls.history_dir)
+        super().tearDownClass()
+
+    def _post_with_etag(self, path, payload, etag):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        raw = json.dumps(payload).encode("utf-8")
+        conn.request("POST", path, body=raw, headers={
+            "Content-Type": "application/json",
+            "Content-Length": str(len(raw)),
+            "If-Match": etag,
+        })
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        return resp, body
+
     def setUp(self):
         # Read the real tier_dict so we can restore it after each test
         with open(TIER_DICT_PATH, "r", encoding="utf-8") as f:
@@ -388,6 +696,86 @@ class TestApiUpdate(_ServerFixture):
             saved = json.load(f)
         self.assertEqual(saved[first_tier][first_name].get("_test_sentinel"), 42)
 
+    def test_update_changes_data_etag(self):
+        original = _load_tier_dict()
+        resp, _ = self._get("/api/data")
+        etag = resp.getheader("ETag")
+        self._post("/api/update", payload={tier: {} for tier in original})
+        resp, body = self._get("/api/data")
+        self.assertNotEqual(resp.getheader("ETag"), etag)
+        self.assertEqual(self._json(body)["tier_dict"], {tier: {} for tier in original})
+
+    def test_update_with_current_etag_succeeds(self):
+        resp, _ = self._get("/api/data")
+        resp, body = self._post_with_etag("/api/update", _load_tier_dict(), resp.getheader("ETag"))
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader("ETag"), self._json(body)["etag"])
+
+    def test_update_with_stale_etag_returns_412(self):
+        original = _load_tier_dict()
+        resp, _ = self._get("/api/data")
+        stale_etag = resp.getheader("ETag")
+        self._post("/api/update", payload={tier: {} for tier in original})
+        resp, body = self._post_with_etag("/api/update", original, stale_etag)
+        self.assertEqual(resp.status, 412)
+        self.assertEqual(_load_tier_dict(), {tier: {} for tier in original})
+        current_resp, _ = self._get("/api/data")
+        self.assertEqual(self._json(body)["etag"], current_resp.getheader("ETag"))
+
+    def _patch(self, payload, etag=None):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        raw = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(raw))}
+        if etag is not None:
+            headers["If-Match"] = etag
+        conn.request("PATCH", "/api/data", body=raw, headers=headers)
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        return resp, body
+
+    def test_patch_moves_restaurant(self):
+        original = _load_tier_dict()
+        name = next(iter(original["B"]))
+        resp, _ = self._get("/api/data")
+        resp, body = self._patch({"ops": [{"op": "move", "name": name, "tier": "S", "index": 0}]},
+                                 resp.getheader("ETag"))
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader("ETag"), self._json(body)["etag"])
+        saved = _load_tier_dict()
+        self.assertEqual(next(iter(saved["S"])), name)
+        self.assertNotIn(name, saved["B"])
+
+    def test_invalid_patch_returns_400(self):
+        resp, _ = self._patch({"ops": [{"op": "delete", "name": "_does_not_exist"}]})
+        self.assertEqual(resp.status, 400)
+        resp, _ = self._patch(["not", "an", "object"])
+        self.assertEqual(resp.status, 400)
+        name = next(iter(_load_tier_dict()["A"]))
+        for op in ({"op": "move", "name": name, "tier": "A", "index": [1]},
+                   {"op": "move", "name": name, "tier": ["A"]},
+                   {"op": "update", "name": name, "fields": [1]}):
+            resp, _ = self._patch({"ops": [op]})
+            self.assertEqual(resp.status, 400)
+
+    def test_patch_with_stale_etag_returns_412(self):
+        resp, _ = self._patch({"ops": []}, '"stale"')
+        self.assertEqual(resp.status, 412)
+
+    def test_history_and_rollback(self):
+        original = _load_tier_dict()
+        self._post("/api/update", payload={tier: {} for tier in original})
+        resp, body = self._get("/api/history")
+        self.assertEqual(resp.status, 200)
+        previous = self._json(body)["history"][0]["id"]
+        resp, _ = self._post("/api/rollback", payload={"id": previous})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(_load_tier_dict(), original)
+
+    def test_rollback_to_unknown_version_returns_404(self):
+        resp, _ = self._post("/api/rollback", payload={"id": "../../etc/passwd"})
+        self.assertEqual(resp.status, 404)
+
     def test_update_written_as_valid_json(self):
         original = _load_tier_dict()
         self._post("/api/update", payload=original)
@@ -418,6 +806,141 @@ class TestApiUpdate(_ServerFixture):
         self.assertIn("application/json", resp.getheader("Content-Type", ""))
 
 
+class TestApiThumb(_ServerFixture):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.logo = sorted(f for f in os.listdir(LOGOS_DIR) if f.lower().endswith(".jpg"))[0]
+
+    def _image(self, body):
+        return Image.open(io.BytesIO(body))
+
+    def test_thumbnail_has_requested_height(self):
+        resp, body = self._get(f"/api/thumb/{urllib.parse.quote(self.logo)}?h=100")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader("Content-Type"), "image/jpeg")
+        self.assertEqual(self._image(body).size[1], 100)
+
+    def test_thumbnail_is_much_smaller_than_logo(self):
+        _, body = self._get(f"/api/thumb/{urllib.parse.quote(self.logo)}?h=100")
+        self.assertLess(len(body), os.path.getsize(os.path.join(LOGOS_DIR, self.logo)))
+
+    def test_height_is_clamped(self):
+        _, body = self._get(f"/api/thumb/{urllib.parse.quote(self.logo)}?h=100000")
+        self.assertEqual(self._image(body).size[1], 512)
+
+    def test_invalid_height_returns_400(self):
+        resp, _ = self._get(f"/api/thumb/{urllib.parse.quote(self.logo)}?h=big")
+        self.assertEqual(resp.status, 400)
+
+    def test_matching_etag_returns_304(self):
+        resp, _ = self._get(f"/api/thumb/{urllib.parse.quote(self.logo)}?h=100")
+        etag = resp.getheader("ETag")
+        self.assertTrue(etag)
+        self.assertIn("no-cache", resp.getheader("Cache-Control", ""))
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", f"/api/thumb/{urllib.parse.quote(self.logo)}?h=100", headers={"If-None-Match": etag})
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        self.assertEqual(resp.status, 304)
+
+    def test_etag_depends_on_height(self):
+        resp, _ = self._get(f"/api/thumb/{urllib.parse.quote(self.logo)}?h=100")
+        other, _ = self._get(f"/api/thumb/{urllib.parse.quote(self.logo)}?h=50")
+        self.assertNotEqual(resp.getheader("ETag"), other.getheader("ETag"))
+
+    def test_unknown_logo_returns_404(self):
+        resp, _ = self._get("/api/thumb/_does_not_exist.jpg")
+        self.assertEqual(resp.status, 404)
+
+    def test_path_traversal_blocked(self):
+        for name in ("..%2Fsrc%2Ftierlist%2Ftier_dict.json", "..%2F..%2Fetc%2Fpasswd", "..%2Fassets%2Fpng%2F1.png"):
+            resp, _ = self._get(f"/api/thumb/{name}")
+            self.assertEqual(resp.status, 404, name)
+
+
+class TestApiAtlas(_ServerFixture):
+
+    def test_atlas_maps_every_logo(self):
+        resp, body = self._get("/api/atlas?h=50")
+        self.assertEqual(resp.status, 200)
+        atlas = self._json(body)
+        logos = {f"logos/{f}" for f in os.listdir(LOGOS_DIR) if f.lower().endswith((".png", ".jpg", ".jpeg"))}
+        self.assertEqual(set(atlas["logos"]), logos)
+        for x, y, w, h in atlas["logos"].values():
+            self.assertEqual(h, 50)
+
+    def test_atlas_image_contains_every_logo(self):
+        _, body = self._get("/api/atlas?h=50")
+        atlas = self._json(body)
+        resp, image = self._get(atlas["image"])
+        self.assertEqual(resp.status, 200)
+        self.assertIn("immutable", resp.getheader("Cache-Control", ""))
+        width, height = Image.open(io.BytesIO(image)).size
+        for x, y, w, h in atlas["logos"].values():
+            self.assertLessEqual(x + w, width)
+            self.assertLessEqual(y + h, height)
+
+    def test_no_logos_returns_empty_atlas(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            os.chdir(tmp_dir)
+            response = EditorHandler.app.get_atlas("/api/atlas?h=50", {})
+        finally:
+            os.chdir(ROOT_DIR)
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.body), {"image": None, "height": 50, "logos": {}})
+
+    def test_atlas_serves_the_listed_logos_only(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            os.chdir(tmp_dir)
+            os.mkdir("logos")
+            for name in ("a.png", "b.webp"):
+                Image.new("RGB", (100, 100)).save(os.path.join("logos", name))
+            atlas = json.loads(EditorHandler.app.get_atlas("/api/atlas?h=50", {}).body)
+            thumb = EditorHandler.app.get_thumbnail("/api/thumb/b.webp?h=50", {})
+            listed = list(LogoIndex("logos").get()[1])
+        finally:
+            os.chdir(ROOT_DIR)
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(list(atlas["logos"]), ["logos/a.png"])
+        self.assertEqual(thumb.status, 404)
+        self.assertEqual(listed, ["a.png"])
+
+    def test_matching_etag_returns_304(self):
+        resp, _ = self._get("/api/atlas?h=50")
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/api/atlas?h=50", headers={"If-None-Match": resp.getheader("ETag")})
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        self.assertEqual(resp.status, 304)
+
+    def test_new_logo_creates_new_atlas(self):
+        _, body = self._get("/api/atlas?h=50")
+        old_image = self._json(body)["image"]
+        path = os.path.join(LOGOS_DIR, "_test_atlas_logo.png")
+        Image.new("RGB", (100, 100), (255, 0, 0)).save(path)
+        try:
+            _, body = self._get("/api/atlas?h=50")
+            atlas = self._json(body)
+            self.assertIn("logos/_test_atlas_logo.png", atlas["logos"])
+            self.assertNotEqual(atlas["image"], old_image)
+            resp, _ = self._get(old_image)
+            self.assertEqual(resp.status, 404)
+        finally:
+            os.remove(path)
+
+    def test_unknown_atlas_image_returns_404(self):
+        for name in ("atlas-50-0123456789abcdef.jpg", "..%2F..%2Fsrc%2Ftierlist%2Ftier_dict.json"):
+            resp, _ = self._get(f"/api/atlas/{name}")
+            self.assertEqual(resp.status, 404, name)
+
+
 # ===========================================================================
 # 5. API: POST /api/rename_logo
 # ===========================================================================
@@ -493,6 +1016,19 @@ class TestApiRenameLogo(_ServerFixture):
         # Original file must still exist
         self.assertTrue(os.path.exists(self._tmp_logo))
 
+    def test_rename_is_reported_as_logo_change(self):
+        # Pick up the logo created by setUp(), without waiting for the next poll
+        version = EditorHandler.app.logo_index.refresh()
+        self._post("/api/rename_logo", payload={
+            "old_path": "logos/_test_logo_original.jpg",
+            "new_path": "logos/_test_logo_renamed.jpg",
+        })
+        data = self._json(self._get(f"/api/logos?since={version}")[1])
+        changes = {change["name"]: change["logo"] for change in data["changes"]}
+        self.assertIsNone(changes["_test_logo_original.jpg"])
+        self.assertEqual(changes["_test_logo_renamed.jpg"]["size"], 3)
+        self.assertGreater(data["version"], version)
+
     def test_rename_response_is_json(self):
         resp, _ = self._post("/api/rename_logo", payload={
             "old_path": "logos/_test_logo_original.jpg",
@@ -501,6 +1037,169 @@ class TestApiRenameLogo(_ServerFixture):
         self.assertIn("application/json", resp.getheader("Content-Type", ""))
 
 
+# ===========================================================================
+# 5b. API: POST /api/run_tierlist and the render job API
+# ===========================================================================
+
+class TestApiRunTierlist(_ServerFixture):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.original_jobs = EditorHandler.app.render_jobs
+        # Render into a temporary directory instead of tierlist_output/
+        engine = RenderEngine(
+            image_names=tuple(os.path.join(cls.tmp_dir, name) for name in
+                              ("tierlist.png", "tierlist_with_year_tag.png", "tierlist_with_year_first_visited_tag.png")),
+            manifest_path=os.path.join(cls.tmp_dir, "manifest.json"),
+        )
+        engine.warm()
+        EditorHandler.app.render_jobs = RenderJobQueue(engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        EditorHandler.app.render_jobs = cls.original_jobs
+        shutil.rmtree(cls.tmp_dir)
+        super().tearDownClass()
+
+    def _wait_for_job(self, job_id):
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            resp, body = self._get(f"/api/render/{job_id}")
+            self.assertEqual(resp.status, 200)
+            state = self._json(body)
+            if state["status"] in ("done", "failed"):
+                return state
+            time.sleep(0.05)
+        self.fail(f"Render job {job_id} did not finish")
+
+    def test_run_saves_every_image(self):
+        resp, body = self._post("/api/run_tierlist", payload={"force": True})
+        self.assertEqual(resp.status, 200)
+        data = self._json(body)
+        self.assertEqual(data.get("status"), "success")
+        self.assertTrue(data.get("rendered"))
+        for name in EditorHandler.app.render_jobs.engine.image_names:
+            self.assertTrue(os.path.exists(name), name)
+
+    def test_run_reports_render_time(self):
+        _, body = self._post("/api/run_tierlist", payload={"force": True})
+        self.assertIsInstance(self._json(body).get("render_time"), float)
+
+    def test_run_without_body_is_accepted(self):
+        resp, _ = self._post("/api/run_tierlist")
+        self.assertEqual(resp.status, 200)
+
+    def test_unchanged_tier_dict_is_not_rendered_again(self):
+        self._post("/api/run_tierlist")
+        _, body = self._post("/api/run_tierlist")
+        data = self._json(body)
+        self.assertFalse(data.get("rendered"))
+        self.assertEqual(data.get("rendered_tiers"), [])
+
+    def test_forced_run_only_redraws_changed_tiers(self):
+        # Every tier was rendered in memory by warm(), and none changed since
+        _, body = self._post("/api/run_tierlist", payload={"force": True})
+        self.assertEqual(self._json(body).get("rendered_tiers"), [])
+
+    def test_render_returns_job_id_immediately(self):
+        resp, body = self._post("/api/render", payload={"force": True})
+        self.assertEqual(resp.status, 202)
+        data = self._json(body)
+        self.assertIn("job_id", data)
+        self.assertIn(data["status"], ("queued", "running", "done"))
+        self._wait_for_job(data["job_id"])
+
+    def test_render_job_reports_artefacts(self):
+        _, body = self._post("/api/render", payload={"force": True})
+        state = self._wait_for_job(self._json(body)["job_id"])
+        self.assertEqual(state["status"], "done")
+        self.assertEqual(state["completed"], state["total"])
+        self.assertEqual(state["result"]["images"], list(EditorHandler.app.render_jobs.engine.image_names))
+
+    def test_render_events_stream_progress_until_done(self):
+        _, body = self._post("/api/render", payload={"force": True})
+        job_id = self._json(body)["job_id"]
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=30)
+        conn.request("GET", f"/api/render/{job_id}/events")
+        resp = conn.getresponse()
+        self.assertIn("text/event-stream", resp.getheader("Content-Type", ""))
+        stream = resp.read().decode("utf-8")
+        conn.close()
+        events = [line[len("event: "):] for line in stream.splitlines() if line.startswith("event: ")]
+        self.assertEqual(events[-1], "done")
+        last = json.loads([line for line in stream.splitlines() if line.startswith("data: ")][-1][len("data: "):])
+        self.assertEqual(last["completed"], last["total"])
+
+    def test_unknown_render_job_returns_404(self):
+        resp, _ = self._get("/api/render/does-not-exist")
+        self.assertEqual(resp.status, 404)
+        resp, _ = self._get("/api/render/does-not-exist/events")
+        self.assertEqual(resp.status, 404)
+
+
+class _BlockingEngine:
+    """A render engine whose renders wait until released, to control the timing of render jobs."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.runs = []
+
+    def run(self, force=False, progress=None):
+        self.runs.append(force)
+        self.started.set()
+        self.release.wait(5)
+        if progress is not None:
+            progress("S", 1, 1)
+        return {"rendered": True}
+
+
+class TestRenderJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = _BlockingEngine()
+        self.jobs = RenderJobQueue(self.engine)
+
+    def tearDown(self):
+        self.engine.release.set()
+
+    def test_requests_during_a_render_are_coalesced(self):
+        running = self.jobs.submit()
+        self.assertTrue(self.engine.started.wait(5))
+        queued = [self.jobs.submit() for _ in range(5)]
+        self.assertNotEqual(queued[0].id, running.id)
+        self.assertEqual({job.id for job in queued}, {queued[0].id})
+        self.engine.release.set()
+        self.assertTrue(queued[0].wait(5))
+        self.assertEqual(len(self.engine.runs), 2)
+
+    def test_coalesced_job_is_forced_if_any_request_is(self):
+        self.jobs.submit()
+        self.assertTrue(self.engine.started.wait(5))
+        self.jobs.submit()
+        job = self.jobs.submit(force=True)
+        self.engine.release.set()
+        self.assertTrue(job.wait(5))
+        self.assertEqual(self.engine.runs, [False, True])
+
+    def test_finished_job_has_progress_and_result(self):
+        self.engine.release.set()
+        job = self.jobs.submit()
+        self.assertTrue(job.wait(5))
+        self.assertEqual(job.to_dict()["status"], "done")
+        self.assertEqual((job.step, job.completed, job.total), ("S", 1, 1))
+        self.assertEqual(job.result, {"rendered": True})
+
+    def test_failed_render_is_reported(self):
+        self.engine.run = lambda force=False, progress=None: 1 / 0
+        job = self.jobs.submit()
+        self.assertTrue(job.wait(5))
+        self.assertEqual(job.status, "failed")
+        self.assertIn("division", job.error)
+
+
 # ===========================================================================
 # 6. Static file serving
 # ===========================================================================
@@ -560,6 +1259,200 @@ class TestStaticFileServing(_ServerFixture):
         self.assertIn("no-cache", cc)
 
 
+class TestNegotiateEncoding(unittest.TestCase):
+
+    def test_no_header_is_uncompressed(self):
+        self.assertIsNone(negotiate_encoding("", ["br", "gzip"]))
+
+    def test_server_preference_wins_on_equal_weights(self):
+        self.assertEqual(negotiate_encoding("gzip, deflate, br", ["br", "gzip"]), "br")
+
+    def test_weights_are_respected(self):
+        self.assertEqual(negotiate_encoding("br;q=0.5, gzip", ["br", "gzip"]), "gzip")
+
+    def test_zero_weight_excludes_encoding(self):
+        self.assertIsNone(negotiate_encoding("gzip;q=0", ["gzip"]))
+
+    def test_wildcard(self):
+        self.assertEqual(negotiate_encoding("*", ["gzip"]), "gzip")
+
+    def test_unavailable_encoding_is_uncompressed(self):
+        self.assertIsNone(negotiate_encoding("br", ["gzip"]))
+
+
+class TestLogoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.logo_dir = tempfile.mkdtemp()
+        self._write_logo("a.png", (30, 20))
+        self.index = LogoIndex(self.logo_dir, poll_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.logo_dir, ignore_errors=True)
+
+    def _write_logo(self, name, size, color="red"):
+        Image.new("RGB", size, color).save(os.path.join(self.logo_dir, name))
+
+    def test_logo_details(self):
+        _, logos = self.index.get()
+        self.assertEqual(list(logos), ["a.png"])
+        self.assertEqual((logos["a.png"]["width"], logos["a.png"]["height"]), (30, 20))
+        self.assertEqual(logos["a.png"]["size"], os.path.getsize(os.path.join(self.logo_dir, "a.png")))
+        self.assertEqual(len(logos["a.png"]["digest"]), 40)
+
+    def test_other_files_are_ignored(self):
+        with open(os.path.join(self.logo_dir, "notes.txt"), "w") as f:
+            f.write("not a logo")
+        self.assertEqual(list(self.index.get()[1]), ["a.png"])
+
+    def test_unchanged_directory_keeps_version(self):
+        version = self.index.refresh()
+        self.assertEqual(self.index.refresh(), version)
+        self.assertEqual(self.index.changes_since(version), (version, []))
+
+    def test_added_and_removed_logos(self):
+        version = self.index.refresh()
+        self._write_logo("b.png", (10, 10))
+        os.remove(os.path.join(self.logo_dir, "a.png"))
+        new_version, changes = self.index.changes_since(version)
+        self.assertEqual(new_version, version + 2)
+        self.assertEqual([name for name, _ in changes], ["a.png", "b.png"])
+        self.assertIsNone(changes[0][1])
+        self.assertEqual(changes[1][1]["width"], 10)
+
+    def test_replaced_logo_gets_new_digest(self):
+        version, logos = self.index.get()
+        self._write_logo("a.png", (30, 20), color="blue")
+        os.utime(os.path.join(self.logo_dir, "a.png"), ns=(1, 1))
+        _, changes = self.index.changes_since(version)
+        self.assertEqual([name for name, _ in changes], ["a.png"])
+        self.assertNotEqual(changes[0][1]["digest"], logos["a.png"]["digest"])
+
+    def test_unknown_version_has_no_changes(self):
+        version = self.index.refresh()
+        self.assertIsNone(self.index.changes_since(version + 1)[1])
+        self.assertIsNone(self.index.changes_since(0)[1])
+
+    def test_scan_is_reused_within_poll_interval(self):
+        index = LogoIndex(self.logo_dir, poll_interval=3600)
+        version = index.get()[0]
+        self._write_logo("b.png", (10, 10))
+        self.assertEqual(index.get()[0], version)
+        self.assertEqual(index.refresh(), version + 1)
+
+
+class TestEditorAssetsBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        for name, content in (("editor.html", '<link href="editor.css"><script src="editor.js"></script>'),
+                              ("editor.css", "body {}"), ("editor.js", "let a = 1;")):
+            with open(os.path.join(self.source_dir, name), "w", encoding="utf-8") as f:
+                f.write(content)
+        self.assets = EditorAssets(self.source_dir, self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.source_dir, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _hashed_js_path(self):
+        return next(path for path in self.assets.build() if path.endswith(".js") and path != "/editor.js")
+
+    def test_modified_source_gets_new_url(self):
+        old_path = self._hashed_js_path()
+        with open(os.path.join(self.source_dir, "editor.js"), "w", encoding="utf-8") as f:
+            f.write("let a = 2; // changed")
+        new_path = self._hashed_js_path()
+        self.assertNotEqual(old_path, new_path)
+        self.assertEqual(self.assets.response(old_path, {}).status, 404)
+
+    def test_outdated_files_are_removed(self):
+        self.assets.build()
+        before = set(os.listdir(self.cache_dir))
+        with open(os.path.join(self.source_dir, "editor.css"), "w", encoding="utf-8") as f:
+            f.write("body { color: red; }")
+        self.assets.build()
+        after = set(os.listdir(self.cache_dir))
+        self.assertEqual(len(before), len(after))
+        self.assertNotEqual(before, after)
+
+
+class TestEditorAssets(_ServerFixture):
+
+    def _get_with_headers(self, path, headers):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", path, headers=headers)
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        return resp, body
+
+    def _asset_urls(self):
+        _, body = self._get("/editor.html")
+        return re.findall(r'(?:href|src)="(editor\.[0-9a-f]{12}\.(?:css|js))"', body.decode("utf-8"))
+
+    def test_html_references_hashed_assets(self):
+        urls = self._asset_urls()
+        self.assertEqual(sorted(os.path.splitext(url)[1] for url in urls), [".css", ".js"])
+
+    def test_hashed_asset_matches_source(self):
+        url = next(url for url in self._asset_urls() if url.endswith(".js"))
+        resp, body = self._get("/" + url)
+        self.assertEqual(resp.status, 200)
+        with open(EDITOR_JS_PATH, "rb") as f:
+            self.assertEqual(body, f.read())
+
+    def test_hashed_asset_is_immutable(self):
+        url = next(url for url in self._asset_urls() if url.endswith(".css"))
+        resp, _ = self._get("/" + url)
+        self.assertIn("immutable", resp.getheader("Cache-Control", ""))
+        self.assertIn("css", resp.getheader("Content-Type", ""))
+
+    def test_unknown_hash_returns_404(self):
+        resp, _ = self._get("/editor.0123456789ab.js")
+        self.assertEqual(resp.status, 404)
+
+    def test_gzip_variant(self):
+        url = next(url for url in self._asset_urls() if url.endswith(".js"))
+        resp, body = self._get_with_headers("/" + url, {"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(resp.getheader("Vary"), "Accept-Encoding")
+        with open(EDITOR_JS_PATH, "rb") as f:
+            source = f.read()
+        self.assertEqual(gzip.decompress(body), source)
+        self.assertLess(len(body), len(source) // 2)
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_variant(self):
+        url = next(url for url in self._asset_urls() if url.endswith(".js"))
+        resp, body = self._get_with_headers("/" + url, {"Accept-Encoding": "gzip, br"})
+        self.assertEqual(resp.getheader("Content-Encoding"), "br")
+        with open(EDITOR_JS_PATH, "rb") as f:
+            self.assertEqual(brotli.decompress(body), f.read())
+
+    def test_uncompressed_without_accept_encoding(self):
+        resp, _ = self._get("/editor.html")
+        self.assertIsNone(resp.getheader("Content-Encoding"))
+
+    def test_html_revalidates_with_etag(self):
+        resp, _ = self._get_with_headers("/editor.html", {"Accept-Encoding": "gzip"})
+        etag = resp.getheader("ETag")
+        self.assertIsNotNone(etag)
+        resp, body = self._get_with_headers("/editor.html", {"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual(resp.status, 304)
+        self.assertEqual(body, b"")
+
+    def test_etag_differs_per_encoding(self):
+        resp, _ = self._get("/editor.html")
+        resp_gzip, _ = self._get_with_headers("/editor.html", {"Accept-Encoding": "gzip"})
+        self.assertNotEqual(resp.getheader("ETag"), resp_gzip.getheader("ETag"))
+
+    def test_api_responses_stay_uncached(self):
+        resp, _ = self._get_with_headers("/api/history", {"Accept-Encoding": "gzip"})
+        self.assertIn("no-store", resp.getheader("Cache-Control", ""))
+
+
 # ===========================================================================
 # 7. editor.html structural integrity
 # ===========================================================================
@@ -913,6 +1806,25 @@ class TestEditorJsIntegrity(unittest.TestCase):
     def test_has_navigate_modal(self):
         self.assertTrue(self._has_function("navigateModal"))
 
+    def test_logo_changes_are_polled(self):
+        self.assertTrue(self._has_function("pollLogoChanges"))
+        self.assertIn("/api/logos?since=", self.js)
+
+    def test_logos_are_loaded_from_atlas(self):
+        self.assertTrue(self._has_function("loadLogoAtlas"))
+        self.assertIn("/api/atlas", self.js)
+
+    def test_logos_are_loaded_as_thumbnails(self):
+        self.assertIn("/api/thumb/", self.js)
+
+    def test_save_sends_patch_operations(self):
+        self.assertIn("'PATCH'", self.js)
+        self.assertTrue(self._has_function("placementOp"))
+        self.assertTrue(self._has_function("changedFields"))
+
+    def test_save_sends_if_match(self):
+        self.assertIn("If-Match", self.js)
+
     def test_has_init(self):
         self.assertTrue(self._has_function("init"))
 
@@ -980,8 +1892,11 @@ class TestEditorJsIntegrity(unittest.TestCase):
     def test_references_api_rename_logo(self):
         self.assertIn("/api/rename_logo", self.js)
 
-    def test_references_api_run_tierlist(self):
-        self.assertIn("/api/run_tierlist", self.js)
+    def test_references_api_render(self):
+        self.assertIn("/api/render", self.js)
+
+    def test_has_render_progress_stream(self):
+        self.assertIn("EventSource", self.js)
 
     # ---- init() is called ----
     def test_init_called_at_end(self):
@@ -1084,5 +1999,136 @@ class TestDataConsistency(unittest.TestCase):
                 self.assertLessEqual(info["year_first_visited"], 2100)
 
 
+# ===========================================================================
+# 11. async_editor_server.py: same API routes and static files
+# ===========================================================================
+
+class TestAsyncApiData(TestApiData):
+    async_server = True
+
+
+class TestAsyncApiLogos(TestApiLogos):
+    async_server = True
+
+
+class TestAsyncApiUpdate(TestApiUpdate):
+    async_server = True
+
+
+class TestAsyncApiThumb(TestApiThumb):
+    async_server = True
+
+
+class TestAsyncApiAtlas(TestApiAtlas):
+    async_server = True
+
+
+class TestAsyncApiRenameLogo(TestApiRenameLogo):
+    async_server = True
+
+
+class TestAsyncApiRunTierlist(TestApiRunTierlist):
+    async_server = True
+
+
+class TestAsyncRenderEvents(_ServerFixture):
+    async_server = True
+
+    def setUp(self):
+        self.engine = _BlockingEngine()
+        self.render_jobs = EditorHandler.app.render_jobs
+        EditorHandler.app.render_jobs = RenderJobQueue(self.engine)
+
+    def tearDown(self):
+        self.engine.release.set()
+        EditorHandler.app.render_jobs = self.render_jobs
+
+    def _open_stream(self, job):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", f"/api/render/{job.id}/events")
+        resp = conn.getresponse()
+        self.assertEqual(resp.status, 200)
+        return conn, resp
+
+    def test_event_streams_do_not_hold_api_workers(self):
+        job = EditorHandler.app.render_jobs.submit()
+        self.assertTrue(self.engine.started.wait(5))
+        streams = [self._open_stream(job) for _ in range(self.server.executor._max_workers + 2)]
+        try:
+            resp, _ = self._get("/api/data")
+            self.assertEqual(resp.status, 200)
+            self.engine.release.set()
+            for _, resp in streams:
+                events = [line for line in resp.read().decode("utf-8").splitlines() if line.startswith("event: ")]
+                self.assertEqual(events[-1], "event: done")
+        finally:
+            for conn, _ in streams:
+                conn.close()
+
+    def test_disconnected_stream_stops_listening(self):
+        job = EditorHandler.app.render_jobs.submit()
+        self.assertTrue(self.engine.started.wait(5))
+        conn, resp = self._open_stream(job)
+        resp.fp.readline()
+        conn.close()
+        self.engine.release.set()
+        self.assertTrue(job.wait(5))
+        deadline = time.monotonic() + 5
+        while job._listeners and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(job._listeners, [])
+
+
+class TestAsyncStaticFileServing(TestStaticFileServing):
+    async_server = True
+
+    def test_keep_alive_serves_several_requests_per_connection(self):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            for path in ("/editor.html", "/api/data", "/editor.js", "/api/logos"):
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                body = resp.read()
+                self.assertEqual(resp.status, 200, path)
+                self.assertEqual(len(body), int(resp.getheader("Content-Length")), path)
+                self.assertFalse(resp.will_close, path)
+        finally:
+            conn.close()
+
+    def test_static_file_matches_file_on_disk(self):
+        _, body = self._get("/editor.js")
+        with open(EDITOR_JS_PATH, "rb") as f:
+            self.assertEqual(body, f.read())
+
+    def test_parent_directory_is_not_served(self):
+        resp, _ = self._get("/../../../etc/passwd")
+        self.assertEqual(resp.status, 404)
+
+    def test_connection_close_is_honoured(self):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", "/api/logos", headers={"Connection": "close"})
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        self.assertEqual(resp.getheader("Connection"), "close")
+
+    def test_unsupported_method_returns_501(self):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("DELETE", "/api/data")
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        self.assertEqual(resp.status, 501)
+
+    def test_malformed_request_returns_400(self):
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+            sock.sendall(b"NONSENSE\r\n\r\n")
+            self.assertTrue(sock.recv(1024).startswith(b"HTTP/1.1 400"))
+
+
+
+class TestAsyncEditorAssets(TestEditorAssets):
+    async_server = True
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
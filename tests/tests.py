@@ -10,18 +10,32 @@ $ export PYTHONPATH="${PYTHONPATH}:/root/path"
 
 """
 
+import asyncio
+import copy
 import json
+import math
 import os
+import shutil
+import subprocess
 import sys
+import tempfile
+import threading
 import unittest
 import time
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'tierlist')))
 
-from PIL import Image
+from PIL import Image, ImageChops, ImageStat
 
-from helper import RESTAURANT_NAMES
-from tierlist import make_tierlist
+import helper
+import helper_core
+import render_cache
+from helper_core import RESTAURANT_NAMES, RESTAURANT_YEARS, YEAR_BACKGROUND, YEAR_BACKGROUND_HIGHLIGHTED, \
+    change_image_color, generate_year_images
+from render_cache import load_logo_atlas, load_resized_logo, load_thumbnail, resize_logo, save_image_atomically
+import tierlist
+from tierlist import make_tierlist, make_tierlist_variants, build_tierlists, IncrementalRenderer, TierlistLayout, \
+    DEFAULT_WIDTH, TIERLIST_VARIANTS
 
 LOGOS_PATH = "logos"
 
@@ -72,6 +86,931 @@ class TestMakeTierList(unittest.TestCase):
             print(t2)
             self.fail('All invocations of make_tierlist with unchanged tier_dict.json should not change resulting tier list')
 
+    def test_make_tierlist_parallel_matches_sequential(self):
+        for with_year_tag, with_year_first_visited_tag in TIERLIST_VARIANTS:
+            sequential = make_tierlist(with_year_tag=with_year_tag, with_year_first_visited_tag=with_year_first_visited_tag)
+            parallel = make_tierlist(with_year_tag=with_year_tag, with_year_first_visited_tag=with_year_first_visited_tag,
+                                     workers=2)
+            if parallel != sequential:
+                self.fail(f'make_tierlist({with_year_tag}, {with_year_first_visited_tag}, workers=2) differs from the sequential render')
+
+    def test_make_tierlist_parallel_raises_exception(self):
+        with self.assertRaises(ValueError):
+            make_tierlist(with_year_tag=True, with_year_first_visited_tag=True, workers=2)
+
+    def test_make_tierlist_variants_matches_make_tierlist(self):
+        variants = make_tierlist_variants()
+        self.assertEqual(len(variants), len(TIERLIST_VARIANTS))
+        for (with_year_tag, with_year_first_visited_tag), tierlist in zip(TIERLIST_VARIANTS, variants):
+            expected = make_tierlist(with_year_tag=with_year_tag, with_year_first_visited_tag=with_year_first_visited_tag)
+            if tierlist != expected:
+                self.fail(f'make_tierlist_variants() differs from make_tierlist({with_year_tag}, {with_year_first_visited_tag})')
+
+    def test_make_tierlist_variants_performance(self):
+        # Rendering all three variants in a single pass should cost about as much as one render
+        cutoff = 3.6
+        start = time.time()
+        make_tierlist_variants()
+        end = time.time()
+        if end - start > cutoff:
+            print(end - start)
+            self.fail(f"Failed the performance test with cutoff {cutoff} seconds")
+
+
+class TestIncrementalRenderer(unittest.TestCase):
+    def setUp(self):
+        with open('src/tierlist/tier_dict.json') as f:
+            self.tier_dict = json.load(f)
+        self.renderer = IncrementalRenderer()
+
+    def test_first_render_matches_make_tierlist_variants(self):
+        self.assertEqual(self.renderer.render(self.tier_dict), make_tierlist_variants())
+        self.assertEqual(self.renderer.rendered_tiers, list(self.tier_dict.keys()))
+
+    def test_unchanged_tier_dict_renders_no_tier(self):
+        first = self.renderer.render(self.tier_dict)
+        second = self.renderer.render(copy.deepcopy(self.tier_dict))
+        self.assertEqual(self.renderer.rendered_tiers, [])
+        self.assertEqual(first, second)
+
+    def test_moved_restaurant_renders_only_affected_tiers(self):
+        self.renderer.render(self.tier_dict)
+        new_tier_dict = copy.deepcopy(self.tier_dict)
+        source, target = "D", "E"
+        name = next(iter(new_tier_dict[source]))
+        new_tier_dict[target][name] = new_tier_dict[source].pop(name)
+        tierlists = self.renderer.render(new_tier_dict)
+        layout = TierlistLayout(new_tier_dict)
+        if layout.num_logos_per_row == TierlistLayout(self.tier_dict).num_logos_per_row:
+            self.assertEqual(self.renderer.rendered_tiers, [source, target])
+        else:
+            # A different number of logos per row changes the width of every tier
+            self.assertEqual(self.renderer.rendered_tiers, list(new_tier_dict.keys()))
+        self.assertEqual(tierlists, make_tierlist_variants(layout))
+
+    def test_changed_number_of_rows_reflows_tierlist(self):
+        self.renderer.render(self.tier_dict)
+        new_tier_dict = copy.deepcopy(self.tier_dict)
+        new_tier_dict["F"] = {}
+        tierlists = self.renderer.render(new_tier_dict)
+        self.assertEqual(tierlists, make_tierlist_variants(TierlistLayout(new_tier_dict)))
+
+    def test_render_leaves_default_tierlist_unchanged(self):
+        expected = make_tierlist()
+        new_tier_dict = copy.deepcopy(self.tier_dict)
+        new_tier_dict["F"] = {}
+        self.renderer.render(new_tier_dict)
+        self.assertEqual(make_tierlist(), expected)
+        self.assertIs(tierlist.TIER_DICT, helper_core.TIER_DICT)
+
+    def test_changed_tag_asset_renders_every_tier(self):
+        # Render with a copy of the tag assets, so that the real ones are never modified
+        tags_dir = tempfile.mkdtemp()
+        shutil.copytree(tierlist.TAGS_BASE_PATH, tags_dir, dirs_exist_ok=True)
+        tags_base_path, tierlist.TAGS_BASE_PATH = tierlist.TAGS_BASE_PATH, tags_dir + os.sep
+        tierlist.TAGS_IMAGE_DICT.clear()
+        try:
+            self.renderer.render(self.tier_dict)
+            tag_path = os.path.join(tags_dir, "1.png")
+            with Image.open(tag_path) as tag:
+                tag.transpose(Image.Transpose.FLIP_LEFT_RIGHT).save(tag_path)
+            stat = os.stat(tag_path)
+            os.utime(tag_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            tierlists = self.renderer.render(self.tier_dict)
+            self.assertEqual(self.renderer.rendered_tiers, list(self.tier_dict.keys()))
+            self.assertEqual(tierlists, make_tierlist_variants())
+        finally:
+            tierlist.TAGS_BASE_PATH = tags_base_path
+            tierlist.TAGS_IMAGE_DICT.clear()
+            shutil.rmtree(tags_dir)
+
+
+class TestBuildTierlists(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.image_names = tuple(os.path.join(self.tmp_dir, f"tierlist_{i}.png") for i in range(len(TIERLIST_VARIANTS)))
+        self.manifest_path = os.path.join(self.tmp_dir, "manifest.json")
+        with open('src/tierlist/tier_dict.json') as f:
+            self.tier_dict = json.load(f)
+
+    def _build(self, force=False, tier_dict=None):
+        return build_tierlists(force=force, image_names=self.image_names, manifest_path=self.manifest_path,
+                               tier_dict=tier_dict)
+
+    def test_build_saves_every_variant(self):
+        self.assertTrue(self._build())
+        for name, expected in zip(self.image_names, make_tierlist_variants()):
+            with Image.open(name) as saved:
+                self.assertEqual(saved.convert("RGB").tobytes(), expected.tobytes())
+
+    def test_unchanged_inputs_skip_render(self):
+        self._build()
+        self.assertFalse(self._build())
+
+    def test_force_renders_unchanged_inputs(self):
+        self._build()
+        self.assertTrue(self._build(force=True))
+
+    def test_changed_tier_dict_renders(self):
+        self._build()
+        new_tier_dict = copy.deepcopy(self.tier_dict)
+        name = next(iter(new_tier_dict["S"]))
+        new_tier_dict["S"][name]["price"] = new_tier_dict["S"][name]["price"] % 4 + 1
+        self.assertTrue(self._build(tier_dict=new_tier_dict))
+
+    def test_year_tags_created_before_inputs_digest(self):
+        calls = []
+        create_missing_year_images, compute_render_inputs_digest = \
+            tierlist.create_missing_year_images, tierlist.compute_render_inputs_digest
+        tierlist.create_missing_year_images = lambda years: calls.append("year tags")
+        tierlist.compute_render_inputs_digest = \
+            lambda *args: calls.append("digest") or compute_render_inputs_digest(*args)
+        try:
+            self._build()
+        finally:
+            tierlist.create_missing_year_images = create_missing_year_images
+            tierlist.compute_render_inputs_digest = compute_render_inputs_digest
+        self.assertEqual(calls[:2], ["year tags", "digest"])
+
+    def test_manifest_only_keeps_current_files(self):
+        self._build()
+        new_tier_dict = copy.deepcopy(self.tier_dict)
+        removed = new_tier_dict["S"].pop(next(iter(new_tier_dict["S"])))["path_to_logo_image"]
+        self._build(tier_dict=new_tier_dict)
+        files = render_cache.load_manifest(self.manifest_path)["files"]
+        self.assertNotIn(removed, files)
+        self.assertIn(os.path.abspath(helper_core.__file__), files)
+
+    def test_missing_or_modified_output_renders(self):
+        self._build()
+        os.remove(self.image_names[0])
+        self.assertTrue(self._build())
+        Image.new("RGB", (10, 10)).save(self.image_names[1])
+        self.assertTrue(self._build())
+        self.assertFalse(self._build())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestLogoCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        self.logo_path = os.path.join(self.tmp_dir, "logo.jpg")
+        shutil.copy(os.path.join(LOGOS_PATH, sorted(os.listdir(LOGOS_PATH))[0]), self.logo_path)
+
+    def test_cached_logo_matches_resized_logo(self):
+        expected = resize_logo(self.logo_path, DEFAULT_WIDTH).tobytes()
+        # First call populates the cache, second call reads from it
+        self.assertEqual(load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir).tobytes(), expected)
+        self.assertEqual(load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir).tobytes(), expected)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_logo_loaded_in_memory_can_be_modified(self):
+        expected = load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir)
+        expected_bytes = expected.tobytes()
+        expected.paste((255, 0, 0), (0, 0, 10, 10))
+        # The logo is now loaded from memory, and must not contain the pasted square
+        self.assertEqual(load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir).tobytes(), expected_bytes)
+
+    def test_logo_loaded_in_memory_is_kept_per_cache_dir(self):
+        load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir)
+        other_cache_dir = os.path.join(self.tmp_dir, "other_cache")
+        load_resized_logo(self.logo_path, DEFAULT_WIDTH, other_cache_dir)
+        self.assertEqual(len(os.listdir(other_cache_dir)), 1)
+
+    def test_logo_loaded_in_memory_is_invalidated_by_cache_version(self):
+        load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir)
+        render_cache.LOGO_CACHE_VERSION += 1
+        try:
+            load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir)
+        finally:
+            render_cache.LOGO_CACHE_VERSION -= 1
+        # Read from the new on-disk entry, which replaced the outdated one
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_thumbnail_is_cached_jpeg(self):
+        thumb_path, key = load_thumbnail(self.logo_path, 100, self.cache_dir)
+        self.assertEqual(load_thumbnail(self.logo_path, 100, self.cache_dir), (thumb_path, key))
+        with Image.open(thumb_path) as thumb:
+            self.assertEqual(thumb.format, "JPEG")
+            self.assertEqual(thumb.size[1], 100)
+
+    def test_transparent_thumbnail_is_png(self):
+        png_path = os.path.join(self.tmp_dir, "transparent.png")
+        Image.new("RGBA", (400, 400), (255, 0, 0, 0)).save(png_path)
+        thumb_path, _ = load_thumbnail(png_path, 100, self.cache_dir)
+        with Image.open(thumb_path) as thumb:
+            self.assertEqual(thumb.format, "PNG")
+            self.assertEqual(thumb.getpixel((0, 0))[3], 0)
+
+    def test_atlas_contains_every_logo(self):
+        other_path = os.path.join(self.tmp_dir, "other.png")
+        Image.new("RGB", (300, 100), (0, 0, 255)).save(other_path)
+        atlas_path, positions, _ = load_logo_atlas([self.logo_path, other_path], 100, self.cache_dir)
+        with Image.open(atlas_path) as atlas:
+            x, y, w, h = positions[other_path]
+            self.assertEqual((w, h), (300, 100))
+            r, g, b = atlas.convert("RGB").getpixel((x + w // 2, y + h // 2))
+            self.assertGreater(b, 200)
+            self.assertLess(r, 50)
+            self.assertEqual(positions[self.logo_path][2:], [resize_logo(self.logo_path, 100).size[0], 100])
+
+    def test_atlas_without_logos_has_no_image(self):
+        atlas_path, positions, _ = load_logo_atlas([], 100, self.cache_dir)
+        self.assertIsNone(atlas_path)
+        self.assertEqual(positions, {})
+
+    def test_atlas_logos_are_kept_apart_from_logo_cache(self):
+        load_logo_atlas([self.logo_path], 100, self.cache_dir)
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, "logos"))), 1)
+
+    def test_modified_logo_creates_new_atlas(self):
+        atlas_path, _, key = load_logo_atlas([self.logo_path], 100, self.cache_dir)
+        self.assertEqual(load_logo_atlas([self.logo_path], 100, self.cache_dir)[2], key)
+        Image.new("RGB", (400, 400), (255, 0, 0)).save(self.logo_path, format="JPEG")
+        stat = os.stat(self.logo_path)
+        os.utime(self.logo_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        new_atlas_path, _, new_key = load_logo_atlas([self.logo_path], 100, self.cache_dir)
+        self.assertNotEqual(new_key, key)
+        self.assertFalse(os.path.exists(atlas_path))
+        self.assertTrue(os.path.exists(new_atlas_path))
+
+    def test_saved_files_are_not_owner_only(self):
+        umask = os.umask(0)
+        os.umask(umask)
+        path = os.path.join(self.tmp_dir, "new.png")
+        save_image_atomically(Image.new("RGB", (4, 4)), path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+        # Replacing a file keeps its mode
+        os.chmod(path, 0o640)
+        save_image_atomically(Image.new("RGB", (4, 4)), path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+
+    def test_logos_with_the_same_name_keep_their_entries(self):
+        png_path = os.path.join(self.tmp_dir, "logo.png")
+        Image.new("RGB", (400, 400), (0, 0, 255)).save(png_path)
+        other_dir = os.path.join(self.tmp_dir, "other")
+        os.mkdir(other_dir)
+        other_path = os.path.join(other_dir, "logo.jpg")
+        Image.new("RGB", (400, 400), (255, 0, 0)).save(other_path)
+        for _ in range(2):
+            for path in (self.logo_path, png_path, other_path):
+                load_thumbnail(path, 100, self.cache_dir)
+                load_resized_logo(path, 100, os.path.join(self.cache_dir, "logos"))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 4)
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, "logos"))), 3)
+
+    def test_cache_is_keyed_by_height(self):
+        load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir)
+        small = load_resized_logo(self.logo_path, DEFAULT_WIDTH // 2, self.cache_dir)
+        self.assertEqual(small.size[1], DEFAULT_WIDTH // 2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_modified_logo_invalidates_cache(self):
+        load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir)
+        old_entries = os.listdir(self.cache_dir)
+        Image.new("RGB", (400, 400), (255, 0, 0)).save(self.logo_path, format="JPEG")
+        stat = os.stat(self.logo_path)
+        os.utime(self.logo_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        logo = load_resized_logo(self.logo_path, DEFAULT_WIDTH, self.cache_dir)
+        self.assertGreater(logo.getpixel((0, 0))[0], 200)
+        # The outdated entry should have been replaced, not kept alongside the new one
+        new_entries = os.listdir(self.cache_dir)
+        self.assertEqual(len(new_entries), 1)
+        self.assertNotEqual(old_entries, new_entries)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+class FakeCollection:
+    """A stand-in for a pymongo collection, supporting the queries used by helper.py, which records every query."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    @staticmethod
+    def _matches(document, query):
+        return all(document.get(key) == value for key, value in query.items())
+
+    @staticmethod
+    def _project(document, projection):
+        if projection is None:
+            return copy.deepcopy(document)
+        result = {} if projection.get("_id", 1) == 0 or "_id" not in document else {"_id": document["_id"]}
+        for path, included in projection.items():
+            if path == "_id" or not included:
+                continue
+            source, target = document, result
+            keys = path.split(".")
+            for key in keys[:-1]:
+                if not isinstance(source.get(key), dict):
+                    break
+                source = source[key]
+                target = target.setdefault(key, {})
+            else:
+                if keys[-1] in source:
+                    target[keys[-1]] = copy.deepcopy(source[keys[-1]])
+        return result
+
+    def find(self, query=None, projection=None):
+        self.queries.append(("find", query, projection))
+        return [self._project(document, projection) for document in self.documents
+                if self._matches(document, query or {})]
+
+    def find_one(self, query=None, projection=None):
+        self.queries.append(("find_one", query, projection))
+        for document in self.documents:
+            if self._matches(document, query or {}):
+                return self._project(document, projection)
+        return None
+
+
+def _gmaps_document(index, name, business_status="OPERATIONAL", periods=None):
+    result = {"name": name, "business_status": business_status, "url": f"https://maps.google.com/?cid={index}",
+              "website": f"https://example.com/{index}", "reviews": ["not used by the bot"] * 5,
+              "formatted_address": "1 Queen St W"}
+    if periods is not None:
+        result["opening_hours"] = {"periods": periods,
+                                   "weekday_text": [f"{day}: Open 24 hours" for day in
+                                                    ("Monday", "Tuesday", "Wednesday", "Thursday",
+                                                     "Friday", "Saturday", "Sunday")]}
+    return {"_id": f"id{index}", "index": index, "json": {"result": result, "status": "OK"}}
+
+
+class TestGmapsDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = FakeCollection([
+            _gmaps_document(0, RESTAURANT_NAMES[0], periods=[{"open": {"day": 0, "time": "0000"}}]),
+            _gmaps_document(1, RESTAURANT_NAMES[1], business_status="CLOSED_PERMANENTLY"),
+            {"_id": "id2", "index": 2, "json": None},
+        ])
+        self.original_get_collection = helper.get_collection
+        helper.get_collection = lambda: self.collection
+        helper.gmaps_document_cache.clear()
+
+    def tearDown(self):
+        helper.get_collection = self.original_get_collection
+        helper.gmaps_document_cache.clear()
+
+    def test_single_query_with_projection(self):
+        documents = helper.load_gmaps_documents(self.collection)
+        self.assertEqual(self.collection.queries, [("find", {}, helper.GMAPS_INFO_PROJECTION)])
+        self.assertEqual(sorted(documents), [0, 1, 2])
+        self.assertIsNone(documents[2])
+        self.assertNotIn("reviews", documents[0]["result"])
+        self.assertNotIn("_id", documents[0])
+
+    def test_embeds_are_served_from_memory(self):
+        for _ in range(3):
+            helper.get_gmaps_info(0)
+            helper.get_gmaps_info(1)
+        self.assertEqual(len(self.collection.queries), 1)
+
+    def test_gmaps_info(self):
+        open_status, link, website, hours = helper.get_gmaps_info(0)
+        self.assertEqual(open_status, "Operational (Open Now)")
+        self.assertEqual(link, "https://maps.google.com/?cid=0")
+        self.assertEqual(website, "https://example.com/0")
+        self.assertEqual(len(hours.splitlines()), 7)
+        self.assertEqual(helper.get_gmaps_info(1), ["Permanently Closed", "https://maps.google.com/?cid=1",
+                                                    "https://example.com/1", None])
+
+    def test_matches_find_one_per_page(self):
+        expected = [dict(self.collection.find_one({"index": i}))["json"] for i in range(3)]
+        documents = helper.load_gmaps_documents(self.collection)
+        for i in range(2):
+            self.assertEqual(helper.get_gmaps_info(i, documents), helper.get_gmaps_info(i, {i: expected[i]}))
+
+    def test_reload_fetches_documents_again(self):
+        helper.get_gmaps_documents()
+        helper.get_gmaps_documents(reload=True)
+        self.assertEqual(len(self.collection.queries), 2)
+
+    def test_verify_restaurant_names_uses_one_query(self):
+        cwd = os.getcwd()
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            os.chdir(tmp_dir)
+            helper.verify_restaurant_names()
+            with open("mismatches.txt", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "")
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(len(self.collection.queries), 1)
+
+
+class TestGmapsDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.loads = 0
+        self.fail = False
+        self.cache = helper.GmapsDocumentCache(loader=self._load, ttl=60, clock=lambda: self.now)
+
+    def _load(self):
+        self.loads += 1
+        if self.fail:
+            raise ConnectionError("database unreachable")
+        return {0: {"load": self.loads}}
+
+    def test_loaded_once_within_ttl(self):
+        self.assertEqual(self.cache.get(), {0: {"load": 1}})
+        self.now = 59
+        self.assertEqual(self.cache.get(), {0: {"load": 1}})
+        self.assertEqual(self.loads, 1)
+
+    def test_stale_documents_served_while_refreshing(self):
+        async def read_stale():
+            self.cache.load()
+            self.now = 60
+            stale = self.cache.get()
+            # Concurrent stale reads share a single refresh
+            self.cache.get()
+            await self.cache.refresh()
+            return stale, self.cache.get()
+
+        stale, fresh = asyncio.run(read_stale())
+        self.assertEqual(stale, {0: {"load": 1}})
+        self.assertEqual(fresh, {0: {"load": 2}})
+        self.assertEqual(self.loads, 2)
+        self.assertFalse(self.cache.is_stale())
+
+    def test_failed_refresh_keeps_stale_documents(self):
+        async def refresh_failing():
+            self.cache.load()
+            self.now = 60
+            self.fail = True
+            return await self.cache.refresh()
+
+        self.assertEqual(asyncio.run(refresh_failing()), {0: {"load": 1}})
+        self.assertTrue(self.cache.is_stale())
+
+    def test_stale_documents_reloaded_synchronously_outside_event_loop(self):
+        self.cache.get()
+        self.now = 60
+        self.assertEqual(self.cache.get(), {0: {"load": 2}})
+
+    def test_failed_synchronous_reload_keeps_stale_documents(self):
+        self.cache.get()
+        self.now = 60
+        self.fail = True
+        self.assertEqual(self.cache.get(), {0: {"load": 1}})
+        self.assertEqual(self.loads, 2)
+
+    def test_periodic_refresh(self):
+        cache = helper.GmapsDocumentCache(loader=self._load, ttl=0.01)
+
+        async def run_for_a_while():
+            task = cache.start()
+            self.assertIs(cache.start(), task)
+            await asyncio.sleep(0.2)
+            task.cancel()
+
+        asyncio.run(run_for_a_while())
+        self.assertGreaterEqual(self.loads, 3)
+
+    def test_reads_do_not_wait_for_slow_refresh(self):
+        def slow_load():
+            time.sleep(0.5)
+            return {}
+
+        async def read_during_refresh():
+            self.cache.load()
+            self.cache.loader = slow_load
+            self.now = 60
+            start = time.perf_counter()
+            self.cache.get()
+            await asyncio.sleep(0)
+            self.cache.get()
+            elapsed = time.perf_counter() - start
+            await self.cache.refresh()
+            return elapsed
+
+        self.assertLess(asyncio.run(read_during_refresh()), 0.1)
+
+
+def _period(open_day, open_time, close_day=None, close_time=None):
+    period = {"open": {"day": open_day, "time": open_time}}
+    if close_day is not None:
+        period["close"] = {"day": close_day, "time": close_time}
+    return period
+
+
+def _minute(day, hhmm):
+    return helper.minute_of_week(day, hhmm)
+
+
+class TestOpeningSchedule(unittest.TestCase):
+    WEEKDAY_TEXT = [f"{day}: hours" for day in
+                    ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")]
+
+    def test_regular_hours(self):
+        schedule = helper.OpeningSchedule([_period(day, "1100", day, "2200") for day in range(1, 6)])
+        self.assertFalse(schedule.is_open_at(_minute(1, "1059")))
+        self.assertTrue(schedule.is_open_at(_minute(1, "1100")))
+        self.assertTrue(schedule.is_open_at(_minute(5, "2159")))
+        self.assertFalse(schedule.is_open_at(_minute(5, "2200")))
+        # Closed on weekends
+        self.assertFalse(schedule.is_open_at(_minute(0, "1200")))
+        self.assertFalse(schedule.is_open_at(_minute(6, "1200")))
+        self.assertEqual(len(schedule.starts), 5)
+
+    def test_several_periods_per_day(self):
+        schedule = helper.OpeningSchedule([_period(2, "1100", 2, "1400"), _period(2, "1700", 2, "2100")])
+        self.assertTrue(schedule.is_open_at(_minute(2, "1200")))
+        self.assertFalse(schedule.is_open_at(_minute(2, "1500")))
+        self.assertTrue(schedule.is_open_at(_minute(2, "2000")))
+
+    def test_overnight_hours(self):
+        schedule = helper.OpeningSchedule([_period(5, "1800", 6, "0200")])
+        self.assertTrue(schedule.is_open_at(_minute(6, "0130")))
+        self.assertFalse(schedule.is_open_at(_minute(6, "0200")))
+        # Still Friday on Google Maps
+        self.assertEqual(schedule.maps_day_at(_minute(6, "0130")), 5)
+        self.assertEqual(schedule.maps_day_at(_minute(6, "0300")), 6)
+
+    def test_overnight_hours_across_end_of_week(self):
+        schedule = helper.OpeningSchedule([_period(6, "2000", 0, "0200")])
+        self.assertTrue(schedule.is_open_at(_minute(6, "2300")))
+        self.assertTrue(schedule.is_open_at(_minute(0, "0100")))
+        self.assertFalse(schedule.is_open_at(_minute(0, "0200")))
+        self.assertEqual(schedule.maps_day_at(_minute(0, "0100")), 6)
+
+    def test_back_to_back_periods_keep_their_own_day(self):
+        schedule = helper.OpeningSchedule([_period(1, "0000", 2, "0000"), _period(2, "0000", 3, "0000")])
+        self.assertEqual(schedule.maps_day_at(_minute(2, "1000")), 2)
+        self.assertEqual(schedule.maps_day_at(_minute(1, "2300")), 1)
+        schedule = helper.OpeningSchedule([_period(1, "1100", 2, "0200"), _period(2, "0200", 3, "0100")])
+        self.assertEqual(schedule.maps_day_at(_minute(2, "0100")), 1)
+        self.assertEqual(schedule.maps_day_at(_minute(2, "0200")), 2)
+        self.assertEqual(schedule.maps_day_at(_minute(2, "1000")), 2)
+        # Still Tuesday on Google Maps after midnight
+        self.assertEqual(schedule.maps_day_at(_minute(3, "0030")), 2)
+        self.assertEqual(len(schedule.starts), 1)
+
+    def test_open_24_hours(self):
+        schedule = helper.OpeningSchedule([_period(0, "0000")])
+        self.assertTrue(schedule.always_open)
+        for day in range(7):
+            self.assertTrue(schedule.is_open_at(_minute(day, "0300")))
+            self.assertEqual(schedule.maps_day_at(_minute(day, "0300")), day)
+        self.assertTrue(schedule.is_open_at(helper.MINUTES_PER_WEEK - 1))
+
+    def test_open_every_day_around_the_clock(self):
+        schedule = helper.OpeningSchedule([_period(day, "0000", (day + 1) % 7, "0000") for day in range(7)])
+        self.assertTrue(schedule.is_open_at(_minute(3, "1500")))
+        self.assertEqual(len(schedule.starts), 1)
+
+    def test_is_open_now_and_highlighted_day(self):
+        schedule = helper.OpeningSchedule([_period(1, "1100", 2, "0100")])
+        self.assertTrue(helper.is_open_now(schedule, _minute(2, "0030")))
+        self.assertFalse(helper.is_open_now(schedule, _minute(2, "0130")))
+        lines = helper.reformat_opening_hours_text(self.WEEKDAY_TEXT, schedule, _minute(2, "0030")).splitlines()
+        # Lines start on Sunday, Monday is still the current day on Google Maps
+        self.assertEqual(lines[0], "Sunday: hours")
+        self.assertEqual(lines[1], "**Monday: hours**")
+        lines = helper.reformat_opening_hours_text(self.WEEKDAY_TEXT, schedule, _minute(2, "0130")).splitlines()
+        self.assertEqual(lines[2], "**Tuesday: hours**")
+
+    def test_schedules_compiled_once_per_load(self):
+        cache = helper.GmapsDocumentCache(loader=lambda: {
+            0: _gmaps_document(0, "A", periods=[_period(0, "0000")])["json"],
+            1: _gmaps_document(1, "B", business_status="CLOSED_PERMANENTLY")["json"],
+        })
+        documents = cache.get()
+        schedules = cache.opening_schedules(documents)
+        self.assertIs(cache.opening_schedules(cache.get()), schedules)
+        self.assertEqual(sorted(schedules), [0])
+
+
+class TestOpenRestaurantIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.documents = {
+            0: _gmaps_document(0, "A", periods=[_period(day, "1100", day, "2200") for day in range(1, 6)])["json"],
+            1: _gmaps_document(1, "B", periods=[_period(5, "1800", 6, "0200"), _period(6, "2000", 0, "0200")])["json"],
+            2: _gmaps_document(2, "C", periods=[_period(0, "0000")])["json"],
+            3: _gmaps_document(3, "D", business_status="CLOSED_TEMPORARILY", periods=[_period(0, "0000")])["json"],
+            4: _gmaps_document(4, "E")["json"],
+        }
+
+    def test_bitmap_matches_schedules(self):
+        schedules = helper.compile_opening_schedules(self.documents)
+        index = helper.OpenRestaurantIndex(schedules)
+        for minute in range(helper.MINUTES_PER_WEEK):
+            expected = [i for i in sorted(schedules) if schedules[i].is_open_at(minute)]
+            self.assertEqual(index.open_at(minute), expected)
+
+    def test_only_operational_restaurants(self):
+        self.assertEqual(helper.open_restaurants_at(_minute(1, "1200"), self.documents), [0, 2])
+        self.assertEqual(helper.open_restaurants_at(_minute(0, "0100"), self.documents), [1, 2])
+        self.assertEqual(helper.open_restaurants_at(_minute(0, "0300"), self.documents), [2])
+
+    def test_index_built_once_per_load(self):
+        cache = helper.GmapsDocumentCache(loader=lambda: self.documents)
+        documents = cache.get()
+        index = cache.open_restaurant_index(documents)
+        self.assertIs(cache.open_restaurant_index(cache.get()), index)
+        self.assertEqual(index.indexes.tolist(), [0, 1, 2])
+
+    def test_parse_minute_of_week(self):
+        self.assertEqual(helper.parse_minute_of_week(1, "11:30"), _minute(1, "1130"))
+        self.assertEqual(helper.parse_minute_of_week(6, "0005"), _minute(6, "0005"))
+        for time_text in ("24:00", "12:60", "noon", "1:5"):
+            with self.assertRaises(ValueError):
+                helper.parse_minute_of_week(1, time_text)
+        with self.assertRaises(ValueError):
+            helper.parse_minute_of_week(7, "1200")
+
+    def test_open_now_embed(self):
+        embed = helper.create_open_now_embed([0, 1], _minute(3, "1830"), now=False)
+        self.assertEqual(embed.title, "Open on Wednesday at 18:30")
+        self.assertIn(RESTAURANT_NAMES[1], embed.description)
+        self.assertEqual(embed.footer.text, "2 restaurants open")
+        self.assertEqual(helper.create_open_now_embed([], 0).description, "No restaurant is open.")
+
+    def test_open_now_embed_skips_unknown_restaurants(self):
+        embed = helper.create_open_now_embed([0, len(RESTAURANT_NAMES)], 0)
+        self.assertEqual(embed.description.count("\n"), 0)
+        self.assertEqual(embed.footer.text, "1 restaurant open")
+
+    def test_open_now_embed_truncated(self):
+        open_indexes = list(range(len(RESTAURANT_NAMES))) * 20
+        embed = helper.create_open_now_embed(open_indexes, 0)
+        self.assertLessEqual(len(embed.description), helper.OPEN_NOW_EMBED_MAX_LENGTH)
+        self.assertRegex(embed.description.splitlines()[-1], r"^\.\.\.and \d+ more$")
+
+
+class SlowFakeCollection(FakeCollection):
+    """A FakeCollection whose queries take delay seconds, like a remote database, which records their concurrency."""
+
+    def __init__(self, documents, delay):
+        super().__init__(documents)
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        # Queries run on several threads of the database pool
+        self.lock = threading.Lock()
+
+    def find(self, query=None, projection=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            return super().find(query, projection)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class TestAsyncDatabaseAccess(unittest.TestCase):
+    DELAY = 0.1
+    INTERACTIONS = 8
+
+    def setUp(self):
+        self.collection = SlowFakeCollection([
+            _gmaps_document(0, RESTAURANT_NAMES[0], periods=[{"open": {"day": 0, "time": "0000"}}]),
+            _gmaps_document(1, RESTAURANT_NAMES[1], business_status="CLOSED_PERMANENTLY"),
+        ], self.DELAY)
+        self.original_get_collection = helper.get_collection
+        helper.get_collection = lambda: self.collection
+        helper.gmaps_document_cache.clear()
+
+    def tearDown(self):
+        helper.get_collection = self.original_get_collection
+        helper.gmaps_document_cache.clear()
+
+    def _simulate_interactions(self, query):
+        """Run INTERACTIONS concurrent interactions querying the database, alongside a ping interaction
+        that does not, and return (latency of the slowest database interaction, latency of the ping)."""
+        async def timed(coroutine, arrival):
+            await coroutine
+            return time.perf_counter() - arrival
+
+        async def run():
+            # Every interaction arrives at the same time, latencies are measured from then
+            arrival = time.perf_counter()
+            queries = [asyncio.ensure_future(timed(query(), arrival)) for _ in range(self.INTERACTIONS)]
+            ping_latency = await timed(asyncio.sleep(0), arrival)
+            return max(await asyncio.gather(*queries)), ping_latency
+
+        return asyncio.run(run())
+
+    def test_embed_matches_blocking_embed(self):
+        blocking_file, blocking_embed = helper.create_restaurants_embed(0)
+        helper.gmaps_document_cache.clear()
+        file, embed = asyncio.run(helper.create_restaurants_embed_async(0))
+        blocking_file.close()
+        file.close()
+        self.assertEqual(embed.to_dict(), blocking_embed.to_dict())
+
+    def test_first_load_does_not_block_event_loop(self):
+        _, ping_latency = self._simulate_interactions(lambda: helper.get_gmaps_info_async(1))
+        self.assertLess(ping_latency, self.DELAY / 2)
+        self.assertEqual(len(self.collection.queries), 1)
+
+    def test_pool_is_bounded(self):
+        async def query():
+            await helper.run_db(helper.load_gmaps_documents)
+
+        self._simulate_interactions(query)
+        self.assertLessEqual(self.collection.max_running, helper.DB_WORKERS)
+
+    def test_concurrent_interaction_latency(self):
+        async def blocking_query():
+            helper.load_gmaps_documents()
+
+        async def async_query():
+            await helper.run_db(helper.load_gmaps_documents)
+
+        blocking_latency, blocking_ping = self._simulate_interactions(blocking_query)
+        async_latency, async_ping = self._simulate_interactions(async_query)
+        # Blocking queries run one after the other on the event loop, and hold up every other interaction
+        self.assertGreaterEqual(blocking_latency, self.INTERACTIONS * self.DELAY)
+        self.assertGreaterEqual(blocking_ping, self.INTERACTIONS * self.DELAY)
+        if async_latency >= blocking_latency / 2 or async_ping >= self.DELAY / 2:
+            print(f"\n{self.INTERACTIONS} interactions, {self.DELAY * 1000:.0f} ms per query: "
+                  f"blocking {blocking_latency * 1000:.0f} ms (ping {blocking_ping * 1000:.0f} ms), "
+                  f"async {async_latency * 1000:.0f} ms (ping {async_ping * 1000:.0f} ms)")
+            self.fail("Failed the concurrent interaction latency test")
+
+
+class TestImportTime(unittest.TestCase):
+    BOT_DEPENDENCIES = ("discord", "pymongo", "dotenv")
+    # Only needed by some helper_core and helper functions, imported when they are called
+    HEAVY_MODULES = ("numpy",)
+
+    def _import_in_subprocess(self, module):
+        """Import the module in a fresh interpreter, returning the import time and the loaded modules."""
+        code = ("import sys, time; sys.path.insert(0, 'src/tierlist'); start = time.perf_counter(); "
+                f"import {module}; print(time.perf_counter() - start); print(','.join(sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        elapsed, modules = result.stdout.splitlines()[-2:]
+        return float(elapsed), set(modules.split(","))
+
+    def test_helper_core_has_no_bot_dependencies(self):
+        _, modules = self._import_in_subprocess("helper_core")
+        for dependency in self.BOT_DEPENDENCIES:
+            self.assertNotIn(dependency, modules)
+
+    def test_tierlist_has_no_bot_dependencies(self):
+        _, modules = self._import_in_subprocess("tierlist")
+        for dependency in self.BOT_DEPENDENCIES:
+            self.assertNotIn(dependency, modules)
+
+    def test_tierlist_import_loads_no_tag(self):
+        code = "import sys; sys.path.insert(0, 'src/tierlist'); import tierlist; print(len(tierlist.TAGS_IMAGE_DICT))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split()[-1], "0")
+
+    def test_plain_tierlist_loads_no_year_tag(self):
+        code = ("import sys; sys.path.insert(0, 'src/tierlist'); import tierlist; tierlist.make_tierlist(); "
+                "print(','.join(sorted(tierlist.TAGS_IMAGE_DICT)))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        loaded_tags = result.stdout.split()[-1].split(",")
+        self.assertNotIn("vegan_small", loaded_tags)
+        for tag in loaded_tags:
+            self.assertFalse(tag.removesuffix("_highlighted").isdigit() and len(tag) >= 4, f"Year tag {tag} was loaded")
+
+    def test_helper_core_loads_no_heavy_module(self):
+        _, modules = self._import_in_subprocess("helper_core")
+        for module in self.HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_helper_loads_no_heavy_module(self):
+        _, modules = self._import_in_subprocess("helper")
+        for module in self.HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_helper_core_import_performance(self):
+        # Only catches large regressions, a fresh interpreter import time varies a lot between CI runners
+        cutoff = 1
+        elapsed, _ = self._import_in_subprocess("helper_core")
+        if elapsed > cutoff:
+            print(elapsed)
+            self.fail(f"Failed the import performance test with cutoff {cutoff} seconds")
+
+
+def _reference_change_image_color(input_path, output_path, new_color, old_color=None, tolerance=0):
+    """Pixel-by-pixel reference implementation of change_image_color, with RGB tuples only."""
+    img = Image.open(input_path).convert("RGBA")
+    pixels = img.load()
+    width, height = img.size
+    if old_color is None:
+        color_counts = {}
+        for y in range(height):
+            for x in range(width):
+                r, g, b, a = pixels[x, y]
+                if a >= 128:
+                    color_counts[(r, g, b)] = color_counts.get((r, g, b), 0) + 1
+        old_color = max(color_counts, key=color_counts.get)
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if all(abs((r, g, b)[i] - old_color[i]) <= tolerance for i in range(3)):
+                pixels[x, y] = (new_color[0], new_color[1], new_color[2], a)
+    img.save(output_path)
+
+
+class TestChangeImageColor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_path = "assets/png/year_background_highlighted.png"
+        self.expected_path = os.path.join(self.tmp_dir, "expected.png")
+        self.output_path = os.path.join(self.tmp_dir, "output.png")
+
+    def _assert_same_as_reference(self, input_path, new_color, old_color=None, tolerance=0):
+        _reference_change_image_color(input_path, self.expected_path, new_color, old_color, tolerance)
+        change_image_color(input_path, self.output_path, new_color, old_color, tolerance)
+        with Image.open(self.expected_path) as expected, Image.open(self.output_path) as output:
+            self.assertEqual(output.tobytes(), expected.tobytes())
+
+    def test_most_common_color_is_replaced(self):
+        self._assert_same_as_reference(self.input_path, (114, 0, 0))
+
+    def test_given_color_is_replaced(self):
+        with Image.open(self.input_path) as img:
+            old_color = img.convert("RGBA").getpixel((img.size[0] // 2, img.size[1] // 2))[:3]
+        self._assert_same_as_reference(self.input_path, (0, 114, 0), old_color=old_color)
+
+    def test_color_is_replaced_within_tolerance(self):
+        self._assert_same_as_reference(self.input_path, (114, 0, 0), tolerance=40)
+
+    def test_hex_colors_are_accepted(self):
+        change_image_color(self.input_path, self.output_path, "#720000")
+        _reference_change_image_color(self.input_path, self.expected_path, (114, 0, 0))
+        with Image.open(self.expected_path) as expected, Image.open(self.output_path) as output:
+            self.assertEqual(output.tobytes(), expected.tobytes())
+
+    def test_ties_pick_the_first_color_in_scan_order(self):
+        tie_path = os.path.join(self.tmp_dir, "tie.png")
+        # (9, 9, 9) and (1, 1, 1) are equally common, but (9, 9, 9) is found first
+        img = Image.new("RGBA", (4, 2), (1, 1, 1, 0))
+        for x, color in enumerate([(9, 9, 9, 255), (1, 1, 1, 255), (1, 1, 1, 255), (9, 9, 9, 255)]):
+            img.putpixel((x, 1), color)
+        img.save(tie_path)
+        self._assert_same_as_reference(tie_path, (255, 0, 0), old_color=None)
+        self._assert_same_as_reference(tie_path, (255, 0, 0), old_color=(9, 9, 9))
+
+    def test_transparent_image_raises_exception(self):
+        transparent_path = os.path.join(self.tmp_dir, "transparent.png")
+        Image.new("RGBA", (4, 4), (0, 0, 0, 0)).save(transparent_path)
+        with self.assertRaises(ValueError):
+            change_image_color(transparent_path, self.output_path, (114, 0, 0))
+
+    def test_change_image_color_performance(self):
+        cutoff = 0.5
+        start = time.time()
+        change_image_color(self.input_path, self.output_path, (114, 0, 0), tolerance=40)
+        end = time.time()
+        if end - start > cutoff:
+            print(end - start)
+            self.fail(f"Failed the performance test with cutoff {cutoff} seconds")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestYearImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.year_backgrounds = [(year, background) for year in RESTAURANT_YEARS
+                                 for background in (YEAR_BACKGROUND, YEAR_BACKGROUND_HIGHLIGHTED)]
+
+    def _assert_same_as_assets(self, paths):
+        self.assertEqual(len(paths), len(self.year_backgrounds))
+        for path in paths:
+            with Image.open(path) as output, \
+                    Image.open(os.path.join("assets/png", os.path.basename(path))) as expected:
+                self.assertEqual(output.tobytes(), expected.tobytes(), path)
+
+    def test_batch_matches_committed_year_images(self):
+        self._assert_same_as_assets(generate_year_images(self.year_backgrounds, self.tmp_dir))
+
+    def test_parallel_writes_match_committed_year_images(self):
+        self._assert_same_as_assets(generate_year_images(self.year_backgrounds, self.tmp_dir, workers=4))
+        self.assertFalse([name for name in os.listdir(self.tmp_dir) if name.endswith(".tmp")])
+
+    def test_only_missing_year_images_are_generated(self):
+        generated = []
+        original = helper_core.generate_year_images
+        helper_core.generate_year_images = lambda year_backgrounds, **kwargs: generated.extend(year_backgrounds)
+        try:
+            helper_core.create_missing_year_images(RESTAURANT_YEARS + [1999])
+        finally:
+            helper_core.generate_year_images = original
+        self.assertEqual(generated, [(1999, YEAR_BACKGROUND), (1999, YEAR_BACKGROUND_HIGHLIGHTED)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
 
 class TestLogos(unittest.TestCase):
     def setUp(self):
@@ -89,6 +1028,23 @@ class TestLogos(unittest.TestCase):
                 print(width, height, logo_dir)
                 self.fail()
 
+    def test_draft_decoded_logo_is_visually_equivalent(self):
+        # Logos are decoded at a reduced scale before resizing; the result must stay close
+        # (in terms of peak signal-to-noise ratio) to resizing the fully decoded logo
+        min_psnr = 32
+        for name in self.list_of_logo_names:
+            logo_dir = LOGOS_PATH + "/" + name
+            with Image.open(logo_dir) as image:
+                width, height = image.size
+                expected = image.resize((int(width * DEFAULT_WIDTH / height), DEFAULT_WIDTH)).convert("RGB")
+            actual = resize_logo(logo_dir, DEFAULT_WIDTH).convert("RGB")
+            self.assertEqual(actual.size, expected.size)
+            squared_error = sum(ImageStat.Stat(ImageChops.difference(actual, expected)).sum2)
+            mse = squared_error / (3 * actual.size[0] * actual.size[1])
+            psnr = 10 * math.log10(255 ** 2 / mse) if mse else math.inf
+            if psnr < min_psnr:
+                self.fail(f"{logo_dir}: PSNR of {psnr:.2f} dB is below {min_psnr} dB")
+
     def test_logo_extension_equals_jpg(self):
         for name in self.list_of_logo_names:
             try: